@@ -7,6 +7,11 @@ Unless required by applicable law or agreed to in writing, software?distributed
 import logging
 from .exchange2010 import Exchange2010Service  # noqa
 from .connection import ExchangeNTLMAuthConnection, ExchangeBasicAuthConnection  # noqa
+from .compat import HAS_ASYNCIO
+
+if HAS_ASYNCIO:
+  from .async_connection import ExchangeAsyncConnection  # noqa
+  from .exchange2010.async_service import AsyncExchange2010Service  # noqa
 
 # Silence notification of no default logging handler
 log = logging.getLogger("pyexchange")
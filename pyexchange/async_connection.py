@@ -0,0 +1,70 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+# asyncio flavours of the connections in connection.py. Needs Python 3.7 or later.
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .connection import DEFAULT_BACKOFF_FACTOR, DEFAULT_MAX_BACKOFF
+from .utils import backoff_delay
+
+log = logging.getLogger('pyexchange')
+
+DEFAULT_MAX_CONCURRENCY = 100
+
+
+class ExchangeBaseAsyncConnection(object):
+  """ Base class for asyncio Exchange connections. """
+
+  backoff_factor = DEFAULT_BACKOFF_FACTOR
+  max_backoff = DEFAULT_MAX_BACKOFF
+
+  async def send(self, body, headers=None, retries=2, timeout=30, encoding="utf-8"):
+    raise NotImplementedError
+
+  async def backoff(self, attempt):
+    """ Waits before retry number *attempt* (counting from zero), using jittered exponential backoff. """
+    delay = backoff_delay(attempt, self.backoff_factor, self.max_backoff)
+    log.debug(u'Backing off for %.2f seconds before retrying', delay)
+    await asyncio.sleep(delay)
+
+  def close(self):
+    pass
+
+
+class ExchangeAsyncConnection(ExchangeBaseAsyncConnection):
+  """
+  Makes any blocking connection awaitable. ::
+
+      connection = ExchangeAsyncConnection(
+        ExchangeNTLMAuthConnection(url=URL, username=USERNAME, password=PASSWORD, pool_maxsize=100),
+        max_concurrency=100,
+      )
+
+  NTLM authenticates each socket with a handshake that the asyncio HTTP clients don't speak, so the HTTP work
+  is still done by the wrapped connection (with its retries and connection pool), on a thread pool of
+  *max_concurrency* workers. Size the wrapped connection's ``pool_maxsize`` to match, so every request in
+  flight gets an already authenticated socket.
+  """
+
+  def __init__(self, connection, max_concurrency=DEFAULT_MAX_CONCURRENCY, executor=None):
+    self.connection = connection
+    self.backoff_factor = getattr(connection, 'backoff_factor', DEFAULT_BACKOFF_FACTOR)
+    self.max_backoff = getattr(connection, 'max_backoff', DEFAULT_MAX_BACKOFF)
+    self.executor = executor or ThreadPoolExecutor(max_workers=max_concurrency)
+
+  async def send(self, body, headers=None, retries=2, timeout=30, encoding=u"utf-8"):
+    loop = asyncio.get_running_loop()
+    send = partial(self.connection.send, body, headers=headers, retries=retries, timeout=timeout, encoding=encoding)
+    return await loop.run_in_executor(self.executor, send)
+
+  def close(self):
+    """ Shuts down the thread pool and closes the wrapped connection. """
+    self.executor.shutdown(wait=False)
+    if hasattr(self.connection, 'close'):
+      self.connection.close()
@@ -179,13 +179,14 @@ class BaseExchangeMessageService(object):
 
 class BaseExchangeMessageList(object):
 
-  def __init__(self, service, folder_id, delegate_for=None, **kwargs):
+  def __init__(self, service, folder_id, delegate_for=None, xml=None, **kwargs):
     
     self.service = service
     self._messages = []
 
-    response = self._fetch_message_items(folder_id, delegate_for, **kwargs)
-    self._parse_response_for_list_or_get_messages(response)
+    if xml is None:
+      xml = self._fetch_message_items(folder_id, delegate_for, **kwargs)
+    self._parse_response_for_list_or_get_messages(xml)
 
   def _fetch_message_items(self, folder_id, delegate_for):
     raise NotImplementedError
@@ -0,0 +1,80 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+
+
+class ExchangeNotificationEvent(object):
+  """
+  Something that happened to an item or folder in a subscribed folder.
+
+  Exactly one of ``item_id`` and ``folder_id`` is set, depending on what changed. ``parent_folder_id`` is the
+  folder it's in. Moves and copies also carry where it came from, in the ``old_*`` attributes.
+  """
+
+  event_type = None
+
+  def __init__(self, watermark=None, timestamp=None, item_id=None, folder_id=None, parent_folder_id=None,
+               old_item_id=None, old_folder_id=None, old_parent_folder_id=None, unread_count=None):
+    self.watermark = watermark
+    self.timestamp = timestamp
+    self.item_id = item_id
+    self.folder_id = folder_id
+    self.parent_folder_id = parent_folder_id
+    self.old_item_id = old_item_id
+    self.old_folder_id = old_folder_id
+    self.old_parent_folder_id = old_parent_folder_id
+    self.unread_count = unread_count
+
+  def __repr__(self):
+    return u'<%s: %s>' % (self.__class__.__name__, self.item_id or self.folder_id)
+
+  @property
+  def is_folder_event(self):
+    return self.folder_id is not None
+
+
+class ExchangeNewMailEvent(ExchangeNotificationEvent):
+  event_type = u'NewMailEvent'
+
+
+class ExchangeCreatedEvent(ExchangeNotificationEvent):
+  event_type = u'CreatedEvent'
+
+
+class ExchangeDeletedEvent(ExchangeNotificationEvent):
+  event_type = u'DeletedEvent'
+
+
+class ExchangeModifiedEvent(ExchangeNotificationEvent):
+  event_type = u'ModifiedEvent'
+
+
+class ExchangeMovedEvent(ExchangeNotificationEvent):
+  event_type = u'MovedEvent'
+
+
+class ExchangeCopiedEvent(ExchangeNotificationEvent):
+  event_type = u'CopiedEvent'
+
+
+class ExchangeFreeBusyChangedEvent(ExchangeNotificationEvent):
+  event_type = u'FreeBusyChangedEvent'
+
+
+class ExchangeStatusEvent(ExchangeNotificationEvent):
+  """ Sent when nothing has happened since the last poll. Only moves the watermark along. """
+  event_type = u'StatusEvent'
+
+
+NOTIFICATION_EVENT_CLASSES = dict((cls.event_type, cls) for cls in (
+  ExchangeNewMailEvent, ExchangeCreatedEvent, ExchangeDeletedEvent, ExchangeModifiedEvent, ExchangeMovedEvent,
+  ExchangeCopiedEvent, ExchangeFreeBusyChangedEvent, ExchangeStatusEvent,
+))
+
+# Everything you can subscribe to. StatusEvent isn't one of them; Exchange sends it by itself.
+ALL_EVENT_TYPES = (
+  u'NewMailEvent', u'CreatedEvent', u'DeletedEvent', u'ModifiedEvent', u'MovedEvent', u'CopiedEvent', u'FreeBusyChangedEvent',
+)
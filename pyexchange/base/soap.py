@@ -5,13 +5,20 @@ Licensed under the Apache License, Version 2.0 (the "License");?you may not use
 Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
 import logging
+import re
+import time
 
 from lxml import etree
 from lxml.builder import ElementMaker
 from datetime import datetime
 from pytz import utc
 
-from ..exceptions import FailedExchangeException
+from ..exceptions import FailedExchangeException, ExchangeInternalServerTransientErrorException, ExchangeServerBusyException
+from ..conflicts import ExchangeConflictPolicy
+from ..connection import DEFAULT_BACKOFF_FACTOR, DEFAULT_MAX_BACKOFF
+from ..throttling import ExchangeThrottlingScheduler
+from ..tracing import WireTracer
+from ..utils import backoff_delay
 
 SOAP_NS = u'http://schemas.xmlsoap.org/soap/envelope/'
 
@@ -20,33 +27,281 @@ S = ElementMaker(namespace=SOAP_NS, nsmap=SOAP_NAMESPACES)
 
 log = logging.getLogger('pyexchange')
 
+# Plain dict property maps get compiled the first time they're used. Cap how many we keep around, in case someone
+# builds a new map for every call.
+MAX_COMPILED_PROPERTY_MAPS = 256
+
+_compiled_property_maps = {}
+
+# Long-lived responses (like streaming notifications) are a run of complete SOAP envelopes, one after the other.
+# The end tag is bounded, so a new chunk only has to be searched along with the last few bytes before it.
+_END_OF_ENVELOPE = re.compile(br'</(?:[\w.-]{1,64}:)?Envelope\s{0,64}>')
+_MAX_END_OF_ENVELOPE_LENGTH = 2 + 65 + len(b'Envelope') + 64 + 1
+
+
+class CompiledPropertyMap(object):
+  """
+  A property map (see :meth:`ExchangeServiceSOAP._xpath_to_dict`) with all of its xpaths compiled up front. ::
+
+      ATTENDEE_PROPERTIES = CompiledPropertyMap({
+        u'name': {u'xpath': u't:Mailbox/t:Name'},
+        u'last_response': {u'xpath': u't:LastResponseTime', u'cast': u'datetime'},
+      }, namespace_map=soap_request.NAMESPACES)
+
+  Build them once, as module or class constants, and pass them to ``_xpath_to_dict`` instead of the dict.
+  """
+
+  def __init__(self, property_map, namespace_map):
+    self.property_map = property_map
+    self.namespace_map = namespace_map
+    self.extractors = [
+      (key, etree.XPath(item[u'xpath'], namespaces=namespace_map), item.get(u'cast', None))
+      for key, item in property_map.items()
+    ]
+
+
+def compile_property_map(property_map, namespace_map):
+  """
+  Returns the CompiledPropertyMap for a plain dict property map, compiling it only the first time that map is seen.
+  Maps are told apart by identity, so don't change a map after it has been used.
+  """
+  if isinstance(property_map, CompiledPropertyMap):
+    return property_map
+
+  # The compiled map holds on to both dicts, so their ids can't be reused while they're in here
+  cache_key = (id(property_map), id(namespace_map))
+  compiled = _compiled_property_maps.get(cache_key)
+
+  if compiled is None:
+    if len(_compiled_property_maps) >= MAX_COMPILED_PROPERTY_MAPS:
+      _compiled_property_maps.clear()
+    compiled = _compiled_property_maps[cache_key] = CompiledPropertyMap(property_map, namespace_map)
+
+  return compiled
+
+
+def _parse_bool(text):
+  return text.lower() == u'true'
+
 
 class ExchangeServiceSOAP(object):
 
   EXCHANGE_DATE_FORMAT = u"%Y-%m-%dT%H:%M:%SZ"
 
-  def __init__(self, connection):
+  def __init__(self, connection, scheduler=None, tracer=None, conflict_policy=None):
     self.connection = connection
+    self.scheduler = scheduler or ExchangeThrottlingScheduler()
+    self.tracer = tracer or WireTracer()
+    self.conflict_policy = conflict_policy or ExchangeConflictPolicy()
+    self._casts = {
+      u'datetime': self._parse_date,
+      u'date_only_naive': self._parse_date_only_naive,
+      u'int': int,
+      u'bool': _parse_bool,
+    }
+
+  def send(self, xml, headers=None, retries=4, timeout=30, encoding="utf-8", raise_item_errors=True):
+    """
+    Sends a request to Exchange and returns the parsed response.
+
+    Transport failures are retried by the connection. Exchange faults that say the request can be retried
+    (:class:`ExchangeInternalServerTransientErrorException`) are retried here, up to *retries* times. Only the
+    first send gets the connection's transport retries on top, so a request goes out at most ``2 * retries + 1``
+    times all told.
 
-  def send(self, xml, headers=None, retries=4, timeout=30, encoding="utf-8"):
+    When Exchange is throttling us (:class:`ExchangeServerBusyException`), requests for the same mailbox are held
+    back for as long as the server asked, then this one is sent again.
+
+    Requests that work on several items at once get a response message per item. With *raise_item_errors*
+    set to False, errors in those aren't raised, so the caller can deal with each item by itself.
+
+    Requests and responses are logged by :attr:`tracer` if wire tracing is switched on.
+    """
     request_xml = self._wrap_soap_xml_request(xml)
-    log.info(etree.tostring(request_xml, encoding=encoding, pretty_print=True))
-    response = self._send_soap_request(request_xml, headers=headers, retries=retries, timeout=timeout, encoding=encoding)
-    return self._parse(response, encoding=encoding)
+    throttle_key = self._throttle_key(xml)
+
+    traced = self.tracer.sample()
+    if traced:
+      self.tracer.trace(u'Request', request_xml)
+
+    attempt = 0
+    while True:
+      self.scheduler.wait(throttle_key)
+      response = self._send_soap_request(request_xml, headers=headers, retries=self._transport_retries(retries, attempt), timeout=timeout, encoding=encoding)
+      if traced:
+        self.tracer.trace(u'Response', response)
+      try:
+        return self._parse(response, encoding=encoding, raise_item_errors=raise_item_errors)
+      except (ExchangeServerBusyException, ExchangeInternalServerTransientErrorException) as err:
+        if attempt >= retries:
+          raise
+        if self._prepare_retry(err, attempt, retries, throttle_key):
+          self._backoff(attempt)
+
+      attempt += 1
+
+  def send_streaming(self, xml, tag, headers=None, retries=4, timeout=30, encoding="utf-8"):
+    """
+    Sends a request to Exchange and yields every *tag* element (in ``{namespace}name`` form) from the response as
+    soon as it has been read off the wire, so large responses never have to be held in memory all at once.
 
-  def _parse(self, response, encoding="utf-8"):
+    Each element is detached from the response before it is yielded, which keeps the partly parsed response
+    small. Only the outermost matches are yielded; nested elements with the same tag stay inside their parent.
+
+    Faults are retried the same way as :meth:`send`, as long as nothing has been yielded yet.
+    """
+    request_xml = self._wrap_soap_xml_request(xml)
+    throttle_key = self._throttle_key(xml)
+
+    if self.tracer.sample():
+      self.tracer.trace(u'Request (response is streamed, so not traced)', request_xml)
+
+    attempt = 0
+    while True:
+      self.scheduler.wait(throttle_key)
+      chunks = self._send_soap_request(request_xml, headers=headers, retries=self._transport_retries(retries, attempt), timeout=timeout,
+                                       encoding=encoding, stream=True)
+      elements = self._parse_streaming(chunks, tag)
+      try:
+        first = next(elements)
+      except StopIteration:
+        return
+      except (ExchangeServerBusyException, ExchangeInternalServerTransientErrorException) as err:
+        if attempt >= retries:
+          raise
+        if self._prepare_retry(err, attempt, retries, throttle_key):
+          self._backoff(attempt)
+        attempt += 1
+        continue
+
+      yield first
+      for element in elements:
+        yield element
+      return
+
+  def send_for_documents(self, xml, headers=None, retries=2, timeout=30, encoding="utf-8"):
+    """
+    Sends a request whose response is a run of SOAP envelopes sent over time on one connection, rather than a
+    single document - like Exchange's streaming notifications - and yields each one, parsed and checked for
+    errors, as soon as it has arrived. *timeout* is how long to wait for the next piece of the response.
+
+    Nothing is retried once the first envelope is in; the generator just raises. It ends when Exchange closes
+    the connection.
+    """
+    request_xml = self._wrap_soap_xml_request(xml)
+    self.scheduler.wait(self._throttle_key(xml))
+
+    traced = self.tracer.sample()
+    if traced:
+      self.tracer.trace(u'Request', request_xml)
+
+    buffer = bytearray()
+    scanned = 0
+    for chunk in self._send_soap_request(request_xml, headers=headers, retries=retries, timeout=timeout, encoding=encoding, stream=True):
+      buffer += chunk
+
+      # Everything before the last few bytes of what we already had has been searched, and holds no end tag
+      start = 0
+      end = _END_OF_ENVELOPE.search(buffer, max(scanned - _MAX_END_OF_ENVELOPE_LENGTH, 0))
+      while end is not None:
+        document = bytes(buffer[start:end.end()])
+        start = end.end()
+        if traced:
+          self.tracer.trace(u'Response', document)
+        yield self._parse(document, encoding=encoding)
+        end = _END_OF_ENVELOPE.search(buffer, start)
+
+      del buffer[:start]
+      scanned = len(buffer)
+
+    if buffer.strip():
+      raise FailedExchangeException(u"Exchange closed the connection in the middle of a response", None)
+
+  def _throttle_key(self, xml):
+    """ Which mailbox a request is for, as far as throttling goes. None means the connection as a whole. """
+    return None
+
+  def _transport_retries(self, retries, attempt):
+    """
+    How many times the connection may retry transport failures on fault retry number *attempt*. Only the first send
+    gets any, so the two kinds of retry don't multiply.
+    """
+    return retries if attempt == 0 else 0
+
+  def _backoff(self, attempt):
+    """ Sleeps before fault retry number *attempt*, using the connection's backoff if it has one. """
+    backoff = getattr(self.connection, 'backoff', None)
+    if backoff is not None:
+      return backoff(attempt)
+
+    time.sleep(self._backoff_delay(attempt))
+
+  def _backoff_delay(self, attempt):
+    return backoff_delay(attempt, getattr(self.connection, 'backoff_factor', DEFAULT_BACKOFF_FACTOR),
+                         getattr(self.connection, 'max_backoff', DEFAULT_MAX_BACKOFF))
+
+  def _prepare_retry(self, err, attempt, retries, throttle_key):
+    """
+    Gets ready to send a request again after a retryable Exchange fault. If Exchange said how long it wants us to
+    back off for, the scheduler is told and False is returned. Otherwise returns True, meaning the caller should
+    back off itself before trying again.
+    """
+    log.warning(u'Retrying request to Exchange (attempt %d of %d): %s', attempt + 1, retries, err)
+
+    if isinstance(err, ExchangeServerBusyException) and err.back_off_milliseconds is not None:
+      self.scheduler.pause(throttle_key, err.back_off_milliseconds / 1000.0)
+      return False
+
+    return True
+
+  def _parse(self, response, encoding="utf-8", raise_item_errors=True):
+
+    # Connections hand back bytes, which lxml decodes using the document's own XML declaration. Custom
+    # connections that still return text are encoded first.
+    if not isinstance(response, bytes) and response is not None:
+      response = response.encode(encoding)
 
     try:
-      tree = etree.XML(response.encode(encoding))
+      tree = etree.XML(response)
     except (etree.XMLSyntaxError, TypeError) as err:
       raise FailedExchangeException(u"Unable to parse response from Exchange - check your login information. Error: %s" % err)
 
-    self._check_for_errors(tree)
+    self._check_for_errors(tree, raise_item_errors=raise_item_errors)
 
-    log.info(etree.tostring(tree, encoding=encoding, pretty_print=True))
     return tree
 
-  def _check_for_errors(self, xml_tree):
+  # Elements that, in a streamed response, come after everything _check_for_errors needs to see. Errors are
+  # checked as soon as one of these starts, so we don't hand out items from a response that is going to fail.
+  STREAMING_CHECKPOINT_TAGS = frozenset()
+
+  def _parse_streaming(self, chunks, tag):
+    parser = etree.XMLPullParser(events=(u'start', u'end'))
+    depth = 0
+
+    try:
+      for chunk in chunks:
+        parser.feed(chunk)
+
+        for event, element in parser.read_events():
+          if event == u'start':
+            if element.tag == tag:
+              depth += 1
+            elif element.tag in self.STREAMING_CHECKPOINT_TAGS:
+              self._check_for_errors(element.getroottree())
+
+          elif element.tag == tag:
+            depth -= 1
+            if depth == 0:
+              element.getparent().remove(element)
+              yield element
+
+      tree = parser.close()
+    except etree.XMLSyntaxError as err:
+      raise FailedExchangeException(u"Unable to parse response from Exchange - check your login information. Error: %s" % err)
+
+    self._check_for_errors(tree)
+
+  def _check_for_errors(self, xml_tree, raise_item_errors=True):
     self._check_for_SOAP_fault(xml_tree)
 
   def _check_for_SOAP_fault(self, xml_tree):
@@ -59,13 +314,24 @@ class ExchangeServiceSOAP(object):
       log.debug(etree.tostring(fault, pretty_print=True))
       raise FailedExchangeException(u"SOAP Fault from Exchange server", fault.text)
 
-  def _send_soap_request(self, xml, headers=None, retries=2, timeout=30, encoding="utf-8"):
+  def _send_soap_request(self, xml, headers=None, retries=2, timeout=30, encoding="utf-8", stream=False):
     body = etree.tostring(xml, encoding=encoding)
 
+    if stream:
+      return self.connection.stream(body, headers, retries, timeout)
+
     response = self.connection.send(body, headers, retries, timeout)
     return response
 
+  def _soap_header(self, xml):
+    """ Anything that has to go in the SOAP header of a request, or None. """
+    return None
+
   def _wrap_soap_xml_request(self, exchange_xml):
+    header = self._soap_header(exchange_xml)
+    if header is not None:
+      return S.Envelope(S.Header(header), S.Body(exchange_xml))
+
     root = S.Envelope(S.Body(exchange_xml))
     return root
 
@@ -89,42 +355,26 @@ class ExchangeServiceSOAP(object):
       u'last_response': { u'xpath' : u't:LastResponseTime', u'cast': u'datetime'},
     }
 
-    This runs the given xpath on the node and returns a dictionary
+    This runs the given xpath on the node and returns a dictionary. *property_map* can also be a
+    :class:`CompiledPropertyMap`, which saves compiling the xpaths again.
 
     """
 
+    property_map = compile_property_map(property_map, namespace_map)
     result = {}
 
-    log.info(etree.tostring(element, pretty_print=True))
-
-    for key in property_map:
-      item = property_map[key]
-      log.info(u'Pulling xpath {xpath} into key {key}'.format(key=key, xpath=item[u'xpath']))
-      nodes = element.xpath(item[u'xpath'], namespaces=namespace_map)
+    for key, xpath, cast_as in property_map.extractors:
+      nodes = xpath(element)
 
       if nodes:
-        result_for_node = []
-
-        for node in nodes:
-          cast_as = item.get(u'cast', None)
-
-          if cast_as == u'datetime':
-            result_for_node.append(self._parse_date(node.text))
-          elif cast_as == u'date_only_naive':
-            result_for_node.append(self._parse_date_only_naive(node.text))
-          elif cast_as == u'int':
-            result_for_node.append(int(node.text))
-          elif cast_as == u'bool':
-            if node.text.lower() == u'true':
-              result_for_node.append(True)
-            else:
-              result_for_node.append(False)
-          else:
-            result_for_node.append(node.text)
-
-        if not result_for_node:
-          result[key] = None
-        elif len(result_for_node) == 1:
+        cast = self._casts.get(cast_as, None)
+
+        if cast is None:
+          result_for_node = [node.text for node in nodes]
+        else:
+          result_for_node = [cast(node.text) for node in nodes]
+
+        if len(result_for_node) == 1:
           result[key] = result_for_node[0]
         else:
           result[key] = result_for_node
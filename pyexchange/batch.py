@@ -0,0 +1,38 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+
+
+class ExchangeBatchResult(object):
+  """
+  What happened to each item in a batched write. ``succeeded`` lists the items Exchange took, and ``failed`` lists
+  ``(item, exception)`` pairs for the ones it didn't. One item failing doesn't stop the rest of its batch. ::
+
+      result = service.calendar().create_events(events)
+      for event, error in result.failed:
+        log.warning(u'Unable to create %s: %s', event.subject, error)
+  """
+
+  def __init__(self):
+    self.succeeded = []
+    self.failed = []
+
+  def __len__(self):
+    return len(self.succeeded) + len(self.failed)
+
+  def __repr__(self):
+    return u'<ExchangeBatchResult: %d succeeded, %d failed>' % (len(self.succeeded), len(self.failed))
+
+  @property
+  def ok(self):
+    """ Whether every item went through. """
+    return not self.failed
+
+  def add_success(self, item):
+    self.succeeded.append(item)
+
+  def add_failure(self, item, error):
+    self.failed.append((item, error))
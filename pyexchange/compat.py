@@ -2,6 +2,9 @@ import sys
 
 IS_PYTHON3 = sys.version_info >= (3, 0)
 
+# async generators and asyncio.get_running_loop, needed by the asyncio flavours of the connection and service
+HAS_ASYNCIO = sys.version_info >= (3, 7)
+
 if IS_PYTHON3:
   BASESTRING_TYPES = str
 else:
@@ -0,0 +1,48 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+
+
+from .exceptions import ExchangeIrresolvableConflictException
+
+
+class ExchangeConflictPolicy(object):
+  """
+  Decides what happens when a write goes out with a change key that's out of date, because the item changed in
+  Exchange after we read it.
+
+  By default writes are optimistic: they go out with the change key from the last read, and only if Exchange
+  says it's stale (ErrorStaleObject, ErrorChangeKeyRequiredForWriteOperations) is the change key fetched again
+  and the write retried, up to *retries* times. That saves a round-trip on every write that doesn't conflict,
+  which is nearly all of them. ::
+
+      service = Exchange2010Service(connection, conflict_policy=ExchangeConflictPolicy(retries=3))
+
+  Updates are sent with ``ConflictResolution="AutoResolve"``, so when somebody else has changed the item since
+  we read it, Exchange answers with ErrorIrresolvableConflict instead of writing over their change. That is
+  raised (or reported as failed, for batched writes) so you can re-read the item and decide what to do. **With
+  *overwrite_conflicts* set, updates are sent with ``AlwaysOverwrite`` instead, and any conflict that still
+  comes back is retried with a fresh change key - the last writer wins.**
+
+  Set *retries* to 0 to have stale change keys raised as well. With *refresh_before_write* the change key is
+  fetched before every write, the way it used to be.
+  """
+
+  def __init__(self, retries=1, refresh_before_write=False, overwrite_conflicts=False):
+    self.retries = retries
+    self.refresh_before_write = refresh_before_write
+    self.overwrite_conflicts = overwrite_conflicts
+
+  @property
+  def conflict_resolution(self):
+    """ The ConflictResolution updates are sent with. """
+    return u'AlwaysOverwrite' if self.overwrite_conflicts else u'AutoResolve'
+
+  def should_retry(self, err, attempt):
+    """ Whether to refresh the change key and send the write again after *err*, on retry number *attempt* (from zero). """
+    if isinstance(err, ExchangeIrresolvableConflictException) and not self.overwrite_conflicts:
+      return False
+    return attempt < self.retries
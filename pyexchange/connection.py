@@ -5,34 +5,86 @@ Licensed under the Apache License, Version 2.0 (the "License");?you may not use
 Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
 import requests
+from requests.adapters import HTTPAdapter
 from requests_ntlm import HttpNtlmAuth
 
 import logging
+import threading
+import time
+import weakref
 
 from .exceptions import FailedExchangeException
+from .utils import backoff_delay
 
 log = logging.getLogger('pyexchange')
 
+DEFAULT_BACKOFF_FACTOR = 0.25
+DEFAULT_MAX_BACKOFF = 30
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Errors where the request probably never reached Exchange, or Exchange gave up on it - safe to try again.
+RETRYABLE_EXCEPTIONS = (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+RETRYABLE_STATUS_CODES = frozenset([500, 502, 503, 504])
+
 
 class ExchangeBaseConnection(object):
   """ Base class for Exchange connections."""
 
+  backoff_factor = DEFAULT_BACKOFF_FACTOR
+  max_backoff = DEFAULT_MAX_BACKOFF
+
   def send(self, body, headers=None, retries=2, timeout=30, encoding="utf-8"):
     raise NotImplementedError
 
+  def stream(self, body, headers=None, retries=2, timeout=30, encoding="utf-8", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Like :meth:`send`, but returns an iterator over the response body in chunks of bytes. Connections that
+    can't stream hand back the whole body as a single chunk.
+    """
+    return iter([self.send(body, headers=headers, retries=retries, timeout=timeout, encoding=encoding)])
+
+  def backoff(self, attempt):
+    """ Sleeps before retry number *attempt* (counting from zero), using jittered exponential backoff. """
+    delay = backoff_delay(attempt, self.backoff_factor, self.max_backoff)
+    log.debug(u'Backing off for %.2f seconds before retrying', delay)
+    time.sleep(delay)
+
 
 class ExchangeNTLMAuthConnection(ExchangeBaseConnection):
-  """ Connection to Exchange that uses NTLM authentication """
+  """
+  Connection to Exchange that uses NTLM authentication.
+
+  Connections are safe to share between threads. *pool_connections* and *pool_maxsize* size the underlying
+  HTTP connection pool - make *pool_maxsize* at least as big as the number of threads sending at once, or
+  connections get thrown away and NTLM has to handshake all over again on the next one.
+
+  By default all threads share one session. Set *per_thread_session* to give every thread its own session
+  (and its own NTLM-authenticated connections) instead.
+  """
 
-  def __init__(self, url, username, password, verify_certificate=True, **kwargs):
+  def __init__(self, url, username, password, verify_certificate=True, backoff_factor=DEFAULT_BACKOFF_FACTOR, max_backoff=DEFAULT_MAX_BACKOFF,
+               pool_connections=DEFAULT_POOL_CONNECTIONS, pool_maxsize=DEFAULT_POOL_MAXSIZE, per_thread_session=False, **kwargs):
     self.url = url
     self.username = username
     self.password = password
     self.verify_certificate = verify_certificate
+    self.backoff_factor = backoff_factor
+    self.max_backoff = max_backoff
+    self.pool_connections = pool_connections
+    self.pool_maxsize = pool_maxsize
+    self.per_thread_session = per_thread_session
     self.handler = None
     self.session = None
     self.password_manager = None
 
+    self._lock = threading.RLock()
+    self._local = threading.local()
+    self._sessions = weakref.WeakSet()
+
   def build_password_manager(self):
     if self.password_manager:
       return self.password_manager
@@ -44,34 +96,159 @@ class ExchangeNTLMAuthConnection(ExchangeBaseConnection):
     return self.password_manager
 
   def build_session(self):
+    if self.per_thread_session:
+      return self._build_thread_session()
+
     if self.session:
       return self.session
 
+    with self._lock:
+      # somebody else may have built it while we were waiting for the lock
+      if self.session:
+        return self.session
+
+      self.password_manager = self.build_password_manager()
+      self.session = self._new_session(self.password_manager)
+
+    return self.session
+
+  def _build_thread_session(self):
+    session = getattr(self._local, 'session', None)
+    if session is not None:
+      return session
+
+    with self._lock:
+      # NTLM authenticates the socket, not the request, so every session gets an authenticator of its own
+      self.password_manager = None
+      password_manager = self.build_password_manager()
+
+    self._local.session = self._new_session(password_manager)
+    return self._local.session
+
+  def _new_session(self, password_manager):
     log.debug(u'Constructing opener')
 
-    self.password_manager = self.build_password_manager()
+    session = requests.Session()
+    session.auth = password_manager
 
-    self.session = requests.Session()
-    self.session.auth = self.password_manager
+    adapter = HTTPAdapter(pool_connections=self.pool_connections, pool_maxsize=self.pool_maxsize)
+    session.mount(u'https://', adapter)
+    session.mount(u'http://', adapter)
 
-    return self.session
+    with self._lock:
+      self._sessions.add(session)
+
+    return session
+
+  def pool_statistics(self):
+    """
+    Returns a dictionary describing the HTTP connection pools behind this connection:
+
+    * ``sessions`` - how many sessions are alive (one, or one per thread)
+    * ``pools`` - how many host connection pools those sessions have
+    * ``connections`` - how many sockets have been opened, each of which had to do an NTLM handshake
+    * ``requests`` - how many requests have been sent over those sockets
+
+    If ``requests`` is much larger than ``connections``, connections are being reused nicely.
+    """
+    with self._lock:
+      sessions = list(self._sessions)
+
+    stats = {u'sessions': len(sessions), u'pools': 0, u'connections': 0, u'requests': 0}
+
+    for session in sessions:
+      for adapter in set(session.adapters.values()):
+        pools = adapter.poolmanager.pools
+        for key in pools.keys():
+          pool = pools.get(key)
+          if pool is None:
+            continue
+          stats[u'pools'] += 1
+          stats[u'connections'] += pool.num_connections
+          stats[u'requests'] += pool.num_requests
+
+    return stats
+
+  def close(self):
+    """ Closes every session this connection has opened, along with their pooled connections. """
+    with self._lock:
+      sessions = list(self._sessions)
+      self._sessions = weakref.WeakSet()
+      self.session = None
+      self._local = threading.local()
+
+    for session in sessions:
+      session.close()
 
   def send(self, body, headers=None, retries=2, timeout=30, encoding=u"utf-8"):
-    if not self.session:
-      self.session = self.build_session()
+    """
+    POSTs *body* to Exchange and returns the response body, as undecoded bytes. The XML parser works out the
+    encoding from the document itself.
+
+    Connection errors, timeouts and 500/502/503/504 responses are retried up to *retries* times, with jittered
+    exponential backoff between attempts. *timeout* applies to each attempt separately.
+
+    HTTP 500 responses carrying a SOAP fault are returned as they are, so the service can act on the fault.
+    """
+    session = self.build_session()
+
+    response = self._post(session, body, headers=headers, retries=retries, timeout=timeout)
+
+    log.info(u'Got response: %s', response.status_code)
+    log.debug(u'Got response headers: %s', response.headers)
+
+    return response.content
+
+  def stream(self, body, headers=None, retries=2, timeout=30, encoding=u"utf-8", chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    POSTs *body* to Exchange and returns an iterator over the response body, *chunk_size* bytes at a time, read
+    off the socket as it is consumed. Retries work the same as for :meth:`send`.
+    """
+    session = self.build_session()
+
+    response = self._post(session, body, headers=headers, retries=retries, timeout=timeout, stream=True)
+
+    log.info(u'Got response: %s', response.status_code)
+    log.debug(u'Got response headers: %s', response.headers)
+
+    return response.iter_content(chunk_size=chunk_size)
 
-    try:
-      response = self.session.post(self.url, data=body, headers=headers, verify = self.verify_certificate)
-      response.raise_for_status()
-    except requests.exceptions.RequestException as err:
-      log.debug(err.response.content)
-      raise FailedExchangeException(u'Unable to connect to Exchange: %s' % err)
+  def _post(self, session, body, headers, retries, timeout, stream=False):
+    attempt = 0
 
-    log.info(u'Got response: {code}'.format(code=response.status_code))
-    log.debug(u'Got response headers: {headers}'.format(headers=response.headers))
-    log.debug(u'Got body: {body}'.format(body=response.text))
+    while True:
+      try:
+        response = session.post(self.url, data=body, headers=headers, verify=self.verify_certificate, timeout=timeout, stream=stream)
 
-    return response.text
+        if self._is_soap_fault(response):
+          # Exchange reports faults (including "slow down, you're being throttled") as HTTP 500 with a SOAP body.
+          # Let the service read the fault instead of retrying blindly.
+          return response
+
+        if response.status_code not in RETRYABLE_STATUS_CODES or attempt >= retries:
+          response.raise_for_status()
+          return response
+
+        log.warning(u'Exchange returned HTTP %s, retrying (attempt %d of %d)', response.status_code, attempt + 1, retries)
+        response.close()
+
+      except RETRYABLE_EXCEPTIONS as err:
+        if attempt >= retries:
+          raise FailedExchangeException(u'Unable to connect to Exchange: %s' % err)
+
+        log.warning(u'Unable to connect to Exchange, retrying (attempt %d of %d): %s', attempt + 1, retries, err)
+
+      except requests.exceptions.RequestException as err:
+        if err.response is not None:
+          log.debug(err.response.content)
+        raise FailedExchangeException(u'Unable to connect to Exchange: %s' % err)
+
+      self.backoff(attempt)
+      attempt += 1
+
+
+  def _is_soap_fault(self, response):
+    return response.status_code == 500 and u'xml' in response.headers.get(u'content-type', u'') and bool(response.content)
 
 
 class ExchangeBasicAuthConnection(ExchangeNTLMAuthConnection):
@@ -90,20 +267,3 @@ class ExchangeBasicAuthConnection(ExchangeNTLMAuthConnection):
     self.password_manager = requests.auth.HTTPBasicAuth(self.username, self.password)
 
     return self.password_manager
-
-  def send(self, body, headers=None, retries=2, timeout=30, encoding=u"utf-8"):
-    if not self.session:
-      self.session = self.build_session()
-
-    try:
-      response = self.session.post(self.url, data=body, headers=headers)
-      response.raise_for_status()
-    except requests.exceptions.RequestException as err:
-      # log.debug(err.response.content)
-      raise FailedExchangeException(u'Unable to connect to Exchange: %s' % err)
-
-    log.info(u'Got response: {code}'.format(code=response.status_code))
-    log.debug(u'Got response headers: {headers}'.format(headers=response.headers))
-    log.debug(u'Got body: {body}'.format(body=response.text))
-
-    return response.text
@@ -39,6 +39,29 @@ class ExchangeInternalServerTransientErrorException(FailedExchangeException):
   pass
 
 
+class ExchangeServerBusyException(FailedExchangeException):
+  """Raised when Exchange is throttling us (ErrorServerBusy). If the server said how long to back off for, it's in back_off_milliseconds."""
+
+  def __init__(self, message, back_off_milliseconds=None):
+    super(ExchangeServerBusyException, self).__init__(message)
+    self.back_off_milliseconds = back_off_milliseconds
+
+
+class ExchangeViewTooBigException(FailedExchangeException):
+  """Raised when a view asks for more items than Exchange will return in one go (ErrorCalendarViewRangeTooBig, ErrorExceededFindCountLimit)."""
+  pass
+
+
+class ExchangeInvalidSyncStateException(FailedExchangeException):
+  """Raised when Exchange doesn't accept a sync state (ErrorInvalidSyncStateData). Forget the state and sync again from scratch."""
+  pass
+
+
+class ExchangeSubscriptionExpiredException(FailedExchangeException):
+  """Raised when a notification subscription is gone from the server (ErrorSubscriptionNotFound, ErrorExpiredSubscription, ErrorInvalidSubscription). Subscribe again."""
+  pass
+
+
 class InvalidEventType(Exception):
   """Raised when a method for an event gets called on the wrong type of event."""
   pass
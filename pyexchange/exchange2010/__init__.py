@@ -8,20 +8,48 @@ Unless required by applicable law or agreed to in writing, software?distributed
 import logging
 from ..base.calendar import BaseExchangeCalendarEvent, BaseExchangeCalendarService, ExchangeEventOrganizer, ExchangeEventResponse
 from ..base.folder import BaseExchangeFolder, BaseExchangeFolderService
-from ..base.soap import ExchangeServiceSOAP
-from ..exceptions import FailedExchangeException, ExchangeStaleChangeKeyException, ExchangeItemNotFoundException, ExchangeInternalServerTransientErrorException, ExchangeIrresolvableConflictException, InvalidEventType
+from ..base.soap import ExchangeServiceSOAP, CompiledPropertyMap
+from ..batch import ExchangeBatchResult
+from ..exceptions import FailedExchangeException, ExchangeStaleChangeKeyException, ExchangeItemNotFoundException, ExchangeInternalServerTransientErrorException, ExchangeIrresolvableConflictException, ExchangeServerBusyException, ExchangeViewTooBigException, ExchangeInvalidSyncStateException, ExchangeSubscriptionExpiredException, InvalidEventType
 from ..compat import BASESTRING_TYPES
+from ..intervals import ExchangeIntervalIndex
+from ..recurrence import occurrence_dates
+from ..sync import ExchangeSyncResult, DEFAULT_SYNC_MAX_CHANGES
+from ..utils import chunks, convert_datetime_to_utc, parallel_map
 from .mail import Exchange2010MessageService
+from .notifications import Exchange2010NotificationService
 
 from . import soap_request
 
 from lxml import etree
-from copy import deepcopy
-from datetime import date
+from datetime import date, datetime, timedelta
+from pytz import utc
+import heapq
+import time
 import warnings
 
 log = logging.getLogger("pyexchange")
 
+# Event details are fetched this many events per request, with up to this many requests in flight at once. Events
+# Exchange says it couldn't look up for now are asked for again, up to DEFAULT_DETAILS_RETRIES times.
+DEFAULT_DETAILS_BATCH_SIZE = 50
+DEFAULT_DETAILS_WORKERS = 4
+DEFAULT_DETAILS_RETRIES = 2
+
+# Bulk writes (create_events and friends) send this many items per request. Items Exchange was too busy for are
+# sent again, by themselves, up to DEFAULT_WRITE_RETRIES times.
+DEFAULT_WRITE_BATCH_SIZE = 100
+DEFAULT_WRITE_RETRIES = 2
+
+# iter_events asks for a week at a time, at most this many events per request, and halves any window that holds
+# more than that - down to MIN_EVENTS_WINDOW
+DEFAULT_EVENTS_PAGE_SIZE = 100
+DEFAULT_EVENTS_WINDOW = timedelta(days=7)
+MIN_EVENTS_WINDOW = timedelta(minutes=1)
+
+# list_events_in_parallel counts the events in this many slices of the range per worker before planning windows
+PROBES_PER_WORKER = 4
+
 
 class Exchange2010Service(ExchangeServiceSOAP):
 
@@ -37,18 +65,145 @@ class Exchange2010Service(ExchangeServiceSOAP):
   def folder(self):
     return Exchange2010FolderService(service=self)
 
-  def _send_soap_request(self, body, headers=None, retries=2, timeout=30, encoding="utf-8"):
+  def notifications(self):
+    return Exchange2010NotificationService(service=self)
+
+  def sync_folder_items(self, folder_id, state_store=None, key=None, sync_state=None, max_changes=DEFAULT_SYNC_MAX_CHANGES, delegate_for=None):
+    """
+    Returns an :class:`ExchangeSyncResult` with the ids of the items created, updated and deleted in a folder
+    since *sync_state*. Without a sync state, every item in the folder counts as created.
+
+    With a *state_store*, the last sync state is read from it under *key* (by default, one derived from the
+    folder) and the new one is written back once every change has been fetched - so a sync that fails halfway
+    gets retried from the same place next time. Changes are fetched *max_changes* at a time, ids only.
+    """
+    key = key or self._sync_key(u'items', folder_id, delegate_for)
+    result = ExchangeSyncResult(self._load_sync_state(state_store, key, sync_state))
+
+    done = False
+    while not done:
+      body = soap_request.sync_folder_items(folder_id, sync_state=result.sync_state, max_changes=max_changes, delegate_for=delegate_for)
+      done = self._parse_sync_response(self.send(body), result)
+
+    self._save_sync_state(state_store, key, result)
+    return result
+
+  def sync_folder_hierarchy(self, folder_id=u'msgfolderroot', state_store=None, key=None, sync_state=None, delegate_for=None):
+    """ Same as :meth:`sync_folder_items`, but for the folders under *folder_id* instead of the items in it. """
+    key = key or self._sync_key(u'folders', folder_id, delegate_for)
+    result = ExchangeSyncResult(self._load_sync_state(state_store, key, sync_state))
+
+    done = False
+    while not done:
+      body = soap_request.sync_folder_hierarchy(folder_id, sync_state=result.sync_state, delegate_for=delegate_for)
+      done = self._parse_sync_response(self.send(body), result)
+
+    self._save_sync_state(state_store, key, result)
+    return result
+
+  def _sync_key(self, kind, folder_id, delegate_for):
+    return u':'.join([kind, folder_id] + ([delegate_for] if delegate_for else []))
+
+  def _load_sync_state(self, state_store, key, sync_state):
+    if sync_state is None and state_store is not None:
+      return state_store.get(key)
+    return sync_state
+
+  def _save_sync_state(self, state_store, key, result):
+    if state_store is not None and result.sync_state:
+      state_store.set(key, result.sync_state)
+
+  def _parse_sync_response(self, response, result):
+    """ Adds the changes in a SyncFolderItems or SyncFolderHierarchy response to *result*. Returns True once there are no more. """
+    message = response.xpath(u'//m:SyncFolderItemsResponseMessage | //m:SyncFolderHierarchyResponseMessage', namespaces=soap_request.NAMESPACES)
+    if not message:
+      raise FailedExchangeException(u"Exchange server did not return a sync response", None)
+    message = message[0]
+
+    sync_state = message.find(u'm:SyncState', namespaces=soap_request.NAMESPACES)
+    if sync_state is not None and sync_state.text:
+      result.sync_state = sync_state.text
+
+    for change in message.iterfind(u'm:Changes/*', namespaces=soap_request.NAMESPACES):
+      # Creates and updates wrap the whole item or folder, deletes and read flag changes just have the id
+      id = change.xpath(u't:ItemId | t:FolderId | t:*/t:ItemId | t:*/t:FolderId', namespaces=soap_request.NAMESPACES)
+      if not id:
+        continue
+
+      change_type = etree.QName(change).localname
+      if change_type == u'Create':
+        result.add_created(id[0].get(u'Id'))
+      elif change_type == u'Delete':
+        result.add_deleted(id[0].get(u'Id'))
+      else:
+        result.add_updated(id[0].get(u'Id'))
+
+    last = message.xpath(u'm:IncludesLastItemInRange | m:IncludesLastFolderInRange', namespaces=soap_request.NAMESPACES)
+    return not last or last[0].text != u'false'
+
+  # Response codes come before the items in every response message
+  STREAMING_CHECKPOINT_TAGS = frozenset([
+    u'{%s}RootFolder' % soap_request.MSG_NS,
+    u'{%s}Items' % soap_request.MSG_NS,
+  ])
+
+  def _send_soap_request(self, body, headers=None, retries=2, timeout=30, encoding="utf-8", stream=False):
     headers = {
       "Accept": "text/xml",
       "Content-type": "text/xml; charset=%s " % encoding
     }
-    return super(Exchange2010Service, self)._send_soap_request(body, headers=headers, retries=retries, timeout=timeout, encoding=encoding)
+    return super(Exchange2010Service, self)._send_soap_request(body, headers=headers, retries=retries, timeout=timeout, encoding=encoding, stream=stream)
+
+  # Exchange only knows about these from 2010 SP1 on, and wants to be told we do too
+  SP1_REQUEST_TAGS = frozenset([
+    u'{%s}GetStreamingEvents' % soap_request.MSG_NS,
+    u'{%s}StreamingSubscriptionRequest' % soap_request.MSG_NS,
+    u'{%s}QueryString' % soap_request.MSG_NS,
+  ])
+
+  def _soap_header(self, xml):
+    if xml.tag in self.SP1_REQUEST_TAGS or any(child.tag in self.SP1_REQUEST_TAGS for child in xml):
+      return soap_request.exchange_header(u'Exchange2010_SP1')
+    return None
 
-  def _check_for_errors(self, xml_tree):
-    super(Exchange2010Service, self)._check_for_errors(xml_tree)
-    self._check_for_exchange_fault(xml_tree)
+  def _throttle_key(self, xml):
+    # Requests made on behalf of another mailbox get throttled separately from our own
+    mailboxes = xml.xpath(u'//t:DistinguishedFolderId/t:Mailbox/t:EmailAddress', namespaces=soap_request.NAMESPACES)
+    if mailboxes:
+      return mailboxes[0].text
+    return None
+
+  def _check_for_errors(self, xml_tree, raise_item_errors=True):
+    self._check_for_server_busy(xml_tree, raise_item_errors=raise_item_errors)
+    super(Exchange2010Service, self)._check_for_errors(xml_tree, raise_item_errors=raise_item_errors)
+    self._check_for_exchange_fault(xml_tree, raise_item_errors=raise_item_errors)
+
+  def _check_for_server_busy(self, xml_tree, raise_item_errors=True):
+
+    # Exchange tells us it's throttling us either with a SOAP fault or with a response code, and puts a hint about
+    # how long to back off for next to it:
+    # <t:MessageXml><t:Value Name="BackOffMilliseconds">30000</t:Value></t:MessageXml>
+    #
+    # A fault means nothing in the request was done, so it can all be sent again. A response code is for one item
+    # out of possibly many, the rest of which may have gone through - so when the caller is looking at each item
+    # itself, that's left to them.
+    if raise_item_errors:
+      xpath = u'//s:Fault/detail/e:ResponseCode[text()="ErrorServerBusy"] | //m:ResponseCode[text()="ErrorServerBusy"]'
+    else:
+      xpath = u'//s:Fault/detail/e:ResponseCode[text()="ErrorServerBusy"]'
+
+    busy_codes = xml_tree.xpath(xpath, namespaces=soap_request.ERROR_NAMESPACES)
+
+    if busy_codes:
+      raise self._server_busy_exception(busy_codes[0])
+
+  def _server_busy_exception(self, response_code):
+    # The hint is in a <t:MessageXml> in a fault, and an <m:MessageXml> in a response message
+    back_off = response_code.getparent().xpath(u'*[local-name()="MessageXml"]/t:Value[@Name="BackOffMilliseconds"]', namespaces=soap_request.NAMESPACES)
+    back_off_milliseconds = int(back_off[0].text) if back_off else None
+    return ExchangeServerBusyException(u"Exchange Fault (ErrorServerBusy) from Exchange server", back_off_milliseconds)
 
-  def _check_for_exchange_fault(self, xml_tree):
+  def _check_for_exchange_fault(self, xml_tree, raise_item_errors=True):
 
     # If the request succeeded, we should see a <m:ResponseCode>NoError</m:ResponseCode>
     # somewhere in the response. if we don't (a) see the tag or (b) it doesn't say "NoError"
@@ -59,26 +214,60 @@ class Exchange2010Service(ExchangeServiceSOAP):
     if not response_codes:
       raise FailedExchangeException(u"Exchange server did not return a status response", None)
 
+    # The caller is going to look at each response message itself
+    if not raise_item_errors:
+      return
+
+    for code in response_codes:
+      error = self._exception_for_response_code(code.text)
+      if error is not None:
+        raise error
+
+  def _exception_for_response_code(self, code):
+    """ Returns the exception to raise for a <m:ResponseCode>, or None if the code means things went fine. """
+
     # The full (massive) list of possible return responses is here.
     # http://msdn.microsoft.com/en-us/library/aa580757(v=exchg.140).aspx
-    for code in response_codes:
-      if code.text == u"ErrorChangeKeyRequiredForWriteOperations":
-        # change key is missing or stale. we can fix that, so throw a special error
-        raise ExchangeStaleChangeKeyException(u"Exchange Fault (%s) from Exchange server" % code.text)
-      elif code.text == u"ErrorItemNotFound":
-        # exchange_invite_key wasn't found on the server
-        raise ExchangeItemNotFoundException(u"Exchange Fault (%s) from Exchange server" % code.text)
-      elif code.text == u"ErrorIrresolvableConflict":
-        # tried to update an item with an old change key
-        raise ExchangeIrresolvableConflictException(u"Exchange Fault (%s) from Exchange server" % code.text)
-      elif code.text == u"ErrorInternalServerTransientError":
-        # temporary internal server error. throw a special error so we can retry
-        raise ExchangeInternalServerTransientErrorException(u"Exchange Fault (%s) from Exchange server" % code.text)
-      elif code.text == u"ErrorCalendarOccurrenceIndexIsOutOfRecurrenceRange":
-        # just means some or all of the requested instances are out of range
-        pass
-      elif code.text != u"NoError":
-        raise FailedExchangeException(u"Exchange Fault (%s) from Exchange server" % code.text)
+    if code in (u"ErrorChangeKeyRequiredForWriteOperations", u"ErrorStaleObject"):
+      # change key is missing or stale. we can fix that, so throw a special error
+      return ExchangeStaleChangeKeyException(u"Exchange Fault (%s) from Exchange server" % code)
+    elif code == u"ErrorItemNotFound":
+      # exchange_invite_key wasn't found on the server
+      return ExchangeItemNotFoundException(u"Exchange Fault (%s) from Exchange server" % code)
+    elif code == u"ErrorIrresolvableConflict":
+      # tried to update an item with an old change key
+      return ExchangeIrresolvableConflictException(u"Exchange Fault (%s) from Exchange server" % code)
+    elif code == u"ErrorInternalServerTransientError":
+      # temporary internal server error. throw a special error so we can retry
+      return ExchangeInternalServerTransientErrorException(u"Exchange Fault (%s) from Exchange server" % code)
+    elif code == u"ErrorServerBusy":
+      # we're being throttled. see _exception_for_response_message for the back-off hint that comes with it
+      return ExchangeServerBusyException(u"Exchange Fault (%s) from Exchange server" % code)
+    elif code in (u"ErrorCalendarViewRangeTooBig", u"ErrorExceededFindCountLimit"):
+      # asked for too many items at once. callers paging through a view split it up and try again
+      return ExchangeViewTooBigException(u"Exchange Fault (%s) from Exchange server" % code)
+    elif code == u"ErrorInvalidSyncStateData":
+      # the sync state we sent is corrupt or from another folder. the caller has to start over without one
+      return ExchangeInvalidSyncStateException(u"Exchange Fault (%s) from Exchange server" % code)
+    elif code in (u"ErrorSubscriptionNotFound", u"ErrorExpiredSubscription", u"ErrorInvalidSubscription"):
+      # the subscription timed out or the server lost it. whoever was listening has to subscribe again
+      return ExchangeSubscriptionExpiredException(u"Exchange Fault (%s) from Exchange server" % code)
+    elif code == u"ErrorCalendarOccurrenceIndexIsOutOfRecurrenceRange":
+      # just means some or all of the requested instances are out of range
+      return None
+    elif code != u"NoError":
+      return FailedExchangeException(u"Exchange Fault (%s) from Exchange server" % code)
+
+    return None
+
+  def _exception_for_response_message(self, message):
+    """ Like _exception_for_response_code, for a whole response message, so a throttled item keeps the server's back-off hint. """
+    code = message.find(u'm:ResponseCode', namespaces=soap_request.NAMESPACES)
+
+    if code is not None and code.text == u"ErrorServerBusy":
+      return self._server_busy_exception(code)
+
+    return self._exception_for_response_code(code.text if code is not None else None)
 
 
 class Exchange2010CalendarService(BaseExchangeCalendarService):
@@ -86,14 +275,529 @@ class Exchange2010CalendarService(BaseExchangeCalendarService):
   def event(self, id=None, **kwargs):
     return Exchange2010CalendarEvent(service=self.service, id=id, **kwargs)
 
-  def get_event(self, id):
+  def get_event(self, id, fields=None):
+    """
+    Fetches the event with this *id*. With *fields* - FieldURIs, like ``[u'item:Subject', u'calendar:Start']`` -
+    only those are fetched and filled in.
+    """
+    if fields:
+      response = self.service.send(soap_request.get_item(exchange_id=id, fields=fields))
+      return Exchange2010CalendarEvent(service=self.service, calendar_id=self.calendar_id, xml=response)
+
     return Exchange2010CalendarEvent(service=self.service, id=id)
 
   def new_event(self, **properties):
     return Exchange2010CalendarEvent(service=self.service, calendar_id=self.calendar_id, **properties)
 
-  def list_events(self, start=None, end=None, details=False, delegate_for=None):
-    return Exchange2010CalendarEventList(service=self.service, calendar_id=self.calendar_id, start=start, end=end, details=details, delegate_for=delegate_for)
+  def create_events(self, events, batch_size=DEFAULT_WRITE_BATCH_SIZE, max_workers=DEFAULT_DETAILS_WORKERS):
+    """
+    Creates many events in Exchange, *batch_size* to a request, with up to *max_workers* requests in flight at
+    once. ::
+
+        events = [service.calendar().new_event(subject=u"Training", start=start, end=end, required_attendees=[person])
+                  for person in people]
+        result = service.calendar().create_events(events)
+
+    Returns an :class:`ExchangeBatchResult`. Events that were created get their ids and change keys, just like
+    with ``create()``. Events that fail validation or that Exchange turns down are listed in ``result.failed``
+    with the reason, and don't hold up the rest of their batch.
+
+    Invitations to attendees are sent out immediately.
+    """
+    result = ExchangeBatchResult()
+    batches = self._batches_to_create(events, batch_size, result)
+    return self._send_batches(batches, self._create_request, self._take_id_and_change_key, max_workers, result)
+
+  def _batches_to_create(self, events, batch_size, result):
+    valid_events = []
+    for event in events:
+      try:
+        event.validate()
+      except (ValueError, TypeError) as err:
+        result.add_failure(event, err)
+      else:
+        valid_events.append(event)
+
+    # One CreateItem saves into one folder, so events going to different calendars go in different batches
+    batches = []
+    for calendar_events in self._group_by_calendar(valid_events):
+      batches.extend(chunks(calendar_events, batch_size))
+
+    return batches
+
+  def _create_request(self, batch):
+    return soap_request.new_events(batch, calendar_id=batch[0].calendar_id or self.calendar_id)
+
+  def _take_id_and_change_key(self, event, message):
+    event._update_from_response_message(message)
+
+  def update_events(self, events, calendar_item_update_operation_type=u'SendToAllAndSaveCopy', batch_size=DEFAULT_WRITE_BATCH_SIZE, max_workers=DEFAULT_DETAILS_WORKERS):
+    """
+    Saves the changes to many events, *batch_size* events to a request, with up to *max_workers* requests in
+    flight at once. ::
+
+        for event in events:
+          event.location = u'Room 101'
+        result = service.calendar().update_events(events)
+
+    Like ``update()``, only the attributes that changed on each event are sent, and events with no changes
+    aren't sent at all. Returns an :class:`ExchangeBatchResult`. Events that were saved pick up their new change
+    keys; events that fail validation or that Exchange turns down are listed in ``result.failed`` and keep their
+    unsaved changes.
+
+    Change keys that Exchange says are out of date are fetched again, for just those events, and the changes
+    resent as the service's conflict policy allows.
+    """
+    if calendar_item_update_operation_type not in Exchange2010CalendarEvent.VALID_UPDATE_OPERATION_TYPES:
+      raise ValueError('calendar_item_update_operation_type has unknown value')
+
+    result = ExchangeBatchResult()
+
+    changed_events = []
+    for event in events:
+      try:
+        if not event.id:
+          raise TypeError(u"You can't update an event that hasn't been created yet.")
+        event.validate()
+      except (ValueError, TypeError) as err:
+        result.add_failure(event, err)
+        continue
+
+      if event._dirty_attributes:
+        changed_events.append(event)
+      else:
+        result.add_success(event)
+
+    def update(batch):
+      return soap_request.update_items([(event, event._dirty_attributes) for event in batch], calendar_item_update_operation_type,
+                                       conflict_resolution=self.service.conflict_policy.conflict_resolution)
+
+    return self._write_in_batches(changed_events, update, self._on_updated, batch_size, max_workers, result)
+
+  def cancel_events(self, events, batch_size=DEFAULT_WRITE_BATCH_SIZE, max_workers=DEFAULT_DETAILS_WORKERS):
+    """
+    Cancels many events, *batch_size* events to a request, with up to *max_workers* requests in flight at once. ::
+
+        result = service.calendar().cancel_events(events)
+
+    Like ``cancel()``, this sends cancellations to anyone who has not declined. Returns an
+    :class:`ExchangeBatchResult`; events that weren't cancelled are listed in ``result.failed`` with the reason.
+    """
+    result = ExchangeBatchResult()
+    saved_events = self._saved_events(events, u"You can't delete an event that hasn't been created yet.", result)
+
+    return self._write_in_batches(saved_events, soap_request.delete_events, lambda event, message: None, batch_size, max_workers, result)
+
+  def move_events(self, events, folder_id, batch_size=DEFAULT_WRITE_BATCH_SIZE, max_workers=DEFAULT_DETAILS_WORKERS):
+    """
+    Moves many events to the folder (calendar) *folder_id*, *batch_size* events to a request, with up to
+    *max_workers* requests in flight at once. ::
+
+        result = service.calendar().move_events(events, folder_id='NEW CALENDAR KEY HERE')
+
+    Returns an :class:`ExchangeBatchResult`. Events that were moved get their new ids and change keys, just like
+    with ``move_to()``; events that weren't are listed in ``result.failed`` with the reason.
+    """
+    if not folder_id:
+      raise TypeError(u"You can't move an event to a non-existant folder")
+
+    if not isinstance(folder_id, BASESTRING_TYPES):
+      raise TypeError(u"folder_id must be a string")
+
+    result = ExchangeBatchResult()
+    saved_events = self._saved_events(events, u"You can't move an event that hasn't been created yet.", result)
+
+    def moved(event, message):
+      event._update_from_response_message(message)
+      event.calendar_id = folder_id
+
+    return self._write_in_batches(saved_events, lambda batch: soap_request.move_items(batch, folder_id), moved, batch_size, max_workers, result)
+
+  def _saved_events(self, events, message, result):
+    # Events that were never created can't be written to; they fail straight away
+    saved_events = []
+    for event in events:
+      if event.id:
+        saved_events.append(event)
+      else:
+        result.add_failure(event, TypeError(message))
+
+    return saved_events
+
+  def _on_updated(self, event, message):
+    event._update_from_response_message(message)
+    event._reset_dirty_attributes()
+
+  def _write_in_batches(self, events, build_request, on_success, batch_size, max_workers, result):
+    """
+    Sends a write for *events* in batches, the way ``_write()`` does for one event: with the change keys we
+    already have, fetching them again and resending only for the events whose keys turn out to be out of date.
+    """
+    policy = self.service.conflict_policy
+    events = self._refresh_change_keys(events, policy.refresh_before_write, batch_size, max_workers, result)
+
+    attempt = 0
+    while events:
+      attempt_result = self._send_batches(chunks(events, batch_size), build_request, on_success, max_workers, ExchangeBatchResult())
+      stale_events = self._sort_out_conflicts(attempt_result, attempt, result)
+      events = self._refresh_change_keys(stale_events, True, batch_size, max_workers, result)
+      attempt += 1
+
+    return result
+
+  def _sort_out_conflicts(self, attempt_result, attempt, result):
+    """ Moves what happened in one round of a batched write into *result*, except for the events worth retrying, which are returned. """
+    policy = self.service.conflict_policy
+    result.succeeded.extend(attempt_result.succeeded)
+
+    stale_events = []
+    for event, error in attempt_result.failed:
+      if isinstance(error, (ExchangeStaleChangeKeyException, ExchangeIrresolvableConflictException)) and policy.should_retry(error, attempt):
+        log.info(u'Change key for %s is out of date, fetching it again: %s', event.id, error)
+        stale_events.append(event)
+      else:
+        result.add_failure(event, error)
+
+    return stale_events
+
+  def _refresh_change_keys(self, events, refresh_all, batch_size, max_workers, result):
+    """
+    Fetches the change keys of *events* - all of them with *refresh_all*, otherwise just the ones we don't have
+    one for - in batches. Returns the events that are ready to be written; the rest go in *result* as failed.
+    """
+    to_refresh = [event for event in events if refresh_all or not event._change_key]
+    if not to_refresh:
+      return events
+
+    refreshed = self._send_batches(chunks(to_refresh, batch_size), self._get_change_keys_request, self._take_id_and_change_key, max_workers, ExchangeBatchResult())
+    for event, error in refreshed.failed:
+      result.add_failure(event, error)
+
+    failed = set(id(event) for event, error in refreshed.failed)
+    return [event for event in events if id(event) not in failed]
+
+  def _get_change_keys_request(self, batch):
+    return soap_request.get_item(exchange_id=[event.id for event in batch], format=u'IdOnly')
+
+  def _group_by_calendar(self, events):
+    calendar_ids = []
+    events_by_calendar = {}
+    for event in events:
+      calendar_id = event.calendar_id or self.calendar_id
+      if calendar_id not in events_by_calendar:
+        calendar_ids.append(calendar_id)
+        events_by_calendar[calendar_id] = []
+      events_by_calendar[calendar_id].append(event)
+
+    return [events_by_calendar[calendar_id] for calendar_id in calendar_ids]
+
+  def _send_batches(self, batches, build_request, on_success, max_workers, result, retries=DEFAULT_WRITE_RETRIES):
+    """
+    Sends the request *build_request* builds for each batch of items, and sorts the items into *result* by the
+    response message Exchange sent back for each. *on_success* is called with each item that went through and its
+    response message.
+
+    Items Exchange says it was too busy for, or couldn't deal with for now, are sent again - just those, not the
+    rest of their batch, which has already been written - up to *retries* times.
+    """
+    def send(batch):
+      try:
+        return self.service.send(build_request(batch), raise_item_errors=False)
+      except FailedExchangeException as err:
+        return err
+
+    attempt = 0
+    while batches:
+      responses = parallel_map(send, batches, max_workers)
+      batches, errors = self._merge_batch_responses(batches, responses, on_success, result, attempt < retries)
+
+      if batches:
+        self._back_off_before_resending(errors, attempt)
+      attempt += 1
+
+    return result
+
+  def _merge_batch_responses(self, batches, responses, on_success, result, retry):
+    """
+    Sorts the items in *batches* into *result* by their responses. If *retry* is set, the items worth sending
+    again are left out of *result*, and returned in batches of their own, along with why they failed.
+    """
+    retry_batches = []
+    errors = []
+
+    for batch, response in zip(batches, responses):
+      to_retry = self._merge_batch_response(batch, response, on_success, result, retry)
+      if to_retry:
+        retry_batches.append([item for item, error in to_retry])
+        errors.extend(error for item, error in to_retry)
+
+    return retry_batches, errors
+
+  def _merge_batch_response(self, batch, response, on_success, result, retry=False):
+    # The whole request failed, so every item in it did. send() has already retried it as far as it's going to.
+    if isinstance(response, Exception):
+      for item in batch:
+        result.add_failure(item, response)
+      return []
+
+    # Exchange answers with one response message per item, in the order they were sent
+    messages = response.xpath(u'//m:ResponseMessages/*', namespaces=soap_request.NAMESPACES)
+    to_retry = []
+
+    for index, item in enumerate(batch):
+      if index >= len(messages):
+        result.add_failure(item, FailedExchangeException(u"Exchange server did not return a status for this item", None))
+        continue
+
+      error = self.service._exception_for_response_message(messages[index])
+
+      if error is None:
+        on_success(item, messages[index])
+        result.add_success(item)
+      elif retry and isinstance(error, (ExchangeServerBusyException, ExchangeInternalServerTransientErrorException)):
+        log.debug(u'Batched write for %r will be sent again: %s', item, error)
+        to_retry.append((item, error))
+      else:
+        log.debug(u'Batched write failed for %r: %s', item, error)
+        result.add_failure(item, error)
+
+    return to_retry
+
+  def _back_off_before_resending(self, errors, attempt):
+    # Wait as long as Exchange asked us to, if it did
+    back_offs = [error.back_off_milliseconds for error in errors if getattr(error, 'back_off_milliseconds', None) is not None]
+    if back_offs:
+      time.sleep(max(back_offs) / 1000.0)
+    else:
+      self.service._backoff(attempt)
+
+  def list_events(self, start=None, end=None, details=False, delegate_for=None, stream=False, restriction=None, query_string=None, fields=None):
+    """
+    Lists the events between *start* and *end*.
+
+    With ``stream=True`` you get a generator instead of an event list. Each event is handed out as soon as it
+    has been read from the response, and nothing holds on to the ones already handed out, so even a huge
+    calendar is listed in constant memory. Streaming can't be combined with ``details=True``.
+
+    Only the events matching *restriction* (see :mod:`pyexchange.restriction`) or *query_string* (an AQS
+    search) come back, filtered by Exchange - it won't take both at once. It won't filter a view with expanded
+    occurrences either, so with either of these a recurring series comes back once, as its recurring master -
+    use :meth:`Exchange2010CalendarEvent.expand_occurrences` to get its occurrences. An AQS search can't be
+    limited to a time window on the server, so the events outside *start* and *end* are dropped as they come back.
+
+    With *fields* (FieldURIs, as for :meth:`get_event`) only those come back, and only those are filled in.
+    """
+    if stream:
+      if details:
+        raise ValueError(u"details can't be loaded for streamed events")
+      return self._stream_events(start, end, delegate_for, restriction, query_string, fields)
+
+    return Exchange2010CalendarEventList(service=self.service, calendar_id=self.calendar_id, start=start, end=end, details=details, delegate_for=delegate_for,
+                                         restriction=restriction, query_string=query_string, fields=fields)
+
+  def sync(self, state_store=None, key=None, sync_state=None, max_changes=DEFAULT_SYNC_MAX_CHANGES, delegate_for=None):
+    """
+    Returns the ids of the events created, updated and deleted in this calendar since the last sync. ::
+
+        store = SqliteSyncStateStore('sync.db')
+        changes = service.calendar().sync(state_store=store)
+        for id in changes.created + changes.updated:
+          event = service.calendar().get_event(id)
+
+    Only the changes go over the wire, so a poll costs as much as what changed rather than the whole calendar.
+    See :meth:`Exchange2010Service.sync_folder_items`.
+    """
+    return self.service.sync_folder_items(self.calendar_id, state_store=state_store, key=key, sync_state=sync_state, max_changes=max_changes, delegate_for=delegate_for)
+
+  def iter_events(self, start, end, page_size=DEFAULT_EVENTS_PAGE_SIZE, window=DEFAULT_EVENTS_WINDOW, delegate_for=None):
+    """
+    Generates the events between *start* and *end*, one *window* of time at a time. ::
+
+        for event in service.calendar().iter_events(start=start, end=end):
+          print(event.subject)
+
+    Each request asks for at most *page_size* events. A window that has more than that, or that Exchange says is
+    too big, gets split in half until it fits. Only one window's worth of events is held in memory at once, and
+    the first events come back before later windows have been asked for.
+
+    Events that straddle windows are generated once, in the window they start in.
+    """
+    start = convert_datetime_to_utc(start)
+    end = convert_datetime_to_utc(end)
+
+    return self._iter_events(start, end, page_size, window, delegate_for, include_earlier_starts=True)
+
+  def _iter_events(self, start, end, page_size, window, delegate_for, include_earlier_starts):
+    windows = []
+    window_end = end
+    while window_end > start:
+      windows.append((max(start, window_end - window), window_end))
+      window_end -= window
+
+    # windows is a stack with the earliest window on top
+    while windows:
+      window_start, window_end = windows.pop()
+
+      try:
+        items, complete = self._get_calendar_view(window_start, window_end, page_size, delegate_for)
+      except ExchangeViewTooBigException:
+        if window_end - window_start <= MIN_EVENTS_WINDOW:
+          raise
+        items, complete = None, False
+
+      if not complete and window_end - window_start > MIN_EVENTS_WINDOW:
+        middle = window_start + (window_end - window_start) // 2
+        windows.append((middle, window_end))
+        windows.append((window_start, middle))
+        continue
+
+      if not complete:
+        log.warning(u'More than %d events between %s and %s, only the first %d are included', page_size, window_start, window_end, page_size)
+
+      for item in items:
+        event = Exchange2010CalendarEvent(service=self.service, xml=item)
+        if self._starts_in_window(event, window_start, window_end, first_window=(include_earlier_starts and window_start == start)):
+          yield event
+
+  def list_events_in_parallel(self, start, end, max_workers=DEFAULT_DETAILS_WORKERS, page_size=DEFAULT_EVENTS_PAGE_SIZE, delegate_for=None):
+    """
+    Lists the events between *start* and *end*, fetching several windows of time at once. Returns a list of
+    events, ordered by start time. ::
+
+        events = service.calendar().list_events_in_parallel(start=start_of_year, end=end_of_year, max_workers=8)
+
+    The range is first cut into slices that get counted (cheaply, ids only) to see where the events are. Slices
+    are then grouped into windows of about the same number of events - enough windows to keep *max_workers*
+    busy, each with no more than *page_size* events - and the windows are fetched on *max_workers* threads.
+    Windows with nothing in them aren't fetched at all.
+    """
+    start = convert_datetime_to_utc(start)
+    end = convert_datetime_to_utc(end)
+
+    windows = self._plan_windows(start, end, max_workers, page_size, delegate_for)
+
+    def fetch(window):
+      window_start, window_end = window
+      return list(self._iter_events(window_start, window_end, page_size, window_end - window_start, delegate_for, include_earlier_starts=(window_start == start)))
+
+    events = []
+    for window_events in parallel_map(fetch, windows, max_workers):
+      events.extend(window_events)
+
+    return sorted(events, key=lambda event: event.start or start)
+
+  def _plan_windows(self, start, end, max_workers, page_size, delegate_for):
+    slice_count = max(1, max_workers * PROBES_PER_WORKER)
+    slice_length = (end - start) / slice_count
+    if slice_length <= MIN_EVENTS_WINDOW:
+      return [(start, end)]
+
+    boundaries = [start + slice_length * i for i in range(slice_count)] + [end]
+    slices = list(zip(boundaries[:-1], boundaries[1:]))
+    counts = parallel_map(lambda window: self._count_events(window[0], window[1], delegate_for), slices, max_workers)
+
+    return self._group_slices(slices, counts, max_workers, page_size)
+
+  def _group_slices(self, slices, counts, max_workers, page_size):
+    # Events that overlap a slice boundary get counted in both slices, so this overestimates a little
+    target = max(1, min(page_size, -(-sum(counts) // max_workers)))
+
+    windows = []
+    window_start, window_count = None, 0
+    for (slice_start, slice_end), count in zip(slices, counts):
+      if count == 0:
+        if window_start is not None:
+          windows.append((window_start, slice_start))
+          window_start, window_count = None, 0
+        continue
+
+      if window_start is None:
+        window_start = slice_start
+      elif window_count + count > target:
+        windows.append((window_start, slice_start))
+        window_start, window_count = slice_start, 0
+
+      window_count += count
+
+    if window_start is not None:
+      windows.append((window_start, slices[-1][1]))
+
+    return windows
+
+  def _count_events(self, start, end, delegate_for):
+    body = soap_request.get_calendar_items(format=u'IdOnly', calendar_id=self.calendar_id, start=start, end=end, max_entries=1, delegate_for=delegate_for)
+    response_xml = self.service.send(body)
+
+    root_folder = response_xml.xpath(u'//m:FindItemResponseMessage/m:RootFolder', namespaces=soap_request.NAMESPACES)
+    return int(root_folder[0].get(u'TotalItemsInView', 0)) if root_folder else 0
+
+  def _get_calendar_view(self, start, end, page_size, delegate_for):
+    body = soap_request.get_calendar_items(format=u'AllProperties', calendar_id=self.calendar_id, start=start, end=end, max_entries=page_size, delegate_for=delegate_for)
+    response_xml = self.service.send(body)
+
+    root_folder = response_xml.xpath(u'//m:FindItemResponseMessage/m:RootFolder', namespaces=soap_request.NAMESPACES)
+    items = response_xml.xpath(u'//m:FindItemResponseMessage/m:RootFolder/t:Items/t:CalendarItem', namespaces=soap_request.NAMESPACES)
+    complete = not root_folder or root_folder[0].get(u'IncludesLastItemInRange') != u'false'
+
+    return items, complete
+
+  def _starts_in_window(self, event, window_start, window_end, first_window):
+    if event.start is None:
+      return first_window
+
+    # events that started before the very first window still belong to it
+    return event.start < window_end and (first_window or event.start >= window_start)
+
+  def _stream_events(self, start, end, delegate_for, restriction=None, query_string=None, fields=None):
+    if restriction is not None or query_string:
+      # Filtered listings come a page at a time, so only one page is ever held in memory
+      offset = 0
+      while offset is not None:
+        response_xml = self.service.send(_find_events_request(self.calendar_id, start, end, delegate_for, restriction, query_string, fields, offset))
+        for item in response_xml.xpath(u'//m:FindItemResponseMessage/m:RootFolder/t:Items/t:CalendarItem', namespaces=soap_request.NAMESPACES):
+          event = Exchange2010CalendarEvent(service=self.service, xml=item)
+          if not query_string or _in_window(event, start, end):
+            yield event
+        offset = _next_page_offset(response_xml, offset)
+      return
+
+    body = soap_request.get_calendar_items(format=u'AllProperties', calendar_id=self.calendar_id, start=start, end=end, delegate_for=delegate_for,
+                                           restriction=restriction, query_string=query_string, fields=fields)
+
+    for item in self.service.send_streaming(body, u'{%s}CalendarItem' % soap_request.TYPE_NS):
+      yield Exchange2010CalendarEvent(service=self.service, xml=item)
+
+
+def _find_events_request(calendar_id, start, end, delegate_for, restriction, query_string, fields, offset):
+  return soap_request.find_calendar_items(format=u'AllProperties', calendar_id=calendar_id, start=start, end=end, restriction=restriction, query_string=query_string,
+                                          delegate_for=delegate_for, fields=fields, offset=offset, max_entries=DEFAULT_EVENTS_PAGE_SIZE)
+
+
+def _in_window(event, start, end):
+  """ Whether *event* is in the window find_calendar_items would have asked Exchange for, were it allowed to. """
+  start, end = convert_datetime_to_utc(start), convert_datetime_to_utc(end)
+
+  # Events listed without their times can't be checked, so they're kept
+  if end is not None and event.start is not None and event.start >= end:
+    return False
+  if start is not None and event.end is not None and event.end <= start and event.type != u'RecurringMaster':
+    return False
+
+  return True
+
+
+def _next_page_offset(response, offset):
+  """ Returns where the page after this one (a FindItem response for the page at *offset*) starts, or None if it was the last. """
+  root_folder = response.xpath(u'//m:FindItemResponseMessage/m:RootFolder', namespaces=soap_request.NAMESPACES)
+  if not root_folder or root_folder[0].get(u'IncludesLastItemInRange') != u'false':
+    return None
+
+  # A page that makes no progress would have us asking for it forever
+  next_offset = root_folder[0].get(u'IndexedPagingOffset')
+  if next_offset is None or int(next_offset) <= offset:
+    return None
+
+  return int(next_offset)
 
 
 class Exchange2010CalendarEventList(object):
@@ -101,7 +805,8 @@ class Exchange2010CalendarEventList(object):
   Creates & Stores a list of Exchange2010CalendarEvent items in the "self.events" variable.
   """
 
-  def __init__(self, service=None, calendar_id=u'calendar', start=None, end=None, details=False, delegate_for=None):
+  def __init__(self, service=None, calendar_id=u'calendar', start=None, end=None, details=False, delegate_for=None, xml=None, restriction=None, query_string=None,
+               fields=None):
     self.service = service
     self.count = 0
     self.start = start
@@ -110,15 +815,18 @@ class Exchange2010CalendarEventList(object):
     self.event_ids = list()
     self.details = details
     self.delegate_for = delegate_for
+    self.errors = dict()
 
-    # This request uses a Calendar-specific query between two dates.
-    body = soap_request.get_calendar_items(format=u'AllProperties', calendar_id=calendar_id, start=self.start, end=self.end, delegate_for=self.delegate_for)
-    response_xml = self.service.send(body)
-    self._parse_response_for_all_events(response_xml)
+    if xml is None and (restriction is not None or query_string):
+      self._find_all_events(calendar_id, restriction, query_string, fields)
+    else:
+      if xml is None:
+        # This request uses a Calendar-specific query between two dates.
+        body = soap_request.get_calendar_items(format=u'AllProperties', calendar_id=calendar_id, start=self.start, end=self.end, delegate_for=self.delegate_for,
+                                               fields=fields)
+        xml = self.service.send(body)
 
-    # Populate the event ID list, for convenience reasons.
-    for event in self.events:
-      self.event_ids.append(event._id)
+      self._add_page(xml, query_string)
 
     # If we have requested all the details, basically repeat the previous 3 steps,
     # but instead of start/stop, we have a list of ID fields.
@@ -127,6 +835,27 @@ class Exchange2010CalendarEventList(object):
       self.load_all_details()
     return
 
+  def _find_all_events(self, calendar_id, restriction, query_string, fields, offset=0):
+    # One FindItem stops at the server's limit, so a filtered listing is read a page at a time
+    while offset is not None:
+      response = self.service.send(_find_events_request(calendar_id, self.start, self.end, self.delegate_for, restriction, query_string, fields, offset))
+      self._add_page(response, query_string)
+      offset = _next_page_offset(response, offset)
+
+  def _add_page(self, response, query_string=None):
+    first = len(self.events)
+    self._parse_response_for_all_events(response)
+
+    # AQS searches come back from the whole calendar
+    if query_string:
+      in_window = [event for event in self.events[first:] if _in_window(event, self.start, self.end)]
+      self.count -= len(self.events) - first - len(in_window)
+      self.events[first:] = in_window
+
+    # Populate the event ID list, for convenience reasons.
+    for event in self.events[first:]:
+      self.event_ids.append(event._id)
+
   def _parse_response_for_all_events(self, response):
     """
     This function will retrieve *most* of the event data, excluding Organizer & Attendee details
@@ -135,11 +864,11 @@ class Exchange2010CalendarEventList(object):
     if not items:
       items = response.xpath(u'//m:GetItemResponseMessage/m:Items/t:CalendarItem', namespaces=soap_request.NAMESPACES)
     if items:
-      self.count = len(items)
-      log.debug(u'Found %s items' % self.count)
+      self.count += len(items)
+      log.debug(u'Found %s items', len(items))
 
       for item in items:
-        self._add_event(xml=soap_request.M.Items(deepcopy(item)))
+        self._add_event(xml=item)
     else:
       log.debug(u'No calendar items found with search parameters.')
 
@@ -147,58 +876,220 @@ class Exchange2010CalendarEventList(object):
 
   def _add_event(self, xml=None):
     log.debug(u'Adding new event to all events list.')
-    event = Exchange2010CalendarEvent(service=self.service, xml=xml)
-    log.debug(u'Subject of new event is %s' % event.subject)
+    event = self._build_event(xml)
+    log.debug(u'Subject of new event is %s', event.subject)
     self.events.append(event)
     return self
 
-  def load_all_details(self):
+  def _build_event(self, xml):
+    return Exchange2010CalendarEvent(service=self.service, xml=xml)
+
+  def load_all_details(self, batch_size=DEFAULT_DETAILS_BATCH_SIZE, max_workers=DEFAULT_DETAILS_WORKERS, retries=DEFAULT_DETAILS_RETRIES):
     """
     This function will execute all the event lookups for known events.
 
     This is intended for use when you want to have a completely populated event entry, including
     Organizer & Attendee details.
+
+    Events are looked up *batch_size* at a time, with up to *max_workers* lookups running at once. An event
+    that can't be looked up (because it was deleted in the meantime, or its whole batch failed) keeps the details
+    it already had, and the exception goes in ``self.errors``, keyed by event id. Events Exchange says it can't
+    look up right now are asked for again, up to *retries* times.
     """
     log.debug(u"Loading all details")
-    if self.count > 0:
-      # Now, empty out the events to prevent duplicates!
-      del(self.events[:])
+    indexes = list(range(len(self.events)))
 
-      # Send the SOAP request with the list of exchange ID values.
-      log.debug(u"Requesting all event details for events: {event_list}".format(event_list=str(self.event_ids)))
-      body = soap_request.get_item(exchange_id=self.event_ids, format=u'AllProperties')
-      response_xml = self.service.send(body)
+    attempt = 0
+    while indexes:
+      batches = chunks(indexes, batch_size)
+      log.debug(u"Requesting details for %d events in %d batches", len(indexes), len(batches))
 
-      # Re-parse the results for all the details!
-      self._parse_response_for_all_events(response_xml)
+      responses = parallel_map(self._get_event_details, batches, max_workers)
+      indexes = self._merge_event_details(batches, responses, attempt < retries)
+
+      if indexes:
+        self.service._backoff(attempt)
+      attempt += 1
 
     return self
 
+  def interval_index(self):
+    """
+    Returns an :class:`ExchangeIntervalIndex` of these events, for checking conflicts and finding free time
+    without going back to Exchange.
+    """
+    return ExchangeIntervalIndex(self.events)
+
+  def _get_event_details(self, indexes):
+    body = soap_request.get_item(exchange_id=[self.event_ids[index] for index in indexes], format=u'AllProperties')
+    try:
+      return self.service.send(body, raise_item_errors=False)
+    except FailedExchangeException as err:
+      return err
+
+  def _merge_event_details(self, batches, responses, retry):
+    """
+    Fills in the events in each batch (lists of indexes into ``self.events``) from its GetItem response, or from
+    the exception it raised. Returns the indexes of the events worth asking for again, if *retry* is set.
+    """
+    to_retry = []
+
+    for batch, response in zip(batches, responses):
+      # The whole request failed, so every event in it did
+      if isinstance(response, Exception):
+        for index in batch:
+          self._add_details_error(index, response)
+        continue
+
+      # GetItem answers with one response message per id, in the order they were asked for
+      messages = response.xpath(u'//m:GetItemResponseMessage', namespaces=soap_request.NAMESPACES)
+
+      for index, message in zip(batch, messages):
+        error = self.service._exception_for_response_message(message)
+        items = message.xpath(u'm:Items/t:CalendarItem', namespaces=soap_request.NAMESPACES)
+
+        if error is None:
+          self.errors.pop(self.event_ids[index], None)
+          if items:
+            self.events[index] = self._build_event(items[0])
+        elif retry and isinstance(error, (ExchangeServerBusyException, ExchangeInternalServerTransientErrorException)):
+          to_retry.append(index)
+        else:
+          self._add_details_error(index, error)
+
+      for index in batch[len(messages):]:
+        self._add_details_error(index, FailedExchangeException(u"Exchange server did not return a status for this event", None))
+
+    return to_retry
+
+  def _add_details_error(self, index, error):
+    log.debug(u'Unable to load details for event %s: %s', self.event_ids[index], error)
+    self.errors[self.event_ids[index]] = error
+
 
 class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
 
+  CALENDAR_ITEM_TAG = u'{%s}CalendarItem' % soap_request.TYPE_NS
+
+  # Exceptions to the recurrence, as read from a recurring master
+  _modified_occurrences = []
+  _deleted_occurrences = []
+
+  VALID_UPDATE_OPERATION_TYPES = (
+    u'SendToNone', u'SendOnlyToAll', u'SendOnlyToChanged',
+    u'SendToAllAndSaveCopy', u'SendToChangedAndSaveCopy',
+  )
+
+  # All relative to the <t:CalendarItem>
+  EVENT_PROPERTIES = CompiledPropertyMap({
+    u'subject': {
+      u'xpath': u't:Subject',
+    },
+    u'location':
+    {
+      u'xpath': u't:Location',
+    },
+    u'availability':
+    {
+      u'xpath': u't:LegacyFreeBusyStatus',
+    },
+    u'start':
+    {
+      u'xpath': u't:Start',
+      u'cast': u'datetime',
+    },
+    u'end':
+    {
+      u'xpath': u't:End',
+      u'cast': u'datetime',
+    },
+    u'html_body':
+    {
+      u'xpath': u't:Body[@BodyType="HTML"]',
+    },
+    u'text_body':
+    {
+      u'xpath': u't:Body[@BodyType="Text"]',
+    },
+    u'_type':
+    {
+      u'xpath': u't:CalendarItemType',
+    },
+    u'reminder_minutes_before_start':
+    {
+      u'xpath': u't:ReminderMinutesBeforeStart',
+      u'cast': u'int',
+    },
+    u'is_all_day':
+    {
+      u'xpath': u't:IsAllDayEvent',
+      u'cast': u'bool',
+    },
+    u'recurrence_end_date':
+    {
+      u'xpath': u't:Recurrence/t:EndDateRecurrence/t:EndDate',
+      u'cast': u'date_only_naive',
+    },
+    u'recurrence_interval':
+    {
+      u'xpath': u't:Recurrence/*/t:Interval',
+      u'cast': u'int',
+    },
+    u'recurrence_days':
+    {
+      u'xpath': u't:Recurrence/t:WeeklyRecurrence/t:DaysOfWeek',
+    },
+  }, namespace_map=soap_request.NAMESPACES)
+
+  # Relative to a <t:Occurrence> in a recurring master's <t:ModifiedOccurrences>
+  OCCURRENCE_PROPERTIES = CompiledPropertyMap({
+    u'start': {u'xpath': u't:Start', u'cast': u'datetime'},
+    u'end': {u'xpath': u't:End', u'cast': u'datetime'},
+    u'original_start': {u'xpath': u't:OriginalStart', u'cast': u'datetime'},
+  }, namespace_map=soap_request.NAMESPACES)
+
+  ORGANIZER_PROPERTIES = CompiledPropertyMap({
+    u'name': {u'xpath': u't:Name'},
+    u'email': {u'xpath': u't:EmailAddress'},
+  }, namespace_map=soap_request.NAMESPACES)
+
+  # Attendees and resources look the same
+  ATTENDEE_PROPERTIES = CompiledPropertyMap({
+    u'name': {u'xpath': u't:Mailbox/t:Name'},
+    u'email': {u'xpath': u't:Mailbox/t:EmailAddress'},
+    u'response': {u'xpath': u't:ResponseType'},
+    u'last_response': {u'xpath': u't:LastResponseTime', u'cast': u'datetime'},
+  }, namespace_map=soap_request.NAMESPACES)
+
   def _init_from_service(self, id):
     log.debug(u'Creating new Exchange2010CalendarEvent object from ID')
     body = soap_request.get_item(exchange_id=id, format=u'AllProperties')
     response_xml = self.service.send(body)
-    properties = self._parse_response_for_get_event(response_xml)
+    item = self._find_calendar_item(response_xml)
 
-    self._update_properties(properties)
+    self._update_properties(self._parse_calendar_item(item))
     self._id = id
-    log.debug(u'Created new event object with ID: %s' % self._id)
+    # Keep the change key, so that writes don't have to go and fetch it first
+    self._change_key = self._parse_item_id(item)[1]
+    log.debug(u'Created new event object with ID: %s', self._id)
 
     self._reset_dirty_attributes()
 
     return self
 
   def _init_from_xml(self, xml=None):
+    """
+    *xml* is either a <t:CalendarItem> or a response with one in it. A <t:CalendarItem> is read where it is, so
+    there's no need to copy it out of the response it came in.
+    """
     log.debug(u'Creating new Exchange2010CalendarEvent object from XML')
 
-    properties = self._parse_response_for_get_event(xml)
+    item = self._find_calendar_item(xml)
+    properties = self._parse_calendar_item(item)
     self._update_properties(properties)
-    self._id, self._change_key = self._parse_id_and_change_key_from_response(xml)
+    self._id, self._change_key = self._parse_item_id(item)
 
-    log.debug(u'Created new event object with ID: %s' % self._id)
+    log.debug(u'Created new event object with ID: %s', self._id)
     self._reset_dirty_attributes()
 
     return self
@@ -285,9 +1176,9 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
     if self._dirty_attributes:
       raise ValueError(u"There are unsaved changes to this invite - please update it first: %r" % self._dirty_attributes)
 
-    self.refresh_change_key()
-    body = soap_request.update_item(self, [], calendar_item_update_operation_type=u'SendOnlyToAll')
-    self.service.send(body)
+    response_xml = self._write(lambda: soap_request.update_item(self, [], calendar_item_update_operation_type=u'SendOnlyToAll',
+                                                                conflict_resolution=self.service.conflict_policy.conflict_resolution))
+    self._update_change_key_from_response(response_xml)
 
     return self
 
@@ -307,35 +1198,37 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
     if not self.id:
       raise TypeError(u"You can't update an event that hasn't been created yet.")
 
-    if 'send_only_to_changed_attendees' in kwargs:
-      warnings.warn(
-        "The argument send_only_to_changed_attendees is deprecated.  Use calendar_item_update_operation_type instead.",
-        DeprecationWarning,
-      )  # 20140502
-      if kwargs['send_only_to_changed_attendees']:
-        calendar_item_update_operation_type = u'SendToChangedAndSaveCopy'
-
-    VALID_UPDATE_OPERATION_TYPES = (
-      u'SendToNone', u'SendOnlyToAll', u'SendOnlyToChanged',
-      u'SendToAllAndSaveCopy', u'SendToChangedAndSaveCopy',
-    )
-    if calendar_item_update_operation_type not in VALID_UPDATE_OPERATION_TYPES:
-      raise ValueError('calendar_item_update_operation_type has unknown value')
+    calendar_item_update_operation_type = self._check_update_operation_type(calendar_item_update_operation_type, **kwargs)
 
     self.validate()
 
     if self._dirty_attributes:
-      log.debug(u"Updating these attributes: %r" % self._dirty_attributes)
-      self.refresh_change_key()
+      log.debug(u"Updating these attributes: %r", self._dirty_attributes)
 
-      body = soap_request.update_item(self, self._dirty_attributes, calendar_item_update_operation_type=calendar_item_update_operation_type)
-      self.service.send(body)
+      response_xml = self._write(lambda: soap_request.update_item(self, self._dirty_attributes, calendar_item_update_operation_type=calendar_item_update_operation_type,
+                                                                  conflict_resolution=self.service.conflict_policy.conflict_resolution))
+      self._update_change_key_from_response(response_xml)
       self._reset_dirty_attributes()
     else:
       log.info(u"Update was called, but there's nothing to update. Doing nothing.")
 
     return self
 
+  def _check_update_operation_type(self, calendar_item_update_operation_type, **kwargs):
+
+    if 'send_only_to_changed_attendees' in kwargs:
+      warnings.warn(
+        "The argument send_only_to_changed_attendees is deprecated.  Use calendar_item_update_operation_type instead.",
+        DeprecationWarning,
+      )  # 20140502
+      if kwargs['send_only_to_changed_attendees']:
+        calendar_item_update_operation_type = u'SendToChangedAndSaveCopy'
+
+    if calendar_item_update_operation_type not in self.VALID_UPDATE_OPERATION_TYPES:
+      raise ValueError('calendar_item_update_operation_type has unknown value')
+
+    return calendar_item_update_operation_type
+
   def cancel(self):
     """
     Cancels an event in Exchange.  ::
@@ -348,8 +1241,7 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
     if not self.id:
       raise TypeError(u"You can't delete an event that hasn't been created yet.")
 
-    self.refresh_change_key()
-    self.service.send(soap_request.delete_event(self))
+    self._write(lambda: soap_request.delete_event(self))
     # TODO rsanders high - check return status to make sure it was actually sent
     return None
 
@@ -361,6 +1253,49 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
       event = service.calendar().get_event(id='KEY HERE')
       event.move_to(folder_id='NEW CALENDAR KEY HERE')
     """
+    self._check_move_to(folder_id)
+
+    response_xml = self._write(lambda: soap_request.move_event(self, folder_id))
+    return self._update_from_move_response(response_xml, folder_id)
+
+  def _write(self, build_request):
+    """
+    Sends the write that *build_request* builds, with the change key we already have. If Exchange says it's out of
+    date, the service's conflict policy decides whether to fetch it again and rebuild and resend the write.
+    """
+    policy = self.service.conflict_policy
+    if policy.refresh_before_write or not self._change_key:
+      self.refresh_change_key()
+
+    attempt = 0
+    while True:
+      try:
+        return self.service.send(build_request())
+      except (ExchangeStaleChangeKeyException, ExchangeIrresolvableConflictException) as err:
+        if not policy.should_retry(err, attempt):
+          raise
+        log.info(u'Change key for %s is out of date, fetching it again: %s', self._id, err)
+        self.refresh_change_key()
+
+      attempt += 1
+
+  def _update_from_response_message(self, message):
+    # Picks the id and change key out of one response message of a batched write
+    items = message.xpath(u'm:Items/t:CalendarItem', namespaces=soap_request.NAMESPACES)
+    if items:
+      id, change_key = self._parse_item_id(items[0])
+      if id:
+        self._id = id
+      if change_key:
+        self._change_key = change_key
+
+  def _update_change_key_from_response(self, response_xml):
+    # Writes hand back the item's new change key, so the next write doesn't start out stale
+    id, change_key = self._parse_id_and_change_key_from_response(response_xml)
+    if change_key:
+      self._change_key = change_key
+
+  def _check_move_to(self, folder_id):
     if not folder_id:
       raise TypeError(u"You can't move an event to a non-existant folder")
 
@@ -370,8 +1305,7 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
     if not self.id:
       raise TypeError(u"You can't move an event that hasn't been created yet.")
 
-    self.refresh_change_key()
-    response_xml = self.service.send(soap_request.move_event(self, folder_id))
+  def _update_from_move_response(self, response_xml, folder_id):
     new_id, new_change_key = self._parse_id_and_change_key_from_response(response_xml)
     if not new_id:
       raise ValueError(u"MoveItem returned success but requested item not moved")
@@ -428,23 +1362,122 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
 
     """
 
-    if not all([isinstance(i, int) for i in instance_index]):
-      raise TypeError("instance_index must be an interable of type int")
-
-    if self.type != 'RecurringMaster':
-      raise InvalidEventType("get_occurrance method can only be called on a 'RecurringMaster' event type")
+    self._check_get_occurrence(instance_index)
 
     body = soap_request.get_occurrence(exchange_id=self._id, instance_index=instance_index, format=u"AllProperties")
     response_xml = self.service.send(body)
 
-    items = response_xml.xpath(u'//m:GetItemResponseMessage/m:Items', namespaces=soap_request.NAMESPACES)
-    events = []
-    for item in items:
-      event = Exchange2010CalendarEvent(service=self.service, xml=deepcopy(item))
-      if event.id:
-        events.append(event)
+    return self._parse_events_from_get_item_response(response_xml)
 
-    return events
+  def expand_occurrences(self, start, end, tz=None):
+    """
+      expand_occurrences(start, end, tz=None)
+      :param datetime start: Start of the window to look in.
+      :param datetime end: End of the window to look in.
+      :param tzinfo tz: The time zone the event recurs in. Defaults to UTC.
+
+      Generates a ``(start, end)`` pair for each occurrence of this recurring event that overlaps the window,
+      in order, working them out from the recurrence pattern instead of asking Exchange. An event that doesn't
+      recur has just the one occurrence.
+
+      Occurrences happen at the same wall clock time in *tz* - pass the organizer's time zone to get
+      occurrences right across daylight saving changes. Occurrences that were deleted are left out, and ones
+      that were moved show up at their new times, as long as this event was read from Exchange with the
+      exceptions in it (``get_event`` does that).
+
+      **Examples**::
+
+        master = service.calendar().get_event(id='<event_id>')
+
+        for start, end in master.expand_occurrences(start=first_of_month, end=end_of_month, tz=timezone('US/Pacific')):
+          print start, end
+
+    """
+    start = convert_datetime_to_utc(start)
+    end = convert_datetime_to_utc(end)
+
+    moved = sorted(
+      (occurrence[u'start'], occurrence[u'end']) for occurrence in self._modified_occurrences_between(start, end)
+    )
+
+    return heapq.merge(self._expand_pattern(start, end, tz), moved)
+
+  def _expand_pattern(self, start, end, tz):
+    if self.start is None or self.end is None:
+      return
+
+    event_start = convert_datetime_to_utc(self.start)
+    event_end = convert_datetime_to_utc(self.end)
+
+    if not self.recurrence:
+      if event_start < end and event_end > start:
+        yield event_start, event_end
+      return
+
+    tz = tz or utc
+    duration = event_end - event_start
+    first = event_start.astimezone(tz)
+
+    # Moved occurrences are generated from where they are now, not where the pattern puts them
+    exceptions = set(self._deleted_occurrences)
+    exceptions.update(occurrence[u'original_start'] for occurrence in self._modified_occurrences if occurrence.get(u'original_start'))
+
+    # A day of slack either side of the window covers occurrences that start the day before in tz
+    from_date = (start - duration).astimezone(tz).date() - timedelta(days=1)
+    dates = occurrence_dates(
+      self.recurrence, first.date(), interval=self.recurrence_interval, days=self.recurrence_days,
+      end_date=self.recurrence_end_date, from_date=from_date,
+    )
+
+    for occurrence_date in dates:
+      occurrence_start = self._localize(datetime.combine(occurrence_date, first.time().replace(tzinfo=None)), tz).astimezone(utc)
+      if occurrence_start >= end:
+        return
+
+      occurrence_end = occurrence_start + duration
+      if occurrence_end > start and occurrence_start not in exceptions:
+        yield occurrence_start, occurrence_end
+
+  def _modified_occurrences_between(self, start, end):
+    for occurrence in self._modified_occurrences:
+      if not (occurrence.get(u'start') and occurrence.get(u'end')):
+        continue
+      if (start is None or occurrence[u'end'] > start) and (end is None or occurrence[u'start'] < end):
+        yield occurrence
+
+  def _localize(self, naive, tz):
+    # pytz time zones need localize() to pick the right offset; other tzinfo objects work with replace()
+    if hasattr(tz, u'localize'):
+      return tz.localize(naive)
+    return naive.replace(tzinfo=tz)
+
+  def get_modified_occurrences(self, start=None, end=None):
+    """
+      get_modified_occurrences(start=None, end=None)
+
+      Fetches the occurrences of this recurring event that were changed on their own - optionally only the
+      ones that overlap *start* to *end* - in one request. These are the only occurrences that need
+      fetching: everything else about the series is already here, and :meth:`expand_occurrences` works out
+      when the rest of the occurrences are.
+    """
+    start = convert_datetime_to_utc(start)
+    end = convert_datetime_to_utc(end)
+
+    ids = [occurrence[u'id'] for occurrence in self._modified_occurrences_between(start, end) if occurrence.get(u'id')]
+    if not ids:
+      return []
+
+    body = soap_request.get_item(exchange_id=ids, format=u'AllProperties')
+    response_xml = self.service.send(body)
+
+    return self._parse_events_from_get_item_response(response_xml)
+
+  def _check_get_occurrence(self, instance_index):
+    if not all([isinstance(i, int) for i in instance_index]):
+      raise TypeError("instance_index must be an interable of type int")
+
+    if self.type != 'RecurringMaster':
+      raise InvalidEventType("get_occurrance method can only be called on a 'RecurringMaster' event type")
 
   def conflicting_events(self):
     """
@@ -466,10 +1499,13 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
     body = soap_request.get_item(exchange_id=self.conflicting_event_ids, format="AllProperties")
     response_xml = self.service.send(body)
 
-    items = response_xml.xpath(u'//m:GetItemResponseMessage/m:Items', namespaces=soap_request.NAMESPACES)
+    return self._parse_events_from_get_item_response(response_xml)
+
+  def _parse_events_from_get_item_response(self, response_xml):
+    items = response_xml.xpath(u'//m:GetItemResponseMessage/m:Items/t:CalendarItem', namespaces=soap_request.NAMESPACES)
     events = []
     for item in items:
-      event = Exchange2010CalendarEvent(service=self.service, xml=deepcopy(item))
+      event = self.__class__(service=self.service, xml=item)
       if event.id:
         events.append(event)
 
@@ -493,94 +1529,53 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
     else:
       return None, None
 
-  def _parse_response_for_get_event(self, response):
+  def _find_calendar_item(self, xml):
+    if xml.tag == self.CALENDAR_ITEM_TAG:
+      return xml
 
-    result = self._parse_event_properties(response)
+    items = xml.xpath(u'//m:Items/t:CalendarItem', namespaces=soap_request.NAMESPACES)
+    if items:
+      return items[0]
+
+    # Nothing in the response - parse an empty item, so that every property comes out empty
+    return soap_request.T.CalendarItem()
+
+  def _parse_item_id(self, item):
+    id_element = item.find(u't:ItemId', namespaces=soap_request.NAMESPACES)
 
-    organizer_properties = self._parse_event_organizer(response)
+    if id_element is not None:
+      return id_element.get(u"Id", None), id_element.get(u"ChangeKey", None)
+    else:
+      return None, None
+
+  def _parse_calendar_item(self, item):
+
+    result = self._parse_event_properties(item)
+
+    organizer_properties = self._parse_event_organizer(item)
     if organizer_properties is not None:
       if 'email' not in organizer_properties:
         organizer_properties['email'] = None
       result[u'organizer'] = ExchangeEventOrganizer(**organizer_properties)
 
-    attendee_properties = self._parse_event_attendees(response)
+    attendee_properties = self._parse_event_attendees(item)
     result[u'_attendees'] = self._build_resource_dictionary([ExchangeEventResponse(**attendee) for attendee in attendee_properties])
 
-    resource_properties = self._parse_event_resources(response)
+    resource_properties = self._parse_event_resources(item)
     result[u'_resources'] = self._build_resource_dictionary([ExchangeEventResponse(**resource) for resource in resource_properties])
 
-    result['_conflicting_event_ids'] = self._parse_event_conflicts(response)
+    result['_conflicting_event_ids'] = self._parse_event_conflicts(item)
+
+    result[u'_modified_occurrences'] = self._parse_modified_occurrences(item)
+    result[u'_deleted_occurrences'] = self._parse_deleted_occurrences(item)
 
     return result
 
-  def _parse_event_properties(self, response):
-
-    property_map = {
-      u'subject': {
-        u'xpath': u'//m:Items/t:CalendarItem/t:Subject',
-      },
-      u'location':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:Location',
-      },
-      u'availability':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:LegacyFreeBusyStatus',
-      },
-      u'start':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:Start',
-        u'cast': u'datetime',
-      },
-      u'end':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:End',
-        u'cast': u'datetime',
-      },
-      u'html_body':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:Body[@BodyType="HTML"]',
-      },
-      u'text_body':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:Body[@BodyType="Text"]',
-      },
-      u'_type':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:CalendarItemType',
-      },
-      u'reminder_minutes_before_start':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:ReminderMinutesBeforeStart',
-        u'cast': u'int',
-      },
-      u'is_all_day':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:IsAllDayEvent',
-        u'cast': u'bool',
-      },
-      u'recurrence_end_date':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:Recurrence/t:EndDateRecurrence/t:EndDate',
-        u'cast': u'date_only_naive',
-      },
-      u'recurrence_interval':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:Recurrence/*/t:Interval',
-        u'cast': u'int',
-      },
-      u'recurrence_days':
-      {
-        u'xpath': u'//m:Items/t:CalendarItem/t:Recurrence/t:WeeklyRecurrence/t:DaysOfWeek',
-      },
-    }
+  def _parse_event_properties(self, item):
 
-    result = self.service._xpath_to_dict(element=response, property_map=property_map, namespace_map=soap_request.NAMESPACES)
+    result = self.service._xpath_to_dict(element=item, property_map=self.EVENT_PROPERTIES, namespace_map=soap_request.NAMESPACES)
 
-    try:
-      recurrence_node = response.xpath(u'//m:Items/t:CalendarItem/t:Recurrence', namespaces=soap_request.NAMESPACES)[0]
-    except IndexError:
-      recurrence_node = None
+    recurrence_node = item.find(u't:Recurrence', namespaces=soap_request.NAMESPACES)
 
     if recurrence_node is not None:
 
@@ -598,53 +1593,22 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
 
     return result
 
-  def _parse_event_organizer(self, response):
+  def _parse_event_organizer(self, item):
 
-    organizer = response.xpath(u'//m:Items/t:CalendarItem/t:Organizer/t:Mailbox', namespaces=soap_request.NAMESPACES)
+    organizer = item.find(u't:Organizer/t:Mailbox', namespaces=soap_request.NAMESPACES)
 
-    property_map = {
-      u'name':
-      {
-        u'xpath': u't:Name'
-      },
-      u'email':
-      {
-        u'xpath': u't:EmailAddress'
-      },
-    }
-
-    if organizer:
-      return self.service._xpath_to_dict(element=organizer[0], property_map=property_map, namespace_map=soap_request.NAMESPACES)
+    if organizer is not None:
+      return self.service._xpath_to_dict(element=organizer, property_map=self.ORGANIZER_PROPERTIES, namespace_map=soap_request.NAMESPACES)
     else:
       return None
 
-  def _parse_event_resources(self, response):
-    property_map = {
-      u'name':
-      {
-        u'xpath': u't:Mailbox/t:Name'
-      },
-      u'email':
-      {
-        u'xpath': u't:Mailbox/t:EmailAddress'
-      },
-      u'response':
-      {
-        u'xpath': u't:ResponseType'
-      },
-      u'last_response':
-      {
-        u'xpath': u't:LastResponseTime',
-        u'cast': u'datetime'
-      },
-    }
-
+  def _parse_event_resources(self, item):
     result = []
 
-    resources = response.xpath(u'//m:Items/t:CalendarItem/t:Resources/t:Attendee', namespaces=soap_request.NAMESPACES)
+    resources = item.findall(u't:Resources/t:Attendee', namespaces=soap_request.NAMESPACES)
 
     for attendee in resources:
-      attendee_properties = self.service._xpath_to_dict(element=attendee, property_map=property_map, namespace_map=soap_request.NAMESPACES)
+      attendee_properties = self.service._xpath_to_dict(element=attendee, property_map=self.ATTENDEE_PROPERTIES, namespace_map=soap_request.NAMESPACES)
       attendee_properties[u'required'] = True
 
       if u'last_response' not in attendee_properties:
@@ -655,33 +1619,13 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
 
     return result
 
-  def _parse_event_attendees(self, response):
-
-    property_map = {
-      u'name':
-      {
-        u'xpath': u't:Mailbox/t:Name'
-      },
-      u'email':
-      {
-        u'xpath': u't:Mailbox/t:EmailAddress'
-      },
-      u'response':
-      {
-        u'xpath': u't:ResponseType'
-      },
-      u'last_response':
-      {
-        u'xpath': u't:LastResponseTime',
-        u'cast': u'datetime'
-      },
-    }
+  def _parse_event_attendees(self, item):
 
     result = []
 
-    required_attendees = response.xpath(u'//m:Items/t:CalendarItem/t:RequiredAttendees/t:Attendee', namespaces=soap_request.NAMESPACES)
+    required_attendees = item.findall(u't:RequiredAttendees/t:Attendee', namespaces=soap_request.NAMESPACES)
     for attendee in required_attendees:
-      attendee_properties = self.service._xpath_to_dict(element=attendee, property_map=property_map, namespace_map=soap_request.NAMESPACES)
+      attendee_properties = self.service._xpath_to_dict(element=attendee, property_map=self.ATTENDEE_PROPERTIES, namespace_map=soap_request.NAMESPACES)
       attendee_properties[u'required'] = True
 
       if u'last_response' not in attendee_properties:
@@ -690,10 +1634,10 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
       if u'email' in attendee_properties:
         result.append(attendee_properties)
 
-    optional_attendees = response.xpath(u'//m:Items/t:CalendarItem/t:OptionalAttendees/t:Attendee', namespaces=soap_request.NAMESPACES)
+    optional_attendees = item.findall(u't:OptionalAttendees/t:Attendee', namespaces=soap_request.NAMESPACES)
 
     for attendee in optional_attendees:
-      attendee_properties = self.service._xpath_to_dict(element=attendee, property_map=property_map, namespace_map=soap_request.NAMESPACES)
+      attendee_properties = self.service._xpath_to_dict(element=attendee, property_map=self.ATTENDEE_PROPERTIES, namespace_map=soap_request.NAMESPACES)
       attendee_properties[u'required'] = False
 
       if u'last_response' not in attendee_properties:
@@ -704,8 +1648,23 @@ class Exchange2010CalendarEvent(BaseExchangeCalendarEvent):
 
     return result
 
-  def _parse_event_conflicts(self, response):
-    conflicting_ids = response.xpath(u'//m:Items/t:CalendarItem/t:ConflictingMeetings/t:CalendarItem/t:ItemId', namespaces=soap_request.NAMESPACES)
+  def _parse_modified_occurrences(self, item):
+    # Only recurring masters have these
+    occurrences = []
+    for occurrence in item.iterfind(u't:ModifiedOccurrences/t:Occurrence', namespaces=soap_request.NAMESPACES):
+      properties = self.service._xpath_to_dict(element=occurrence, property_map=self.OCCURRENCE_PROPERTIES, namespace_map=soap_request.NAMESPACES)
+      id_element = occurrence.find(u't:ItemId', namespaces=soap_request.NAMESPACES)
+      properties[u'id'] = id_element.get(u'Id') if id_element is not None else None
+      occurrences.append(properties)
+
+    return occurrences
+
+  def _parse_deleted_occurrences(self, item):
+    starts = item.xpath(u't:DeletedOccurrences/t:DeletedOccurrence/t:Start/text()', namespaces=soap_request.NAMESPACES)
+    return [self.service._parse_date(start) for start in starts]
+
+  def _parse_event_conflicts(self, item):
+    conflicting_ids = item.findall(u't:ConflictingMeetings/t:CalendarItem/t:ItemId', namespaces=soap_request.NAMESPACES)
     return [id_element.get(u"Id") for id_element in conflicting_ids]
 
 
@@ -714,9 +1673,10 @@ class Exchange2010FolderService(BaseExchangeFolderService):
   def folder(self, id=None, **kwargs):
     return Exchange2010Folder(service=self.service, id=id, **kwargs)
 
-  def get_folder(self, id):
+  def get_folder(self, id, fields=None):
     """
       :param str id:  The Exchange ID of the folder to retrieve from the Exchange store.
+      :param list fields:  Optional. FieldURIs, like ``folder:DisplayName``, to fetch instead of every property.
 
       Retrieves the folder specified by the id, from the Exchange store.
 
@@ -725,6 +1685,9 @@ class Exchange2010FolderService(BaseExchangeFolderService):
         folder = service.folder().get_folder(id)
 
     """
+    if fields:
+      response = self.service.send(soap_request.get_folder(folder_id=id, fields=fields))
+      return Exchange2010Folder(service=self.service, xml=response)
 
     return Exchange2010Folder(service=self.service, id=id)
 
@@ -751,6 +1714,20 @@ class Exchange2010FolderService(BaseExchangeFolderService):
 
     return Exchange2010Folder(service=self.service, **properties)
 
+  def sync(self, folder_id=u'msgfolderroot', state_store=None, key=None, sync_state=None, delegate_for=None):
+    """
+      Returns the ids of the folders created, updated and deleted under *folder_id* since the last sync.
+      See :meth:`Exchange2010Service.sync_folder_hierarchy`.
+
+      **Examples**::
+
+        changes = service.folder().sync(state_store=FileSyncStateStore('sync.json'))
+        for id in changes.deleted:
+          forget_folder(id)
+    """
+
+    return self.service.sync_folder_hierarchy(folder_id, state_store=state_store, key=key, sync_state=sync_state, delegate_for=delegate_for)
+
   def find_folder(self, parent_id):
     """
       find_folder(parent_id)
@@ -792,6 +1769,10 @@ class Exchange2010FolderService(BaseExchangeFolderService):
 
 class Exchange2010Folder(BaseExchangeFolder):
 
+  FOLDER_PROPERTIES = CompiledPropertyMap({
+    u'display_name': {u'xpath': u't:DisplayName'},
+  }, namespace_map=soap_request.NAMESPACES)
+
   def _init_from_service(self, id):
 
     body = soap_request.get_folder(folder_id=id, format=u'AllProperties')
@@ -859,6 +1840,12 @@ class Exchange2010Folder(BaseExchangeFolder):
       folder.move_to(folder_id="ID of new location's folder")
     """
 
+    self._check_move_to(folder_id)
+
+    response_xml = self.service.send(soap_request.move_folder(self, folder_id))  # noqa
+    return self._update_from_move_response(response_xml, folder_id)
+
+  def _check_move_to(self, folder_id):
     if not folder_id:
       raise TypeError(u"You can't move to a non-existant folder")
 
@@ -868,8 +1855,7 @@ class Exchange2010Folder(BaseExchangeFolder):
     if not self.id:
       raise TypeError(u"You can't move a folder that hasn't been created yet.")
 
-    response_xml = self.service.send(soap_request.move_folder(self, folder_id))  # noqa
-
+  def _update_from_move_response(self, response_xml, folder_id):
     result_id, result_key = self._parse_id_and_change_key_from_response(response_xml)
     if self.id != result_id:
       raise ValueError(u"MoveFolder returned success but requested folder not moved")
@@ -886,15 +1872,11 @@ class Exchange2010Folder(BaseExchangeFolder):
 
   def _parse_folder_properties(self, response):
 
-    property_map = {
-      u'display_name': {u'xpath': u't:DisplayName'},
-    }
-
     self._id, self._change_key = self._parse_id_and_change_key_from_response(response)
     self._parent_id = self._parse_parent_id_and_change_key_from_response(response)[0]
     self.folder_type = etree.QName(response).localname
 
-    return self.service._xpath_to_dict(element=response, property_map=property_map, namespace_map=soap_request.NAMESPACES)
+    return self.service._xpath_to_dict(element=response, property_map=self.FOLDER_PROPERTIES, namespace_map=soap_request.NAMESPACES)
 
   def _parse_id_and_change_key_from_response(self, response):
 
@@ -0,0 +1,781 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+# asyncio flavour of the Exchange 2010 service. Needs Python 3.7 or later.
+import asyncio
+import logging
+from lxml import etree
+
+from ..base.notification import ALL_EVENT_TYPES
+from ..exceptions import (
+  FailedExchangeException, ExchangeInternalServerTransientErrorException, ExchangeServerBusyException, ExchangeSubscriptionExpiredException,
+  ExchangeStaleChangeKeyException, ExchangeIrresolvableConflictException,
+)
+from . import (
+  Exchange2010Service, Exchange2010CalendarService, Exchange2010CalendarEventList, Exchange2010CalendarEvent,
+  Exchange2010FolderService, Exchange2010Folder, InvalidEventType, DEFAULT_DETAILS_BATCH_SIZE, DEFAULT_DETAILS_RETRIES, DEFAULT_WRITE_BATCH_SIZE,
+  DEFAULT_WRITE_RETRIES, _find_events_request, _next_page_offset,
+)
+from .mail import (
+  Exchange2010MessageService, Exchange2010MessageList, Exchange2010Message, Exchange2010MessageGenerator,
+  Exchange2010Attachment, Exchange2010AttachmentList, DEFAULT_MESSAGES_ORDER, DEFAULT_MESSAGES_PAGE_SIZE,
+)
+from .notifications import (
+  Exchange2010NotificationService, Exchange2010PullSubscription, Exchange2010NotificationListener,
+  DEFAULT_SUBSCRIPTION_TIMEOUT,
+)
+
+from ..batch import ExchangeBatchResult
+from ..compat import BASESTRING_TYPES
+from ..sync import ExchangeSyncResult, DEFAULT_SYNC_MAX_CHANGES
+from ..utils import chunks
+from . import soap_request
+
+log = logging.getLogger("pyexchange")
+
+
+class AsyncExchange2010Service(Exchange2010Service):
+  """
+  An Exchange2010Service whose requests are awaited instead of blocking. ::
+
+      connection = ExchangeAsyncConnection(ExchangeNTLMAuthConnection(url=URL, username=USERNAME, password=PASSWORD))
+      service = AsyncExchange2010Service(connection)
+
+      events = await service.calendar().list_events(start=start, end=end)
+
+  Anything that talks to Exchange is a coroutine. Building new items (``new_event``, ``new_message``,
+  ``new_folder``) doesn't, so those stay plain methods.
+  """
+
+  def calendar(self, id="calendar"):
+    return AsyncExchange2010CalendarService(service=self, calendar_id=id)
+
+  def mail(self):
+    return AsyncExchange2010MessageService(service=self)
+
+  def folder(self):
+    return AsyncExchange2010FolderService(service=self)
+
+  def notifications(self):
+    return AsyncExchange2010NotificationService(service=self)
+
+  async def send(self, xml, headers=None, retries=4, timeout=30, encoding="utf-8", raise_item_errors=True):
+    """ Same as :meth:`ExchangeServiceSOAP.send`, but throttling and back-off wait without blocking the event loop. """
+    request_xml = self._wrap_soap_xml_request(xml)
+    throttle_key = self._throttle_key(xml)
+
+    traced = self.tracer.sample()
+    if traced:
+      self.tracer.trace(u'Request', request_xml)
+
+    attempt = 0
+    while True:
+      await self._wait_for_scheduler(throttle_key)
+      response = await self._send_soap_request(request_xml, headers=headers, retries=self._transport_retries(retries, attempt), timeout=timeout,
+                                               encoding=encoding)
+      if traced:
+        self.tracer.trace(u'Response', response)
+      try:
+        return self._parse(response, encoding=encoding, raise_item_errors=raise_item_errors)
+      except (ExchangeServerBusyException, ExchangeInternalServerTransientErrorException) as err:
+        if attempt >= retries:
+          raise
+        if self._prepare_retry(err, attempt, retries, throttle_key):
+          await self._backoff(attempt)
+
+      attempt += 1
+
+  async def sync_folder_items(self, folder_id, state_store=None, key=None, sync_state=None, max_changes=DEFAULT_SYNC_MAX_CHANGES, delegate_for=None):
+    key = key or self._sync_key(u'items', folder_id, delegate_for)
+    result = ExchangeSyncResult(self._load_sync_state(state_store, key, sync_state))
+
+    done = False
+    while not done:
+      body = soap_request.sync_folder_items(folder_id, sync_state=result.sync_state, max_changes=max_changes, delegate_for=delegate_for)
+      done = self._parse_sync_response(await self.send(body), result)
+
+    self._save_sync_state(state_store, key, result)
+    return result
+
+  async def sync_folder_hierarchy(self, folder_id=u'msgfolderroot', state_store=None, key=None, sync_state=None, delegate_for=None):
+    key = key or self._sync_key(u'folders', folder_id, delegate_for)
+    result = ExchangeSyncResult(self._load_sync_state(state_store, key, sync_state))
+
+    done = False
+    while not done:
+      body = soap_request.sync_folder_hierarchy(folder_id, sync_state=result.sync_state, delegate_for=delegate_for)
+      done = self._parse_sync_response(await self.send(body), result)
+
+    self._save_sync_state(state_store, key, result)
+    return result
+
+  async def _backoff(self, attempt):
+    backoff = getattr(self.connection, 'backoff', None)
+    if backoff is not None:
+      return await backoff(attempt)
+
+    await asyncio.sleep(self._backoff_delay(attempt))
+
+  async def _wait_for_scheduler(self, throttle_key):
+    remaining = self.scheduler.remaining(throttle_key)
+    while remaining > 0:
+      await asyncio.sleep(remaining)
+      remaining = self.scheduler.remaining(throttle_key)
+
+
+class AsyncExchange2010CalendarService(Exchange2010CalendarService):
+
+  def event(self, id=None, **kwargs):
+    if id is not None:
+      raise TypeError(u"Use 'await calendar.get_event(id)' to fetch an existing event.")
+    return AsyncExchange2010CalendarEvent(service=self.service, **kwargs)
+
+  async def get_event(self, id, fields=None):
+    """ Like Exchange2010CalendarService.get_event: with *fields*, only those are fetched and filled in. """
+    if fields:
+      body = soap_request.get_item(exchange_id=id, fields=fields)
+    else:
+      body = soap_request.get_item(exchange_id=id, format=u'AllProperties')
+
+    response_xml = await self.service.send(body)
+    return AsyncExchange2010CalendarEvent(service=self.service, calendar_id=self.calendar_id, xml=response_xml)
+
+  def new_event(self, **properties):
+    return AsyncExchange2010CalendarEvent(service=self.service, calendar_id=self.calendar_id, **properties)
+
+  async def create_events(self, events, batch_size=DEFAULT_WRITE_BATCH_SIZE):
+    """ Like Exchange2010CalendarService.create_events, with every batch sent at once. """
+    result = ExchangeBatchResult()
+    batches = self._batches_to_create(events, batch_size, result)
+    return await self._send_batches(batches, self._create_request, self._take_id_and_change_key, result)
+
+  async def update_events(self, events, calendar_item_update_operation_type=u'SendToAllAndSaveCopy', batch_size=DEFAULT_WRITE_BATCH_SIZE):
+    """ Like Exchange2010CalendarService.update_events, with every batch sent at once. """
+    if calendar_item_update_operation_type not in Exchange2010CalendarEvent.VALID_UPDATE_OPERATION_TYPES:
+      raise ValueError('calendar_item_update_operation_type has unknown value')
+
+    result = ExchangeBatchResult()
+
+    changed_events = []
+    for event in events:
+      try:
+        if not event.id:
+          raise TypeError(u"You can't update an event that hasn't been created yet.")
+        event.validate()
+      except (ValueError, TypeError) as err:
+        result.add_failure(event, err)
+        continue
+
+      if event._dirty_attributes:
+        changed_events.append(event)
+      else:
+        result.add_success(event)
+
+    def update(batch):
+      return soap_request.update_items([(event, event._dirty_attributes) for event in batch], calendar_item_update_operation_type,
+                                       conflict_resolution=self.service.conflict_policy.conflict_resolution)
+
+    return await self._write_in_batches(changed_events, update, self._on_updated, batch_size, result)
+
+  async def cancel_events(self, events, batch_size=DEFAULT_WRITE_BATCH_SIZE):
+    """ Like Exchange2010CalendarService.cancel_events, with every batch sent at once. """
+    result = ExchangeBatchResult()
+    saved_events = self._saved_events(events, u"You can't delete an event that hasn't been created yet.", result)
+
+    return await self._write_in_batches(saved_events, soap_request.delete_events, lambda event, message: None, batch_size, result)
+
+  async def move_events(self, events, folder_id, batch_size=DEFAULT_WRITE_BATCH_SIZE):
+    """ Like Exchange2010CalendarService.move_events, with every batch sent at once. """
+    if not folder_id:
+      raise TypeError(u"You can't move an event to a non-existant folder")
+
+    if not isinstance(folder_id, BASESTRING_TYPES):
+      raise TypeError(u"folder_id must be a string")
+
+    result = ExchangeBatchResult()
+    saved_events = self._saved_events(events, u"You can't move an event that hasn't been created yet.", result)
+
+    def moved(event, message):
+      event._update_from_response_message(message)
+      event.calendar_id = folder_id
+
+    return await self._write_in_batches(saved_events, lambda batch: soap_request.move_items(batch, folder_id), moved, batch_size, result)
+
+  async def _write_in_batches(self, events, build_request, on_success, batch_size, result):
+    policy = self.service.conflict_policy
+    events = await self._refresh_change_keys(events, policy.refresh_before_write, batch_size, result)
+
+    attempt = 0
+    while events:
+      attempt_result = await self._send_batches(chunks(events, batch_size), build_request, on_success, ExchangeBatchResult())
+      stale_events = self._sort_out_conflicts(attempt_result, attempt, result)
+      events = await self._refresh_change_keys(stale_events, True, batch_size, result)
+      attempt += 1
+
+    return result
+
+  async def _refresh_change_keys(self, events, refresh_all, batch_size, result):
+    to_refresh = [event for event in events if refresh_all or not event._change_key]
+    if not to_refresh:
+      return events
+
+    refreshed = await self._send_batches(chunks(to_refresh, batch_size), self._get_change_keys_request, self._take_id_and_change_key, ExchangeBatchResult())
+    for event, error in refreshed.failed:
+      result.add_failure(event, error)
+
+    failed = set(id(event) for event, error in refreshed.failed)
+    return [event for event in events if id(event) not in failed]
+
+  async def _send_batches(self, batches, build_request, on_success, result, retries=DEFAULT_WRITE_RETRIES):
+    async def send(batch):
+      try:
+        return await self.service.send(build_request(batch), raise_item_errors=False)
+      except FailedExchangeException as err:
+        return err
+
+    attempt = 0
+    while batches:
+      responses = await asyncio.gather(*[send(batch) for batch in batches])
+      batches, errors = self._merge_batch_responses(batches, responses, on_success, result, attempt < retries)
+
+      if batches:
+        await self._back_off_before_resending(errors, attempt)
+      attempt += 1
+
+    return result
+
+  async def _back_off_before_resending(self, errors, attempt):
+    back_offs = [error.back_off_milliseconds for error in errors if getattr(error, 'back_off_milliseconds', None) is not None]
+    if back_offs:
+      await asyncio.sleep(max(back_offs) / 1000.0)
+    else:
+      await self.service._backoff(attempt)
+
+  async def list_events(self, start=None, end=None, details=False, delegate_for=None, restriction=None, query_string=None, fields=None):
+    filtered = restriction is not None or query_string
+    if filtered:
+      body = _find_events_request(self.calendar_id, start, end, delegate_for, restriction, query_string, fields, 0)
+    else:
+      body = soap_request.get_calendar_items(format=u'AllProperties', calendar_id=self.calendar_id, start=start, end=end, delegate_for=delegate_for, fields=fields)
+    response_xml = await self.service.send(body)
+
+    event_list = AsyncExchange2010CalendarEventList(
+      service=self.service, calendar_id=self.calendar_id, start=start, end=end, delegate_for=delegate_for, xml=response_xml, query_string=query_string,
+    )
+    if filtered:
+      await event_list._find_all_events(self.calendar_id, restriction, query_string, fields, offset=_next_page_offset(response_xml, 0))
+    if details:
+      event_list.details = True
+      await event_list.load_all_details()
+
+    return event_list
+
+
+class AsyncExchange2010CalendarEventList(Exchange2010CalendarEventList):
+
+  def _build_event(self, xml):
+    return AsyncExchange2010CalendarEvent(service=self.service, xml=xml)
+
+  async def load_all_details(self, batch_size=DEFAULT_DETAILS_BATCH_SIZE, retries=DEFAULT_DETAILS_RETRIES):
+    """ Like Exchange2010CalendarEventList.load_all_details, with every batch requested at once. """
+    indexes = list(range(len(self.events)))
+
+    attempt = 0
+    while indexes:
+      batches = chunks(indexes, batch_size)
+      responses = await asyncio.gather(*[self._get_event_details(batch) for batch in batches])
+      indexes = self._merge_event_details(batches, responses, attempt < retries)
+
+      if indexes:
+        await self.service._backoff(attempt)
+      attempt += 1
+
+    return self
+
+  async def _find_all_events(self, calendar_id, restriction, query_string, fields, offset=0):
+    while offset is not None:
+      response = await self.service.send(_find_events_request(calendar_id, self.start, self.end, self.delegate_for, restriction, query_string, fields, offset))
+      self._add_page(response, query_string)
+      offset = _next_page_offset(response, offset)
+
+  async def _get_event_details(self, indexes):
+    body = soap_request.get_item(exchange_id=[self.event_ids[index] for index in indexes], format=u'AllProperties')
+    try:
+      return await self.service.send(body, raise_item_errors=False)
+    except FailedExchangeException as err:
+      return err
+
+
+class AsyncExchange2010CalendarEvent(Exchange2010CalendarEvent):
+
+  def _init_from_service(self, id):
+    raise TypeError(u"Use 'await calendar.get_event(id)' to fetch an existing event.")
+
+  async def create(self):
+    self.validate()
+    body = soap_request.new_event(self)
+
+    response_xml = await self.service.send(body)
+    self._id, self._change_key = self._parse_id_and_change_key_from_response(response_xml)
+
+    return self
+
+  async def resend_invitations(self):
+    if not self.id:
+      raise TypeError(u"You can't send invites for an event that hasn't been created yet.")
+
+    if self._dirty_attributes:
+      raise ValueError(u"There are unsaved changes to this invite - please update it first: %r" % self._dirty_attributes)
+
+    response_xml = await self._write(lambda: soap_request.update_item(self, [], calendar_item_update_operation_type=u'SendOnlyToAll',
+                                                                      conflict_resolution=self.service.conflict_policy.conflict_resolution))
+    self._update_change_key_from_response(response_xml)
+
+    return self
+
+  async def update(self, calendar_item_update_operation_type=u'SendToAllAndSaveCopy', **kwargs):
+    if not self.id:
+      raise TypeError(u"You can't update an event that hasn't been created yet.")
+
+    calendar_item_update_operation_type = self._check_update_operation_type(calendar_item_update_operation_type, **kwargs)
+
+    self.validate()
+
+    if self._dirty_attributes:
+      log.debug(u"Updating these attributes: %r", self._dirty_attributes)
+
+      response_xml = await self._write(lambda: soap_request.update_item(self, self._dirty_attributes, calendar_item_update_operation_type=calendar_item_update_operation_type,
+                                                                        conflict_resolution=self.service.conflict_policy.conflict_resolution))
+      self._update_change_key_from_response(response_xml)
+      self._reset_dirty_attributes()
+    else:
+      log.info(u"Update was called, but there's nothing to update. Doing nothing.")
+
+    return self
+
+  async def cancel(self):
+    if not self.id:
+      raise TypeError(u"You can't delete an event that hasn't been created yet.")
+
+    await self._write(lambda: soap_request.delete_event(self))
+    return None
+
+  async def move_to(self, folder_id):
+    self._check_move_to(folder_id)
+
+    response_xml = await self._write(lambda: soap_request.move_event(self, folder_id))
+    return self._update_from_move_response(response_xml, folder_id)
+
+  async def _write(self, build_request):
+    policy = self.service.conflict_policy
+    if policy.refresh_before_write or not self._change_key:
+      await self.refresh_change_key()
+
+    attempt = 0
+    while True:
+      try:
+        return await self.service.send(build_request())
+      except (ExchangeStaleChangeKeyException, ExchangeIrresolvableConflictException) as err:
+        if not policy.should_retry(err, attempt):
+          raise
+        log.info(u'Change key for %s is out of date, fetching it again: %s', self._id, err)
+        await self.refresh_change_key()
+
+      attempt += 1
+
+  async def get_master(self):
+    if self.type != 'Occurrence':
+      raise InvalidEventType("get_master method can only be called on a 'Occurrence' event type")
+
+    body = soap_request.get_master(exchange_id=self._id, format=u"AllProperties")
+    response_xml = await self.service.send(body)
+
+    return AsyncExchange2010CalendarEvent(service=self.service, xml=response_xml)
+
+  async def get_occurrence(self, instance_index):
+    self._check_get_occurrence(instance_index)
+
+    body = soap_request.get_occurrence(exchange_id=self._id, instance_index=instance_index, format=u"AllProperties")
+    response_xml = await self.service.send(body)
+
+    return self._parse_events_from_get_item_response(response_xml)
+
+  async def conflicting_events(self):
+    if not self.conflicting_event_ids:
+      return []
+
+    body = soap_request.get_item(exchange_id=self.conflicting_event_ids, format="AllProperties")
+    response_xml = await self.service.send(body)
+
+    return self._parse_events_from_get_item_response(response_xml)
+
+  async def refresh_change_key(self):
+    body = soap_request.get_item(exchange_id=self._id, format=u"IdOnly")
+    response_xml = await self.service.send(body)
+    self._id, self._change_key = self._parse_id_and_change_key_from_response(response_xml)
+
+    return self
+
+
+class AsyncExchange2010MessageService(Exchange2010MessageService):
+
+  async def list_messages(self, folder_id, delegate_for=None, order_by=None, restriction=None, query_string=None, fields=None):
+    request = soap_request.get_message_items(format=u'AllProperties', folder_id=folder_id, delegate_for=delegate_for, order_by=order_by,
+                                             restriction=restriction, query_string=query_string, fields=fields)
+    response = await self.service.send(request)
+    return AsyncExchange2010MessageList(service=self.service, folder_id=folder_id, delegate_for=delegate_for, xml=response, fields=fields)
+
+  def list_messages_batch(self, folder_id, max_entries=DEFAULT_MESSAGES_PAGE_SIZE, delegate_for=None, order_by=DEFAULT_MESSAGES_ORDER, restriction=None, query_string=None,
+                          fields=None):
+    """
+    Returns an :class:`AsyncExchange2010MessageGenerator` that lists the messages in a folder *max_entries* at a
+    time. To list several folders at once, iterate over a generator for each of them concurrently.
+    """
+    return AsyncExchange2010MessageGenerator(service=self.service, folder_id=folder_id, page_size=max_entries, delegate_for=delegate_for, order_by=order_by,
+                                             restriction=restriction, query_string=query_string, fields=fields)
+
+  async def get_message(self, id, fields=None):
+    request = soap_request.get_message(exchange_id=id, format=u'AllProperties', fields=fields)
+    response = await self.service.send(request)
+
+    message = AsyncExchange2010Message(service=self.service, fields=fields)
+    return message._init_from_xml(message._parse_message_from_get_item_response(response, id))
+
+  def new_message(self, **kwargs):
+    return AsyncExchange2010Message(service=self.service, **kwargs)
+
+
+class AsyncExchange2010MessageList(Exchange2010MessageList):
+
+  def _add_message(self, xml):
+    self._messages.append(AsyncExchange2010Message(service=self.service, xml=xml, fields=self._fields))
+    return self
+
+  async def send(self):
+    await self.service.send(soap_request.send_messages(messages=self._messages))
+    return self
+
+  async def copy(self, folder_id):
+    await self.service.send(soap_request.copy_messages(messages=self._messages, folder_id=folder_id))
+    return await self.service.mail().list_messages(folder_id=folder_id)
+
+
+class AsyncExchange2010MessageGenerator(Exchange2010MessageGenerator):
+  """
+  Exchange2010MessageGenerator as an async iterator. ::
+
+      async for message in service.mail().list_messages_batch(folder_id=u'inbox', max_entries=200):
+        print(message.subject)
+  """
+
+  def __iter__(self):
+    raise TypeError(u"Use 'async for' to list messages on the async service.")
+
+  def __aiter__(self):
+    return self._aiter_from(0)
+
+  async def _aiter_from(self, offset):
+    while True:
+      items, next_offset, done = self._parse_page(await self._fetch_page(offset))
+
+      for item in items:
+        yield self._build_message(item)
+
+      # A page that makes no progress would have us asking for it forever
+      if done or not items or next_offset is None or next_offset <= offset:
+        return
+
+      offset = next_offset
+
+  def _build_message(self, xml):
+    return AsyncExchange2010Message(service=self.service, xml=xml, fields=self.fields)
+
+
+class AsyncExchange2010Attachment(Exchange2010Attachment):
+  """
+  An attachment on the async service. Its content isn't fetched when it's read - ``await attachment.load()``
+  fetches it.
+  """
+
+  def _init_from_service(self, id):
+    raise TypeError(u"Use 'await attachment.load()' to fetch an attachment.")
+
+  async def load(self):
+    response = await self.service.send(soap_request.get_attachment(self.id))
+    self._update_properties(self._parse_info_from_attachment_xml(self._parse_attachment_from_response(response)))
+
+    return self
+
+  @property
+  def content_type(self):
+    return self._content_type
+
+  @content_type.setter
+  def content_type(self, value):
+    self._content_type = value
+
+  @property
+  def content(self):
+    return self._content
+
+  @content.setter
+  def content(self, value):
+    self._content = value
+
+
+class AsyncExchange2010AttachmentList(Exchange2010AttachmentList):
+
+  _attachment_class = AsyncExchange2010Attachment
+
+
+class AsyncExchange2010Message(Exchange2010Message):
+  """
+  Messages from the async service come fully loaded, so unlike Exchange2010Message none of the recipient or
+  attachment properties go back to Exchange when read. Ones left out by *fields* are just empty.
+  """
+
+  _loads_missing_properties = False
+
+  _attachment_list_class = AsyncExchange2010AttachmentList
+
+  def _init_from_service(self, id):
+    raise TypeError(u"Use 'await mail.get_message(id)' to fetch an existing message.")
+
+  def _init_from_mime_content(self, mime, folder_id, character_set):
+    raise TypeError(u"Creating messages from MIME content isn't available on the async service yet.")
+
+  async def create(self):
+    self.validate()
+
+    response = await self.service.send(soap_request.new_message_save_only(message=self))
+
+    message = response.xpath('//m:CreateItemResponseMessage/m:Items/t:Message', namespaces=soap_request.NAMESPACES)[0]
+    self._id, self._change_key = self._parse_id_and_change_key(message)
+
+    return self
+
+  async def delete(self):
+    await self.service.send(soap_request.delete_message(message=self))
+
+  async def send(self):
+    await self.service.send(soap_request.send_message(message=self))
+    return self
+
+  async def copy(self, folder_id):
+    await self.service.send(soap_request.copy_message(message=self, folder_id=folder_id))
+    return self
+
+  async def move(self, folder_id):
+    response = await self.service.send(soap_request.move_item(item=self, folder_id=folder_id))
+
+    # MoveItem hands back the message's new id, which we need to look it up again
+    moved = response.xpath(u'//m:MoveItemResponseMessage/m:Items/t:Message', namespaces=soap_request.NAMESPACES)
+    if moved:
+      self._id, self._change_key = self._parse_id_and_change_key(moved[0])
+
+    message = await self._fetch_message_from_service(self.id)
+    self._id, self._change_key = self._parse_id_and_change_key(message)
+    self._parent_folder_id, self._parent_folder_change_key = self._parse_parent_id_and_change_key(message)
+
+    return self
+
+  async def create_attachment(self, name, content):
+    response = await self.service.send(soap_request.new_attachment(item=self, name=name, content=content))
+
+    attachment = AsyncExchange2010Attachment(service=self.service)
+    attachment._update_properties({u'id': self._parse_attachment_id(response), u'name': name, u'content': content})
+
+    await self.refresh_id_and_change_key()
+
+    return attachment
+
+  async def refresh_id_and_change_key(self):
+    message = await self._fetch_message_from_service(self.id)
+    self._id, self._change_key = self._parse_id_and_change_key(message)
+
+    return self
+
+  async def refresh_parent_folder(self):
+    message = await self._fetch_message_from_service(self.id)
+    self._parent_folder_id, self._parent_folder_change_key = self._parse_parent_id_and_change_key(message)
+
+    return self
+
+  async def _fetch_message_from_service(self, id):
+    request = soap_request.get_message(exchange_id=id, format=u'AllProperties')
+    response = await self.service.send(request)
+
+    return self._parse_message_from_get_item_response(response, id)
+
+
+class AsyncExchange2010FolderService(Exchange2010FolderService):
+
+  def folder(self, id=None, **kwargs):
+    if id is not None:
+      raise TypeError(u"Use 'await folder_service.get_folder(id)' to fetch an existing folder.")
+    return AsyncExchange2010Folder(service=self.service, **kwargs)
+
+  async def get_folder(self, id, fields=None):
+    body = soap_request.get_folder(folder_id=id, format=u'AllProperties', fields=fields)
+    response_xml = await self.service.send(body)
+    return AsyncExchange2010Folder(service=self.service, xml=response_xml)
+
+  def new_folder(self, **properties):
+    return AsyncExchange2010Folder(service=self.service, **properties)
+
+  async def find_folder(self, parent_id):
+    body = soap_request.find_folder(parent_id=parent_id, format=u'AllProperties')
+    response_xml = await self.service.send(body)
+    return self._parse_response_for_find_folder(response_xml)
+
+  def _parse_response_for_find_folder(self, response):
+    folders = response.xpath(u'//t:Folders/t:*', namespaces=soap_request.NAMESPACES)
+    return [AsyncExchange2010Folder(service=self.service, xml=etree.fromstring(etree.tostring(folder))) for folder in folders]
+
+
+class AsyncExchange2010Folder(Exchange2010Folder):
+
+  def _init_from_service(self, id):
+    raise TypeError(u"Use 'await folder_service.get_folder(id)' to fetch an existing folder.")
+
+  async def create(self):
+    self.validate()
+    body = soap_request.new_folder(self)
+
+    response_xml = await self.service.send(body)
+    self._id, self._change_key = self._parse_id_and_change_key_from_response(response_xml)
+
+    return self
+
+  async def delete(self):
+    if not self.id:
+      raise TypeError(u"You can't delete a folder that hasn't been created yet.")
+
+    await self.service.send(soap_request.delete_folder(self))
+    self._id = None
+    self._change_key = None
+
+    return None
+
+  async def move_to(self, folder_id):
+    self._check_move_to(folder_id)
+
+    response_xml = await self.service.send(soap_request.move_folder(self, folder_id))
+    return self._update_from_move_response(response_xml, folder_id)
+
+
+class AsyncExchange2010NotificationService(Exchange2010NotificationService):
+  """
+  Pull subscriptions only - streaming needs a connection that hands out the response as it comes in, and the
+  async connection doesn't do that.
+  """
+
+  async def subscribe(self, folder_ids, event_types=ALL_EVENT_TYPES, watermark=None, timeout=DEFAULT_SUBSCRIPTION_TIMEOUT, delegate_for=None):
+    body = soap_request.subscribe_pull(folder_ids, event_types, watermark=watermark, timeout=timeout, delegate_for=delegate_for)
+    response_xml = await self.service.send(body)
+    id, watermark = self._parse_response_for_subscribe(response_xml)
+
+    return AsyncExchange2010PullSubscription(service=self.service, id=id, watermark=watermark)
+
+  def listen(self, folder_ids, event_types=ALL_EVENT_TYPES, delegate_for=None, **kwargs):
+    """
+    Returns an async iterator over the events in *folder_ids*. ::
+
+        async for event in service.notifications().listen([u'inbox']):
+          print(event.event_type, event.item_id)
+    """
+    return AsyncExchange2010NotificationListener(self, folder_ids, event_types, delegate_for=delegate_for, **kwargs)
+
+
+class AsyncExchange2010PullSubscription(Exchange2010PullSubscription):
+
+  async def unsubscribe(self):
+    await self.service.send(soap_request.unsubscribe(self.id))
+
+  async def get_events(self):
+    events = []
+    watermark = self.watermark
+
+    more_events = True
+    while more_events:
+      response_xml = await self.service.send(soap_request.get_events(self.id, watermark))
+      new_events, watermark, more_events = self._parse_response_for_get_events(response_xml, watermark)
+      events.extend(new_events)
+
+    self.watermark = watermark
+    return events
+
+
+class AsyncExchange2010NotificationListener(Exchange2010NotificationListener):
+  """ Exchange2010NotificationListener as an async iterator, with :meth:`run` and :meth:`close` as coroutines. """
+
+  def __init__(self, notifications, folder_ids, event_types=ALL_EVENT_TYPES, delegate_for=None, **kwargs):
+    super(AsyncExchange2010NotificationListener, self).__init__(notifications, folder_ids, event_types, delegate_for=delegate_for, **kwargs)
+    self._pending = []
+    self._polled = False
+    self._expiries = 0
+
+  def __iter__(self):
+    raise TypeError(u"Use 'async for' to listen on the async service.")
+
+  def __aiter__(self):
+    return self
+
+  async def __anext__(self):
+    failures = 0
+
+    while not self._pending:
+      if self._stopped.is_set():
+        raise StopAsyncIteration
+
+      try:
+        # poll_interval is the gap between polls, so only wait after the first one
+        if self._polled:
+          await asyncio.sleep(self.poll_interval)
+        if self.subscription is None:
+          self.subscription = await self._subscribe(watermark=self._resume_from)
+
+        self._polled = True
+        self._pending = await self.subscription.get_events()
+        failures = self._expiries = 0
+      except ExchangeSubscriptionExpiredException as err:
+        self._drop_subscription()
+        self._polled = False
+        if self._expiries >= self.max_failures:
+          raise
+        log.info(u'Notification subscription expired, subscribing again (attempt %d of %d): %s', self._expiries + 1, self.max_failures, err)
+        if self._expiries:
+          await self.notifications.service._backoff(self._expiries - 1)
+        self._expiries += 1
+      except FailedExchangeException as err:
+        if failures >= self.max_failures:
+          raise
+        log.warning(u'Lost touch with Exchange while listening for notifications (attempt %d of %d): %s', failures + 1, self.max_failures, err)
+        await self.notifications.service._backoff(failures)
+        failures += 1
+        self._polled = False
+
+    return self._pending.pop(0)
+
+  def _subscribe(self, watermark=None):
+    return self.notifications.subscribe(self.folder_ids, self.event_types, watermark=watermark, timeout=self.timeout, delegate_for=self.delegate_for)
+
+  async def run(self, callback):
+    """ Awaits *callback* with each event if it's a coroutine function, or just calls it if it isn't. """
+    async for event in self:
+      result = callback(event)
+      if asyncio.iscoroutine(result):
+        await result
+
+  async def close(self):
+    self.stop()
+
+    if self.subscription is not None:
+      try:
+        await self.subscription.unsubscribe()
+      except FailedExchangeException as err:
+        log.info(u'Unable to unsubscribe, the subscription will expire by itself: %s', err)
+      self.subscription = None
@@ -1,4 +1,6 @@
 import logging
+from collections import deque
+from multiprocessing.pool import ThreadPool
 from lxml import etree
 
 from ..base.message import (
@@ -7,6 +9,8 @@ from ..base.message import (
   ExchangeAttachment, ExchangeAttachmentList,
 )
 
+from ..base.soap import CompiledPropertyMap, MAX_COMPILED_PROPERTY_MAPS
+from ..sync import DEFAULT_SYNC_MAX_CHANGES
 from ..utils import auto_build_dict_from_xml
 
 from . import soap_request
@@ -15,17 +19,71 @@ log = logging.getLogger('pyexchange')
 
 SEQUENCE_TYPES = (list, set, tuple, frozenset)
 
+# list_messages_batch asks for this many messages per request
+DEFAULT_MESSAGES_PAGE_SIZE = 100
 
-class Exchange2010MessageService(BaseExchangeMessageService):
+# Paged listings come newest first, the way mail clients show a folder. A fixed order also keeps pages from
+# shuffling between requests. list_messages leaves the order to Exchange unless asked.
+DEFAULT_MESSAGES_ORDER = [(u'item:DateTimeReceived', u'Descending')]
 
-  def list_messages(self, folder_id, delegate_for=None):
-    return Exchange2010MessageList(service=self.service, folder_id=folder_id, delegate_for=delegate_for)
 
-  def list_messages_batch(self, folder_id, max_entries=100, delegate_for=None):
-    return Exchange2010MessageGenerator(service=self.service, folder_id=folder_id, max_entries=max_entries, delegate_for=delegate_for)
+class Exchange2010MessageService(BaseExchangeMessageService):
 
-  def get_message(self, id):
-    return Exchange2010Message(service=self.service, id=id)
+  def list_messages(self, folder_id, delegate_for=None, stream=False, order_by=None, restriction=None, query_string=None, fields=None):
+    """
+    Lists the messages in a folder. With ``stream=True`` you get a generator that hands out each message as soon
+    as it has been read from the response, so big folders are listed in constant memory.
+
+    With *order_by* - a FieldURI, or a list of ``(FieldURI, u'Ascending' or u'Descending')`` pairs - Exchange
+    sorts them; otherwise they come in whatever order the folder is in.
+
+    Only the messages matching *restriction* (see :mod:`pyexchange.restriction`) or *query_string* (an AQS
+    search, like ``u'from:alice subject:invoice'``) come back - Exchange won't take both at once. Exchange does
+    the filtering, so only those go over the wire. AQS needs a server that supports it.
+
+    With *fields* - FieldURIs, like ``[u'item:Subject', u'item:DateTimeReceived']`` - only those come back, rather
+    than every property of every message. See :class:`Exchange2010Message`.
+    """
+    if stream:
+      return self._stream_messages(folder_id, delegate_for, order_by, restriction, query_string, fields)
+
+    return Exchange2010MessageList(service=self.service, folder_id=folder_id, delegate_for=delegate_for, order_by=order_by, restriction=restriction, query_string=query_string,
+                                   fields=fields)
+
+  def _stream_messages(self, folder_id, delegate_for, order_by, restriction, query_string, fields):
+    request = soap_request.get_message_items(format=u'AllProperties', folder_id=folder_id, delegate_for=delegate_for, order_by=order_by, restriction=restriction, query_string=query_string,
+                                             fields=fields)
+
+    for item in self.service.send_streaming(request, u'{%s}Message' % soap_request.TYPE_NS):
+      yield Exchange2010Message(service=self.service, xml=item, fields=fields)
+
+  def sync(self, folder_id, state_store=None, key=None, sync_state=None, max_changes=DEFAULT_SYNC_MAX_CHANGES, delegate_for=None):
+    """
+    Returns the ids of the messages created, updated (including read or unread) and deleted in a folder since the
+    last sync. See :meth:`Exchange2010Service.sync_folder_items`.
+    """
+    return self.service.sync_folder_items(folder_id, state_store=state_store, key=key, sync_state=sync_state, max_changes=max_changes, delegate_for=delegate_for)
+
+  def list_messages_batch(self, folder_id, max_entries=DEFAULT_MESSAGES_PAGE_SIZE, delegate_for=None, prefetch=None, order_by=DEFAULT_MESSAGES_ORDER, restriction=None, query_string=None,
+                          fields=None):
+    """
+    Returns an :class:`Exchange2010MessageGenerator` that lists the messages in a folder *max_entries* at a
+    time, as you iterate over it, sorted, filtered and trimmed to *fields* as in :meth:`list_messages`. Unlike
+    there, they're sorted newest first unless you say otherwise (``None`` for folder order), so the pages hold
+    still between requests.
+
+    With *prefetch*, up to that many pages are fetched at once ahead of where you've got to - see
+    :class:`Exchange2010PrefetchingMessageGenerator`.
+    """
+    if prefetch is not None and prefetch > 1:
+      return Exchange2010PrefetchingMessageGenerator(service=self.service, folder_id=folder_id, page_size=max_entries, delegate_for=delegate_for, order_by=order_by,
+                                                     restriction=restriction, query_string=query_string, fields=fields, pages_in_flight=prefetch)
+
+    return Exchange2010MessageGenerator(service=self.service, folder_id=folder_id, page_size=max_entries, delegate_for=delegate_for, order_by=order_by,
+                                        restriction=restriction, query_string=query_string, fields=fields)
+
+  def get_message(self, id, fields=None):
+    return Exchange2010Message(service=self.service, id=id, fields=fields)
 
   def new_message(self, **kwargs):
     return Exchange2010Message(service=self.service, **kwargs)
@@ -33,6 +91,12 @@ class Exchange2010MessageService(BaseExchangeMessageService):
 
 class Exchange2010MailboxTarget(ExchangeMailboxTarget):
 
+  MAILBOX_PROPERTIES = CompiledPropertyMap({
+    u'name': {u'xpath': u'./t:Name'},
+    u'email_address': {u'xpath': u'./t:EmailAddress'},
+    u'routing_type': {u'xpath': u'./t:RoutingType'},
+  }, namespace_map=soap_request.NAMESPACES)
+
   def _init_from_xml(self, xml):
     parsed = self._parse_info_from_mailbox_xml(xml)
     self._init_from_props(**parsed)
@@ -43,19 +107,7 @@ class Exchange2010MailboxTarget(ExchangeMailboxTarget):
     self.routing_type = routing_type
 
   def _parse_info_from_mailbox_xml(self, xml):
-    
-    property_map = {
-      u'name': {
-        u'xpath': u'./t:Name'
-      },
-      u'email_address': {
-        u'xpath': u'./t:EmailAddress'
-      },
-      u'routing_type': {
-        u'xpath': u'./t:RoutingType'
-      }
-    }
-    return self.service._xpath_to_dict(element=xml, property_map=property_map, namespace_map=soap_request.NAMESPACES)
+    return self.service._xpath_to_dict(element=xml, property_map=self.MAILBOX_PROPERTIES, namespace_map=soap_request.NAMESPACES)
 
 
 class Exchange2010MailboxTargetList(ExchangeMailboxTargetList):
@@ -80,6 +132,12 @@ class Exchange2010MailboxTargetList(ExchangeMailboxTargetList):
 
 
 class Exchange2010Attachment(ExchangeAttachment):
+
+  ATTACHMENT_PROPERTIES = CompiledPropertyMap({
+    u'name': {u'xpath': u'./t:Name'},
+    u'content_type': {u'xpath': u'./t:ContentType'},
+    u'content': {u'xpath': u'./t:Content'},
+  }, namespace_map=soap_request.NAMESPACES)
   
   def _init_from_xml(self, xml):
     properties = self._parse_info_from_attachment_xml(xml)
@@ -97,21 +155,13 @@ class Exchange2010Attachment(ExchangeAttachment):
   def _fetch_from_service(self, id):
     request = soap_request.get_attachment(id)
     response = self.service.send(request)
+    return self._parse_attachment_from_response(response)
+
+  def _parse_attachment_from_response(self, response):
     return response.xpath('//m:GetAttachmentResponseMessage/m:Attachments/t:FileAttachment', namespaces=soap_request.NAMESPACES)[0]
 
   def _parse_info_from_attachment_xml(self, xml):
-    property_map = {
-      u'name': {
-        u'xpath': u'./t:Name',
-      },
-      u'content_type': {
-        u'xpath': u'./t:ContentType',
-      },
-      u'content': {
-        u'xpath': u'./t:Content',
-      }
-    }    
-    properties = self.service._xpath_to_dict(element=xml, property_map=property_map, namespace_map=soap_request.NAMESPACES)
+    properties = self.service._xpath_to_dict(element=xml, property_map=self.ATTACHMENT_PROPERTIES, namespace_map=soap_request.NAMESPACES)
     id = xml.xpath('./t:AttachmentId', namespaces=soap_request.NAMESPACES)
 
     if len(id):
@@ -145,23 +195,64 @@ class Exchange2010Attachment(ExchangeAttachment):
 
 
 class Exchange2010AttachmentList(ExchangeAttachmentList):
+
+  _attachment_class = Exchange2010Attachment
+
   def _parse_attachments_from_xml(self, xml):
     for attachment in xml.getchildren():
       self._add_attachment(xml=attachment)
 
   def _add_attachment(self, xml):
-    new_attachment = Exchange2010Attachment(service=self.service, xml=xml)
+    new_attachment = self._attachment_class(service=self.service, xml=xml)
     self._attachments.append(new_attachment)
     return new_attachment
     
 
 
 class Exchange2010Message(BaseExchangeMessage):
-  
+  """
+  A message. With *fields* (a list of FieldURIs, like ``item:Subject``), only those are fetched and filled in;
+  recipients, the body and attachments that weren't asked for are fetched the first time they're read.
+  """
+
+  _fields = None
+
+  # Whether recipients, body and attachments left out by *fields* get fetched when they're read
+  _loads_missing_properties = True
+
+  _attachment_list_class = Exchange2010AttachmentList
+
+  # Everything on a message that isn't parsed on its own above - the ids, body, recipients and attachments - is
+  # picked up as a property named after its tag. These are the ones that aren't just text.
+  MESSAGE_PROPERTY_CASTS = {
+    u'date_time_received': u'datetime',
+    u'size': u'int',
+    u'is_submitted': u'bool',
+    u'is_draft': u'bool',
+    u'is_from_me': u'bool',
+    u'is_resend': u'bool',
+    u'is_unmodified': u'bool',
+    u'date_time_sent': u'datetime',
+    u'date_time_created': u'datetime',
+    u'has_attachments': u'bool',
+    u'is_read_receipt_requested': u'bool',
+    u'is_read': u'bool',
+  }
+
+  # Messages from the same listing have the same tags, so their property maps are compiled once per set of tags
+  _property_maps = {}
+
+  def __init__(self, service, id=None, xml=None, fields=None, **kwargs):
+    self._fields = fields
+    super(Exchange2010Message, self).__init__(service, id=id, xml=xml, **kwargs)
+
   def _init_from_service(self, id):
     log.debug(u'Creating new Exchange2010CalendarEvent object from ID')
-  
-    message = self._fetch_message_from_service(id)
+
+    if self._fields:
+      message = self._parse_message_from_get_item_response(self.service.send(soap_request.get_message(exchange_id=id, fields=self._fields)), id)
+    else:
+      message = self._fetch_message_from_service(id)
 
     return self._init_from_xml(message)
 
@@ -171,19 +262,29 @@ class Exchange2010Message(BaseExchangeMessage):
     self.xml = xml
 
     self._id, self._change_key = self._parse_id_and_change_key(xml)
-    self.body = self._parse_body_content_and_type(xml)
-    self.to_recipients = self._parse_to_recipients(xml)
-    self.cc_recipients = self._parse_cc_recipients(xml)
-    self.reply_to = self._parse_reply_to(xml)
-    self.attachments = self._parse_attachments(xml)
     self._parent_folder_id, self._parent_folder_change_key = self._parse_parent_id_and_change_key(xml)
-    self.sender = self._parse_sender(xml)
-    self.from_ = self._parse_from(xml)
+
+    for name, parse in (
+      (u'body', self._parse_body_content_and_type),
+      (u'to_recipients', self._parse_to_recipients),
+      (u'cc_recipients', self._parse_cc_recipients),
+      (u'reply_to', self._parse_reply_to),
+      (u'attachments', self._parse_attachments),
+      (u'sender', self._parse_sender),
+      (u'from_', self._parse_from),
+    ):
+      element = parse(xml)
+
+      # Left out of a projection - leave it unset, so it's fetched if it's ever read
+      if element is None and self._fields and self._loads_missing_properties:
+        continue
+
+      setattr(self, name, element)
 
     properties = self._parse_response_for_other_props(xml)
     self._update_properties(properties)
 
-    log.debug(u'Created new message object with ID: %s' % self._id)
+    log.debug(u'Created new message object with ID: %s', self._id)
     self._reset_dirty_attributes()
 
     return self
@@ -240,30 +341,24 @@ class Exchange2010Message(BaseExchangeMessage):
     return self._pop_element(xml, u'./t:Attachments')
 
   def _parse_response_for_other_props(self, xml):
+    return self.service._xpath_to_dict(element=xml, property_map=self._property_map_for(xml), namespace_map=soap_request.NAMESPACES)
 
-    property_map = auto_build_dict_from_xml(xml)
-
-    # this is tedious, but is a lot simpler than a deep merge of two dicts
-    typecast_map = {
-      u'date_time_received': u'datetime',
-      u'size': u'int',
-      u'is_submitted': u'bool',
-      u'is_draft': u'bool',
-      u'is_from_me': u'bool',
-      u'is_resend': u'bool',
-      u'is_unmodified': u'bool',
-      u'date_time_sent': u'datetime',
-      u'date_time_created': u'datetime',
-      u'has_attachments': u'bool',
-      u'is_read_receipt_requested': u'bool',
-      u'is_read': u'bool'
-    }
-
-    for prop in property_map:
-      if prop in typecast_map:
-        property_map[prop][u'cast'] = typecast_map[prop]
-
-    return self.service._xpath_to_dict(element=xml, property_map=property_map, namespace_map=soap_request.NAMESPACES)
+  @classmethod
+  def _property_map_for(cls, xml):
+    tags = tuple(child.tag for child in xml)
+    compiled = cls._property_maps.get(tags)
+
+    if compiled is None:
+      property_map = auto_build_dict_from_xml(xml, namespace_map=soap_request.NAMESPACES)
+      for prop in property_map:
+        if prop in cls.MESSAGE_PROPERTY_CASTS:
+          property_map[prop][u'cast'] = cls.MESSAGE_PROPERTY_CASTS[prop]
+
+      if len(cls._property_maps) >= MAX_COMPILED_PROPERTY_MAPS:
+        cls._property_maps.clear()
+      compiled = cls._property_maps[tags] = CompiledPropertyMap(property_map, soap_request.NAMESPACES)
+
+    return compiled
 
   def create(self):
     self.validate()
@@ -273,7 +368,7 @@ class Exchange2010Message(BaseExchangeMessage):
     response = self.service.send(request)
 
     message = response.xpath('//m:CreateItemResponseMessage/m:Items/t:Message', namespaces=soap_request.NAMESPACES)[0]
-    self._id, self._changekey = self._parse_id_and_change_key(message)
+    self._id, self._change_key = self._parse_id_and_change_key(message)
 
     return self
 
@@ -315,7 +410,7 @@ class Exchange2010Message(BaseExchangeMessage):
     return self
 
   def move(self, folder_id):
-    request = soap_request.move_item(id=self, folder_id=folder_id)
+    request = soap_request.move_item(item=self, folder_id=folder_id)
     response = self.service.send(request)
 
     self.refresh_parent_folder()
@@ -326,12 +421,15 @@ class Exchange2010Message(BaseExchangeMessage):
   def create_attachment(self, name, content):
     request = soap_request.new_attachment(item=self, name=name, content=content)
     response = self.service.send(request)
-    id= response.xpath('//m:CreateAttachmentResponseMessage/m:Attachments/t:FileAttachment/t:AttachmentId', namespaces=soap_request.NAMESPACES)[0].attrib['Id']
+    id = self._parse_attachment_id(response)
 
     self.refresh_id_and_change_key()
     
     return Exchange2010Attachment(service=self.service, id=id)
 
+  def _parse_attachment_id(self, response):
+    return response.xpath('//m:CreateAttachmentResponseMessage/m:Attachments/t:FileAttachment/t:AttachmentId', namespaces=soap_request.NAMESPACES)[0].attrib['Id']
+
   @property
   def to_recipients(self):
     if self._to_recipients is None:
@@ -426,7 +524,7 @@ class Exchange2010Message(BaseExchangeMessage):
   
   @attachments.setter
   def attachments(self, value):
-    self._attachments = Exchange2010AttachmentList(service=self.service, xml=value)
+    self._attachments = self._attachment_list_class(service=self.service, xml=value)
 
   def refresh_id_and_change_key(self):
     message = self._fetch_message_from_service(self.id)
@@ -443,7 +541,10 @@ class Exchange2010Message(BaseExchangeMessage):
   def _fetch_message_from_service(self, id):
     request = soap_request.get_message(exchange_id=id, format=u'AllProperties')
     response = self.service.send(request)
-    
+
+    return self._parse_message_from_get_item_response(response, id)
+
+  def _parse_message_from_get_item_response(self, response, id):
     items = response.xpath(u'//m:GetItemResponseMessage/m:Items/t:Message', namespaces=soap_request.NAMESPACES)  
     
     if items:
@@ -462,24 +563,23 @@ class Exchange2010Message(BaseExchangeMessage):
 
 class Exchange2010MessageList(BaseExchangeMessageList):
 
-  def _fetch_message_items(self, folder_id, delegate_for):
-    request = soap_request.get_message_items(format=u'AllProperties', folder_id=folder_id, delegate_for=delegate_for)
+  def __init__(self, service, folder_id, delegate_for=None, xml=None, fields=None, **kwargs):
+    self._fields = fields
+    super(Exchange2010MessageList, self).__init__(service, folder_id, delegate_for=delegate_for, xml=xml, **kwargs)
+
+  def _fetch_message_items(self, folder_id, delegate_for, order_by=None, restriction=None, query_string=None):
+    request = soap_request.get_message_items(format=u'AllProperties', folder_id=folder_id, delegate_for=delegate_for, order_by=order_by, restriction=restriction, query_string=query_string,
+                                             fields=self._fields)
     return self.service.send(request)
   
   def _parse_response_for_list_or_get_messages(self, response):
-    items = (
-      response.xpath(u'//m:FindItemResponseMessage/m:RootFolder/t:Items/t:Message', namespaces=soap_request.NAMESPACES)
-      or response.xpath(u'//m:FindItemResponseMessage/m:RootFolder/t:Groups/t:GroupedItems/t:Items/t:Message', namespaces=soap_request.NAMESPACES)
-      or None
-    )
-
-    for item in items:
+    for item in _find_message_items(response):
       self._add_message(item)
 
     return self
 
   def _add_message(self, xml):
-    self._messages.append(Exchange2010Message(service=self.service, xml=xml))
+    self._messages.append(Exchange2010Message(service=self.service, xml=xml, fields=self._fields))
     return self
   
   def send(self):
@@ -495,11 +595,151 @@ class Exchange2010MessageList(BaseExchangeMessageList):
     return self.service.mail().list_messages(folder_id=folder_id)
 
 
-class Exchange2010MessageGenerator(Exchange2010MessageList):
+class Exchange2010MessageGenerator(object):
+  """
+  Generates the messages in a folder, fetching them *page_size* at a time as it goes. ::
+
+      for message in service.mail().list_messages_batch(folder_id=u'inbox', max_entries=200):
+        print(message.subject)
+
+  Only one page is asked for at a time, and messages are handed out as soon as their page arrives, so going
+  through a huge folder never needs more than a page of messages in memory - as long as you don't hang on to
+  them. ``total`` is how many messages Exchange says are in the folder, once the first page is in.
+
+  Messages added to or removed from the folder while it's being listed can shift the pages, so a message may be
+  skipped or come up twice. Use ``sync()`` when that matters.
+  """
+
+  def __init__(self, service, folder_id, page_size=DEFAULT_MESSAGES_PAGE_SIZE, delegate_for=None, order_by=DEFAULT_MESSAGES_ORDER, restriction=None, query_string=None,
+               fields=None):
+    self.service = service
+    self.folder_id = folder_id
+    self.page_size = page_size
+    self.delegate_for = delegate_for
+    self.order_by = order_by
+    self.restriction = restriction
+    self.query_string = query_string
+    self.fields = fields
+    self.total = None
 
-  def _fetch_messages_items(self, folder_id, delegate_for, max_entries):
-    request = soap_request.get_message_items(format=u'AllProperties', folder_id=folder_id, delegate_for=delegate_for, max_entries=max_entries)
+  def __iter__(self):
+    return self._iter_from(0)
+
+  def _iter_from(self, offset):
+    while True:
+      items, next_offset, done = self._parse_page(self._fetch_page(offset))
+
+      for item in items:
+        yield self._build_message(item)
+
+      # A page that makes no progress would have us asking for it forever
+      if done or not items or next_offset is None or next_offset <= offset:
+        return
+
+      offset = next_offset
+
+  def _fetch_page(self, offset):
+    request = soap_request.get_message_items(format=u'AllProperties', folder_id=self.folder_id, offset=offset, max_entries=self.page_size, delegate_for=self.delegate_for, order_by=self.order_by,
+                                             restriction=self.restriction, query_string=self.query_string, fields=self.fields)
     return self.service.send(request)
 
-  def _parse_response_for_messages(self, response):
-    return super(Exchange2010MessageGenerator, self)._parse_response_for_messages(response)
+  def _parse_page(self, response):
+    """ Returns the <t:Message>s in a page, the offset the next page starts at, and whether this was the last page. """
+    root_folder = response.xpath(u'//m:FindItemResponseMessage/m:RootFolder', namespaces=soap_request.NAMESPACES)
+    if not root_folder:
+      return [], None, True
+    root_folder = root_folder[0]
+
+    total = root_folder.get(u'TotalItemsInView')
+    if total is not None:
+      self.total = int(total)
+
+    next_offset = root_folder.get(u'IndexedPagingOffset')
+    done = root_folder.get(u'IncludesLastItemInRange') != u'false'
+
+    return _find_message_items(response), int(next_offset) if next_offset is not None else None, done
+
+  def _build_message(self, xml):
+    return Exchange2010Message(service=self.service, xml=xml, fields=self.fields)
+
+
+class Exchange2010PrefetchingMessageGenerator(Exchange2010MessageGenerator):
+  """
+  An :class:`Exchange2010MessageGenerator` that keeps *pages_in_flight* pages on their way at once, so listing a
+  big folder isn't held up waiting on one round trip after another. ::
+
+      for message in service.mail().list_messages_batch(folder_id=u'archive', max_entries=500, prefetch=4):
+        archive(message)
+
+  The first page is fetched on its own to find out how many messages there are, and how many Exchange hands
+  back to a page - which can be fewer than *page_size*. The rest are then asked for on a pool of threads.
+  Messages still come out in folder order. Another page is only asked for when you've got through one, so no
+  more than *pages_in_flight* pages are ever waiting to be read, however slow you are.
+
+  If a page doesn't start where the one before it ended, or the folder grows while it's being listed, the rest
+  of the pages are fetched one at a time.
+  """
+
+  def __init__(self, service, folder_id, page_size=DEFAULT_MESSAGES_PAGE_SIZE, delegate_for=None, order_by=DEFAULT_MESSAGES_ORDER, restriction=None, query_string=None,
+               fields=None, pages_in_flight=4):
+    super(Exchange2010PrefetchingMessageGenerator, self).__init__(service, folder_id, page_size=page_size, delegate_for=delegate_for, order_by=order_by,
+                                                                  restriction=restriction, query_string=query_string, fields=fields)
+    self.pages_in_flight = pages_in_flight
+
+  def __iter__(self):
+    response = self._fetch_page(0)
+    items, next_offset, done = self._parse_page(response)
+
+    for item in items:
+      yield self._build_message(item)
+
+    if done or not items or not next_offset:
+      return
+
+    # Exchange may return fewer messages than were asked for, so step by however many the first page really had
+    offsets = iter(range(next_offset, self.total or 0, next_offset))
+    pool = ThreadPool(self.pages_in_flight)
+    pending = deque()
+
+    def fetch_next_page():
+      offset = next(offsets, None)
+      if offset is not None:
+        pending.append((offset, pool.apply_async(self._fetch_page, (offset,))))
+
+    try:
+      for _ in range(self.pages_in_flight):
+        fetch_next_page()
+
+      while pending:
+        offset, page = pending.popleft()
+
+        # Reading on from here would skip or repeat messages, and so would every page after it
+        if offset != next_offset:
+          break
+
+        items, next_offset, done = self._parse_page(page.get())
+
+        # Only ask for another page once one has been read, so the buffer never grows past pages_in_flight
+        fetch_next_page()
+
+        for item in items:
+          yield self._build_message(item)
+
+        # The folder shrank out from under us, and the pages still on their way are past the end of it
+        if done or not items:
+          return
+    finally:
+      pool.terminate()
+
+    # Anything added to the folder since the first page, or that the pages we guessed at didn't line up with
+    if next_offset is not None:
+      for message in self._iter_from(next_offset):
+        yield message
+
+
+def _find_message_items(response):
+  """ Returns the <t:Message>s in a FindItem response, whether or not they've been grouped. """
+  return (
+    response.xpath(u'//m:FindItemResponseMessage/m:RootFolder/t:Items/t:Message', namespaces=soap_request.NAMESPACES)
+    or response.xpath(u'//m:FindItemResponseMessage/m:RootFolder/t:Groups/t:GroupedItems/t:Items/t:Message', namespaces=soap_request.NAMESPACES)
+  )
@@ -0,0 +1,303 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import logging
+import threading
+
+from ..base.notification import ALL_EVENT_TYPES, NOTIFICATION_EVENT_CLASSES, ExchangeStatusEvent
+from ..base.soap import CompiledPropertyMap
+from ..exceptions import FailedExchangeException, ExchangeSubscriptionExpiredException
+
+from . import soap_request
+
+log = logging.getLogger('pyexchange')
+
+# Pull subscriptions expire after this many minutes without a GetEvents call
+DEFAULT_SUBSCRIPTION_TIMEOUT = 30
+
+# Streaming connections are closed by Exchange after this many minutes, and then opened again
+DEFAULT_CONNECTION_TIMEOUT = 30
+
+# Pull listeners ask for new events this many seconds apart
+DEFAULT_POLL_INTERVAL = 30
+
+# Listeners give up after this many failed attempts in a row to talk to Exchange
+DEFAULT_MAX_FAILURES = 5
+
+
+class Exchange2010NotificationService(object):
+
+  def __init__(self, service):
+    self.service = service
+
+  def subscribe(self, folder_ids, event_types=ALL_EVENT_TYPES, streaming=False, watermark=None, timeout=DEFAULT_SUBSCRIPTION_TIMEOUT, delegate_for=None):
+    """
+    Subscribes to *event_types* in *folder_ids*, and returns the subscription.
+
+    Pull subscriptions (the default) hand out everything that happened since the last time you asked, whenever
+    you call ``get_events()``, and can pick up from the *watermark* of an older subscription. They expire after
+    *timeout* minutes of not being asked.
+
+    Streaming subscriptions (``streaming=True``, Exchange 2010 SP1 and later) have Exchange push events down an
+    open connection as they happen, so there's nothing to poll.
+    """
+    if streaming:
+      body = soap_request.subscribe_streaming(folder_ids, event_types, delegate_for=delegate_for)
+    else:
+      body = soap_request.subscribe_pull(folder_ids, event_types, watermark=watermark, timeout=timeout, delegate_for=delegate_for)
+
+    response_xml = self.service.send(body)
+    id, watermark = self._parse_response_for_subscribe(response_xml)
+
+    subscription_class = Exchange2010StreamingSubscription if streaming else Exchange2010PullSubscription
+    return subscription_class(service=self.service, id=id, watermark=watermark)
+
+  def listen(self, folder_ids, event_types=ALL_EVENT_TYPES, streaming=False, delegate_for=None, **kwargs):
+    """
+    Returns a :class:`Exchange2010NotificationListener` for *event_types* in *folder_ids*, which subscribes by
+    itself and keeps the subscription going. ::
+
+        listener = service.notifications().listen([u'inbox', u'calendar'], streaming=True)
+        for event in listener:
+          print(event.event_type, event.item_id)
+    """
+    return Exchange2010NotificationListener(self, folder_ids, event_types, streaming=streaming, delegate_for=delegate_for, **kwargs)
+
+  def _parse_response_for_subscribe(self, response):
+    message = response.xpath(u'//m:SubscribeResponseMessage', namespaces=soap_request.NAMESPACES)
+    if not message:
+      raise FailedExchangeException(u"Exchange server did not return a subscription", None)
+
+    id = message[0].findtext(u'm:SubscriptionId', namespaces=soap_request.NAMESPACES)
+    watermark = message[0].findtext(u'm:Watermark', namespaces=soap_request.NAMESPACES)
+    return id, watermark
+
+
+class Exchange2010Subscription(object):
+
+  EVENT_PROPERTIES = CompiledPropertyMap({
+    u'watermark': {u'xpath': u't:Watermark'},
+    u'timestamp': {u'xpath': u't:TimeStamp', u'cast': u'datetime'},
+    u'unread_count': {u'xpath': u't:UnreadCount', u'cast': u'int'},
+  }, namespace_map=soap_request.NAMESPACES)
+
+  EVENT_IDS = {
+    u'item_id': u't:ItemId',
+    u'folder_id': u't:FolderId',
+    u'parent_folder_id': u't:ParentFolderId',
+    u'old_item_id': u't:OldItemId',
+    u'old_folder_id': u't:OldFolderId',
+    u'old_parent_folder_id': u't:OldParentFolderId',
+  }
+
+  def __init__(self, service, id, watermark=None):
+    self.service = service
+    self.id = id
+    self.watermark = watermark
+
+  def unsubscribe(self):
+    self.service.send(soap_request.unsubscribe(self.id))
+
+  def _parse_notification(self, notification):
+    """
+    Returns the events in a <m:Notification>, leaving out status events, and the watermark that comes after them
+    (or None). The watermark is left for the caller to move on once the events have been handed out.
+    """
+    events = []
+    watermark = None
+
+    for element in notification:
+      event_class = NOTIFICATION_EVENT_CLASSES.get(element.tag.rpartition(u'}')[2])
+      if event_class is None:
+        continue
+
+      properties = self.service._xpath_to_dict(element=element, property_map=self.EVENT_PROPERTIES, namespace_map=soap_request.NAMESPACES)
+      for key, xpath in self.EVENT_IDS.items():
+        id = element.find(xpath, namespaces=soap_request.NAMESPACES)
+        if id is not None:
+          properties[key] = id.get(u'Id')
+
+      event = event_class(**properties)
+      if event.watermark:
+        watermark = event.watermark
+      if event_class is not ExchangeStatusEvent:
+        events.append(event)
+
+    return events, watermark
+
+
+class Exchange2010PullSubscription(Exchange2010Subscription):
+
+  streaming = False
+
+  def get_events(self):
+    """
+    Returns everything that happened since the last call, oldest first.
+
+    The watermark only moves on once every page of events is in, so if asking for one fails, the next call asks
+    for the earlier pages again rather than losing them.
+    """
+    events = []
+    watermark = self.watermark
+
+    more_events = True
+    while more_events:
+      response_xml = self.service.send(soap_request.get_events(self.id, watermark))
+      new_events, watermark, more_events = self._parse_response_for_get_events(response_xml, watermark)
+      events.extend(new_events)
+
+    self.watermark = watermark
+    return events
+
+  def _parse_response_for_get_events(self, response, watermark):
+    """ Returns the events in a GetEvents response, the watermark after them (*watermark* if none came), and whether there are more. """
+    notification = response.xpath(u'//m:GetEventsResponseMessage/m:Notification', namespaces=soap_request.NAMESPACES)
+    if not notification:
+      return [], watermark, False
+
+    more_events = notification[0].findtext(u't:MoreEvents', namespaces=soap_request.NAMESPACES) == u'true'
+    events, new_watermark = self._parse_notification(notification[0])
+    return events, new_watermark or watermark, more_events
+
+
+class Exchange2010StreamingSubscription(Exchange2010Subscription):
+
+  streaming = True
+
+  def get_events(self, connection_timeout=DEFAULT_CONNECTION_TIMEOUT):
+    """
+    Opens a connection that Exchange pushes events down as they happen, and generates them. The generator ends
+    when Exchange closes the connection, after *connection_timeout* minutes.
+    """
+    body = soap_request.get_streaming_events([self.id], connection_timeout=connection_timeout)
+
+    # Give Exchange until a minute past the point it should have closed the connection before giving up on it
+    for response_xml in self.service.send_for_documents(body, timeout=(connection_timeout + 1) * 60):
+      for notification in response_xml.xpath(u'//m:GetStreamingEventsResponseMessage/m:Notifications/m:Notification', namespaces=soap_request.NAMESPACES):
+        events, watermark = self._parse_notification(notification)
+        for event in events:
+          yield event
+        if watermark:
+          self.watermark = watermark
+
+
+class Exchange2010NotificationListener(object):
+  """
+  Keeps a subscription going, and hands out the events that come in on it - either one at a time by iterating
+  over the listener, or to a callback with :meth:`run`::
+
+      listener = service.notifications().listen([u'calendar'], streaming=True)
+      threading.Thread(target=listener.run, args=(handle_event,)).start()
+      ...
+      listener.close()
+
+  Expired subscriptions are replaced, and dropped connections reopened, with a back-off between failed attempts.
+  After *max_failures* failures in a row, or *max_failures* subscriptions in a row that expire before handing out
+  anything, the error is raised.
+
+  Pull listeners ask for events every *poll_interval* seconds, and a replacement subscription carries on from the
+  last watermark, so nothing is missed. Streaming subscriptions can't do that: events between losing a
+  subscription and replacing it are lost, so pair a streaming listener with an occasional ``sync()``.
+  """
+
+  def __init__(self, notifications, folder_ids, event_types=ALL_EVENT_TYPES, streaming=False, delegate_for=None,
+               timeout=DEFAULT_SUBSCRIPTION_TIMEOUT, connection_timeout=DEFAULT_CONNECTION_TIMEOUT,
+               poll_interval=DEFAULT_POLL_INTERVAL, max_failures=DEFAULT_MAX_FAILURES):
+    self.notifications = notifications
+    self.folder_ids = folder_ids
+    self.event_types = event_types
+    self.streaming = streaming
+    self.delegate_for = delegate_for
+    self.timeout = timeout
+    self.connection_timeout = connection_timeout
+    self.poll_interval = poll_interval
+    self.max_failures = max_failures
+
+    self.subscription = None
+    self._resume_from = None
+    self._stopped = threading.Event()
+
+  def __iter__(self):
+    return self.events()
+
+  def events(self):
+    """ Generates events until :meth:`stop` is called. """
+    failures = 0
+    expiries = 0
+
+    while not self._stopped.is_set():
+      try:
+        if self.subscription is None:
+          self.subscription = self._subscribe(watermark=self._resume_from)
+
+        for event in self._get_events():
+          failures = expiries = 0
+          yield event
+          if self._stopped.is_set():
+            return
+
+        failures = expiries = 0
+      except ExchangeSubscriptionExpiredException as err:
+        self._drop_subscription()
+        if expiries >= self.max_failures:
+          raise
+        log.info(u'Notification subscription expired, subscribing again (attempt %d of %d): %s', expiries + 1, self.max_failures, err)
+        # Only back off if the last replacement didn't last either
+        if expiries:
+          self.notifications.service._backoff(expiries - 1)
+        expiries += 1
+        continue
+      except FailedExchangeException as err:
+        if failures >= self.max_failures:
+          raise
+        log.warning(u'Lost touch with Exchange while listening for notifications (attempt %d of %d): %s', failures + 1, self.max_failures, err)
+        self.notifications.service._backoff(failures)
+        failures += 1
+        continue
+
+      if not self.streaming:
+        self._stopped.wait(self.poll_interval)
+
+  def run(self, callback):
+    """ Calls *callback* with each event, until :meth:`stop` is called. """
+    for event in self.events():
+      callback(event)
+
+  def stop(self):
+    """
+    Stops listening. A pull listener stops straight away; a streaming one once the next event comes in or the
+    connection is closed.
+    """
+    self._stopped.set()
+
+  def close(self):
+    """ Stops listening and drops the subscription. """
+    self.stop()
+
+    if self.subscription is not None:
+      try:
+        self.subscription.unsubscribe()
+      except FailedExchangeException as err:
+        log.info(u'Unable to unsubscribe, the subscription will expire by itself: %s', err)
+      self.subscription = None
+
+  def _get_events(self):
+    if self.streaming:
+      return self.subscription.get_events(connection_timeout=self.connection_timeout)
+    return self.subscription.get_events()
+
+  def _subscribe(self, watermark=None):
+    return self.notifications.subscribe(
+      self.folder_ids, self.event_types, streaming=self.streaming, watermark=watermark, timeout=self.timeout, delegate_for=self.delegate_for,
+    )
+
+  def _drop_subscription(self):
+    if self.streaming:
+      log.warning(u'Events since the streaming subscription expired may have been missed')
+    else:
+      self._resume_from = self.subscription.watermark
+
+    self.subscription = None
@@ -5,6 +5,8 @@ Licensed under the Apache License, Version 2.0 (the "License");?you may not use
 Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
 from lxml.builder import ElementMaker
+from datetime import date, datetime
+from ..restriction import FieldComparison, Contains, Exists, BooleanCombination, And, Or, Not, IsEqualTo, IsGreaterThan, IsLessThan
 from ..utils import convert_datetime_to_utc
 from ..compat import _unicode
 
@@ -14,12 +16,18 @@ SOAP_NS = u'http://schemas.xmlsoap.org/soap/envelope/'
 
 NAMESPACES = {u'm': MSG_NS, u't': TYPE_NS, u's': SOAP_NS}
 
+# Only ever shows up in SOAP fault details, so it's kept out of NAMESPACES (and out of every request we build)
+ERROR_NS = u'http://schemas.microsoft.com/exchange/services/2006/errors'
+ERROR_NAMESPACES = dict(NAMESPACES, e=ERROR_NS)
+
 M = ElementMaker(namespace=MSG_NS, nsmap=NAMESPACES)
 T = ElementMaker(namespace=TYPE_NS, nsmap=NAMESPACES)
 
 EXCHANGE_DATETIME_FORMAT = u"%Y-%m-%dT%H:%M:%SZ"
 EXCHANGE_DATE_FORMAT = u"%Y-%m-%d"
 
+SORT_DIRECTIONS = (u'Ascending', u'Descending')
+
 DISTINGUISHED_IDS = (
   'calendar', 'contacts', 'deleteditems', 'drafts', 'inbox', 'journal', 'notes', 'outbox', 'sentitems',
   'tasks', 'msgfolderroot', 'root', 'junkemail', 'searchfolders', 'voicemail', 'recoverableitemsroot',
@@ -29,9 +37,9 @@ DISTINGUISHED_IDS = (
 )
 
 
-def exchange_header():
+def exchange_header(version=u'Exchange2010'):
 
-  return T.RequestServerVersion({u'Version': u'Exchange2010'})
+  return T.RequestServerVersion({u'Version': version})
 
 
 def resource_node(element, resources):
@@ -76,14 +84,45 @@ def delete_field(field_uri):
   return root
 
 
-def get_item(exchange_id, format=u"Default"):
+def item_shape(format=u'Default', fields=None):
+  """
+  Helper function to generate an ItemShape node.  With *fields* (a list of
+  FieldURIs, like item:Subject) only the item ids and those fields come
+  back, whatever *format* says.
+
+  <m:ItemShape>
+    <t:BaseShape>IdOnly</t:BaseShape>
+    <t:AdditionalProperties>
+      <t:FieldURI FieldURI="item:Subject"/>
+    </t:AdditionalProperties>
+  </m:ItemShape>
+  """
+  return _shape(M.ItemShape, format, fields)
+
+
+def folder_shape(format=u'Default', fields=None):
+  """ Same as item_shape, for folders - *fields* are FieldURIs like folder:DisplayName. """
+  return _shape(M.FolderShape, format, fields)
+
+
+def _shape(element, format, fields):
+  if not fields:
+    return element(T.BaseShape(format))
+
+  return element(
+    T.BaseShape(u'IdOnly'),
+    T.AdditionalProperties(*[T.FieldURI({u'FieldURI': field_uri}) for field_uri in fields])
+  )
+
+
+def get_item(exchange_id, format=u"Default", fields=None):
   """
     Requests a calendar item from the store.
 
     exchange_id is the id for this event in the Exchange store.
 
     format controls how much data you get back from Exchange. Full docs are here, but acceptible values
-    are IdOnly, Default, and AllProperties.
+    are IdOnly, Default, and AllProperties. Or ask for just the *fields* you need - see item_shape.
 
     http://msdn.microsoft.com/en-us/library/aa564509(v=exchg.140).aspx
 
@@ -107,9 +146,7 @@ def get_item(exchange_id, format=u"Default"):
     elements = [T.ItemId(Id=exchange_id)]
 
   root = M.GetItem(
-    M.ItemShape(
-      T.BaseShape(format)
-    ),
+    item_shape(format, fields),
     M.ItemIds(
       *elements
     )
@@ -117,12 +154,22 @@ def get_item(exchange_id, format=u"Default"):
   return root
 
 
-def get_folder_items(format=u'Default', folder_id=u'root', delegate_for=None):
+def get_folder_items(format=u'Default', folder_id=u'root', delegate_for=None, view=None, grouping=None, restriction=None, order_by=None, query_string=None,
+                     fields=None):
   """
-  Helper function for fetching items of a generic folder.  Can be extended with
-  additional parameters for more robust searching.
+  Helper function for fetching items of a generic folder.  *view* (a paged
+  or calendar view) and *grouping* are nodes; *restriction* is a
+  pyexchange.restriction.Restriction, *order_by* is as in sort_order_node,
+  and *query_string* is an AQS search.  They all end up in the order the
+  schema wants them in.  *fields* is as in item_shape.
+
+  Exchange turns down a FindItem with both a restriction and a query
+  string, so that's a ValueError.
 
   """
+  if restriction is not None and query_string:
+    raise ValueError(u"Exchange can't filter on a restriction and a query string at once")
+
   if folder_id in DISTINGUISHED_IDS:
     if delegate_for is None:
       target = M.ParentFolderIds(T.DistinguishedFolderId(Id=folder_id))
@@ -138,80 +185,233 @@ def get_folder_items(format=u'Default', folder_id=u'root', delegate_for=None):
 
   root = M.FindItem(
     {u'Traversal': u'Shallow'},
-    M.ItemShape(
-      T.BaseShape(format)
-    ),
-    target
+    item_shape(format, fields)
   )
 
+  if view is not None:
+    root.append(view)
+
+  if grouping is not None:
+    root.append(grouping)
+
+  if restriction is not None:
+    root.append(restriction_node(restriction))
+
+  if order_by:
+    root.append(sort_order_node(order_by))
+
+  root.append(target)
+
+  if query_string:
+    root.append(M.QueryString(query_string))
+
   return root
 
 
-def get_calendar_items(format=u"Default", calendar_id=u'calendar', start=None, end=None, max_entries=999999, delegate_for=None):
+def restriction_node(restriction):
+  """
+  Helper function to generate a Restriction node from a
+  pyexchange.restriction.Restriction.
+
+  <m:Restriction>
+    <t:And>
+      <t:IsEqualTo>
+        <t:FieldURI FieldURI="message:IsRead"/>
+        <t:FieldURIOrConstant>
+          <t:Constant Value="false"/>
+        </t:FieldURIOrConstant>
+      </t:IsEqualTo>
+      <t:Contains ContainmentMode="Substring" ContainmentComparison="IgnoreCase">
+        <t:FieldURI FieldURI="item:Subject"/>
+        <t:Constant Value="invoice"/>
+      </t:Contains>
+    </t:And>
+  </m:Restriction>
+  """
+  return M.Restriction(search_expression_node(restriction))
+
+
+def search_expression_node(restriction):
+  element = getattr(T, restriction.element)
+
+  if isinstance(restriction, BooleanCombination):
+    return element(*[search_expression_node(child) for child in restriction.restrictions])
+
+  if isinstance(restriction, Not):
+    return element(search_expression_node(restriction.restriction))
+
+  field = T.FieldURI({u'FieldURI': restriction.field_uri})
+
+  if isinstance(restriction, Exists):
+    return element(field)
+
+  constant = T.Constant({u'Value': _restriction_value(restriction.value)})
+
+  if isinstance(restriction, Contains):
+    return element({u'ContainmentMode': restriction.mode, u'ContainmentComparison': restriction.comparison}, field, constant)
+
+  if isinstance(restriction, FieldComparison):
+    return element(field, T.FieldURIOrConstant(constant))
+
+  raise TypeError(u'Unknown restriction: %r' % (restriction,))
+
+
+def _restriction_value(value):
+  if isinstance(value, bool):
+    return u'true' if value else u'false'
+  if isinstance(value, datetime):
+    return convert_datetime_to_utc(value).strftime(EXCHANGE_DATETIME_FORMAT)
+  if isinstance(value, date):
+    return value.strftime(EXCHANGE_DATE_FORMAT)
+  return _unicode(value)
+
+
+def sort_order_node(order_by):
+  """
+  Helper function to generate a SortOrder node.  *order_by* is a FieldURI,
+  or a list of them and (FieldURI, u'Ascending' or u'Descending') pairs,
+  most significant first.
+
+  <m:SortOrder>
+    <t:FieldOrder Order="Descending">
+      <t:FieldURI FieldURI="item:DateTimeReceived"/>
+    </t:FieldOrder>
+  </m:SortOrder>
+  """
+  if isinstance(order_by, (tuple, list)) and len(order_by) == 2 and order_by[1] in SORT_DIRECTIONS:
+    order_by = [order_by]
+  elif not isinstance(order_by, (tuple, list)):
+    order_by = [order_by]
+
+  root = M.SortOrder()
+  for field in order_by:
+    field_uri, direction = field if isinstance(field, (tuple, list)) else (field, u'Ascending')
+
+    if direction not in SORT_DIRECTIONS:
+      raise ValueError(u'Sort order must be one of %s, not %s' % (u', '.join(SORT_DIRECTIONS), direction))
+
+    root.append(T.FieldOrder({u'Order': direction}, T.FieldURI({u'FieldURI': field_uri})))
+
+  return root
+
+
+def get_calendar_items(format=u"Default", calendar_id=u'calendar', start=None, end=None, max_entries=999999, delegate_for=None, restriction=None, query_string=None,
+                       fields=None):
   """
   Fetches items from the calendar folder.  Extends the default body with
-  a CalendarView container for the result set.
+  a CalendarView container for the result set - or, with a *restriction*
+  or *query_string*, hands over to find_calendar_items.
 
   """
+  if restriction is not None or query_string:
+    return find_calendar_items(format, calendar_id, start, end, restriction=restriction, query_string=query_string, delegate_for=delegate_for, fields=fields,
+                               max_entries=max_entries)
 
   start = start.strftime(EXCHANGE_DATETIME_FORMAT)
   end = end.strftime(EXCHANGE_DATETIME_FORMAT)
 
-  base = get_folder_items(format, calendar_id, delegate_for)
-  base.insert(
-    -1,
-    M.CalendarView({
-      u'MaxEntriesReturned': _unicode(max_entries),
-      u'StartDate': start,
-      u'EndDate': end,
-    }),
-  )
+  view = M.CalendarView({
+    u'MaxEntriesReturned': _unicode(max_entries),
+    u'StartDate': start,
+    u'EndDate': end,
+  })
 
-  return base
+  return get_folder_items(format, calendar_id, delegate_for, view=view, fields=fields)
 
 
-def get_message_items(folder_id=u'root', offset=0, base_point=u'Beginning', max_entries=999999, delegate_for=None, format=u'AllProperties'):
+def find_calendar_items(format=u"Default", calendar_id=u'calendar', start=None, end=None, restriction=None, query_string=None, delegate_for=None, fields=None,
+                        offset=0, max_entries=999999):
   """
-  Fetches message items from the specified folder.  Response body will include
-  the current offset, total, and a boolean indicating completion.
+  Fetches the items in the calendar folder between *start* and *end* that
+  match *restriction* and/or *query_string*.  Exchange won't take either
+  with a CalendarView, so the time window is part of the restriction
+  instead - which means recurring series come back once, as their
+  recurring master, rather than as one item per occurrence.  Leave out
+  *start* or *end* for a window that's open on that side.
+
+  A restriction can't go with a *query_string*, so AQS searches are sent
+  without the window; the caller has to check it on what comes back.
+
+  Exchange caps how many items one FindItem returns, so this asks for a
+  page of *max_entries* from *offset* on; the response says where the
+  next page starts, as in get_message_items.
 
   """
-  base = get_folder_items(format, folder_id, delegate_for)
+  conditions = []
 
-  # include message subject
-  base.xpath(u'//m:FindItem/m:ItemShape', namespaces=NAMESPACES)[0].append(
-    T.AdditionalProperties(
-      T.FieldURI({
-        'FieldURI': 'item:Subject'
-      })
-    )
-  )
+  if query_string:
+    start = end = None
+
+  if end is not None:
+    conditions.append(IsLessThan(u'calendar:Start', end))
+
+  if start is not None:
+    conditions.append(Or(IsGreaterThan(u'calendar:End', start), IsEqualTo(u'calendar:CalendarItemType', u'RecurringMaster')))
+
+  if restriction is not None:
+    conditions.append(restriction)
 
+  if len(conditions) > 1:
+    restriction = And(*conditions)
+  elif conditions:
+    restriction = conditions[0]
+
+  view = M.IndexedPageItemView({
+    u'MaxEntriesReturned': _unicode(max_entries),
+    u'Offset': _unicode(offset),
+    u'BasePoint': u'Beginning',
+  })
+
+  return get_folder_items(format, calendar_id, delegate_for, view=view, restriction=restriction, query_string=query_string, fields=fields)
+
+
+def get_message_items(folder_id=u'root', offset=0, base_point=u'Beginning', max_entries=999999, delegate_for=None, format=u'AllProperties',
+                      order_by=None, group_by=None, aggregate_on=u'item:Subject', restriction=None, query_string=None, fields=None):
+  """
+  Fetches message items from the specified folder.  Response body will include
+  the current offset, total, and a boolean indicating completion.
+
+  *order_by* sorts them on the server - see sort_order_node.  Grouping is
+  only done when asked for: *group_by* is the FieldURI to group on, and each
+  group is ordered by the largest *aggregate_on* in it.  *restriction* and
+  *query_string* filter them - see get_folder_items.  With *fields*, only
+  those come back - see item_shape.
+
+  """
   # shove into a paged view
-  base.insert(
-    -1,
-    M.IndexedPageItemView({
-      u'MaxEntriesReturned': _unicode(max_entries),
-      u'Offset': _unicode(offset),
-      u'BasePoint': base_point,
-    })
-  )
-
-  # order by importance
-  base.insert(
-    -1,
-    M.GroupBy(
+  view = M.IndexedPageItemView({
+    u'MaxEntriesReturned': _unicode(max_entries),
+    u'Offset': _unicode(offset),
+    u'BasePoint': base_point,
+  })
+
+  grouping = None
+  if group_by is not None:
+    grouping = M.GroupBy(
       {u'Order': 'Ascending'},
       T.FieldURI(
-        {u'FieldURI': 'item:Importance'}
+        {u'FieldURI': group_by}
       ),
       T.AggregateOn(
         {u'Aggregate': 'Maximum'},
         T.FieldURI({
-          u'FieldURI': 'item:Subject'
+          u'FieldURI': aggregate_on
         })
       )
     )
+
+  base = get_folder_items(format, folder_id, delegate_for, view=view, grouping=grouping, restriction=restriction, order_by=order_by, query_string=query_string,
+                          fields=fields)
+  if fields:
+    return base
+
+  # include message subject
+  base.xpath(u'//m:FindItem/m:ItemShape', namespaces=NAMESPACES)[0].append(
+    T.AdditionalProperties(
+      T.FieldURI({
+        'FieldURI': 'item:Subject'
+      })
+    )
   )
 
   return base
@@ -291,14 +491,12 @@ def get_occurrence(exchange_id, instance_index, format=u"Default"):
   return root
 
 
-def get_folder(folder_id, format=u"Default"):
+def get_folder(folder_id, format=u"Default", fields=None):
 
   id = T.DistinguishedFolderId(Id=folder_id) if folder_id in DISTINGUISHED_IDS else T.FolderId(Id=folder_id)
 
   root = M.GetFolder(
-    M.FolderShape(
-      T.BaseShape(format)
-    ),
+    folder_shape(format, fields),
     M.FolderIds(id)
   )
   return root
@@ -334,6 +532,183 @@ def find_folder(parent_id, format=u"Default"):
   return root
 
 
+def _folder_id(folder_id, delegate_for=None):
+
+  if folder_id not in DISTINGUISHED_IDS:
+    return T.FolderId(Id=folder_id)
+
+  if delegate_for is None:
+    return T.DistinguishedFolderId(Id=folder_id)
+
+  return T.DistinguishedFolderId(
+    {u'Id': folder_id},
+    T.Mailbox(T.EmailAddress(delegate_for))
+  )
+
+
+def sync_folder_items(folder_id, sync_state=None, max_changes=512, delegate_for=None, format=u'IdOnly'):
+  """
+    Asks for the items that changed in a folder since *sync_state* - or, without one, for every item in it.
+
+    http://msdn.microsoft.com/en-us/library/aa563967(v=exchg.140).aspx
+
+    <m:SyncFolderItems>
+      <m:ItemShape>
+        <t:BaseShape>{format}</t:BaseShape>
+      </m:ItemShape>
+      <m:SyncFolderId>
+        <t:DistinguishedFolderId Id="{folder_id}"/>
+      </m:SyncFolderId>
+      <m:SyncState>{sync_state}</m:SyncState>
+      <m:MaxChangesReturned>{max_changes}</m:MaxChangesReturned>
+    </m:SyncFolderItems>
+  """
+
+  root = M.SyncFolderItems(
+    M.ItemShape(
+      T.BaseShape(format)
+    ),
+    M.SyncFolderId(_folder_id(folder_id, delegate_for))
+  )
+
+  if sync_state:
+    root.append(M.SyncState(sync_state))
+
+  root.append(M.MaxChangesReturned(_unicode(max_changes)))
+  return root
+
+
+def sync_folder_hierarchy(folder_id=u'msgfolderroot', sync_state=None, delegate_for=None, format=u'IdOnly'):
+  """
+    Asks for the folders under *folder_id* that changed since *sync_state* - or, without one, for all of them.
+
+    http://msdn.microsoft.com/en-us/library/aa580990(v=exchg.140).aspx
+
+    <m:SyncFolderHierarchy>
+      <m:FolderShape>
+        <t:BaseShape>{format}</t:BaseShape>
+      </m:FolderShape>
+      <m:SyncFolderId>
+        <t:DistinguishedFolderId Id="{folder_id}"/>
+      </m:SyncFolderId>
+      <m:SyncState>{sync_state}</m:SyncState>
+    </m:SyncFolderHierarchy>
+  """
+
+  root = M.SyncFolderHierarchy(
+    M.FolderShape(
+      T.BaseShape(format)
+    ),
+    M.SyncFolderId(_folder_id(folder_id, delegate_for))
+  )
+
+  if sync_state:
+    root.append(M.SyncState(sync_state))
+
+  return root
+
+
+def subscribe_pull(folder_ids, event_types, watermark=None, timeout=30, delegate_for=None):
+  """
+    Subscribes to changes in *folder_ids*, to be picked up with get_events. With a *watermark*, picks up from where
+    an older subscription left off. The subscription expires after *timeout* minutes without a get_events call.
+
+    http://msdn.microsoft.com/en-us/library/aa566188(v=exchg.140).aspx
+
+    <m:Subscribe>
+      <m:PullSubscriptionRequest>
+        <t:FolderIds>
+          <t:DistinguishedFolderId Id="{folder_id}"/>
+        </t:FolderIds>
+        <t:EventTypes>
+          <t:EventType>{event_type}</t:EventType>
+        </t:EventTypes>
+        <t:Watermark>{watermark}</t:Watermark>
+        <t:Timeout>{timeout}</t:Timeout>
+      </m:PullSubscriptionRequest>
+    </m:Subscribe>
+  """
+
+  request = M.PullSubscriptionRequest(
+    T.FolderIds(*[_folder_id(folder_id, delegate_for) for folder_id in folder_ids]),
+    T.EventTypes(*[T.EventType(event_type) for event_type in event_types])
+  )
+
+  if watermark:
+    request.append(T.Watermark(watermark))
+
+  request.append(T.Timeout(_unicode(timeout)))
+  return M.Subscribe(request)
+
+
+def subscribe_streaming(folder_ids, event_types, delegate_for=None):
+  """
+    Subscribes to changes in *folder_ids*, to be pushed down a get_streaming_events connection. Needs Exchange 2010 SP1.
+
+    <m:Subscribe>
+      <m:StreamingSubscriptionRequest>
+        <t:FolderIds>
+          <t:DistinguishedFolderId Id="{folder_id}"/>
+        </t:FolderIds>
+        <t:EventTypes>
+          <t:EventType>{event_type}</t:EventType>
+        </t:EventTypes>
+      </m:StreamingSubscriptionRequest>
+    </m:Subscribe>
+  """
+
+  return M.Subscribe(
+    M.StreamingSubscriptionRequest(
+      T.FolderIds(*[_folder_id(folder_id, delegate_for) for folder_id in folder_ids]),
+      T.EventTypes(*[T.EventType(event_type) for event_type in event_types])
+    )
+  )
+
+
+def get_events(subscription_id, watermark):
+  """
+    http://msdn.microsoft.com/en-us/library/aa566199(v=exchg.140).aspx
+
+    <m:GetEvents>
+      <m:SubscriptionId>{subscription_id}</m:SubscriptionId>
+      <m:Watermark>{watermark}</m:Watermark>
+    </m:GetEvents>
+  """
+
+  return M.GetEvents(
+    M.SubscriptionId(subscription_id),
+    M.Watermark(watermark)
+  )
+
+
+def get_streaming_events(subscription_ids, connection_timeout=30):
+  """
+    Keeps a connection open for *connection_timeout* minutes, and has Exchange push notifications down it as they
+    happen. Needs Exchange 2010 SP1.
+
+    http://msdn.microsoft.com/en-us/library/ff406172(v=exchg.140).aspx
+
+    <m:GetStreamingEvents>
+      <m:SubscriptionIds>
+        <t:SubscriptionId>{subscription_id}</t:SubscriptionId>
+      </m:SubscriptionIds>
+      <m:ConnectionTimeout>{connection_timeout}</m:ConnectionTimeout>
+    </m:GetStreamingEvents>
+  """
+
+  return M.GetStreamingEvents(
+    M.SubscriptionIds(*[T.SubscriptionId(subscription_id) for subscription_id in subscription_ids]),
+    M.ConnectionTimeout(_unicode(connection_timeout))
+  )
+
+
+def unsubscribe(subscription_id):
+
+  return M.Unsubscribe(
+    M.SubscriptionId(subscription_id)
+  )
+
+
 def delete_folder(folder):
 
   root = M.DeleteFolder(
@@ -398,23 +773,36 @@ def new_event(event):
 </m:CreateItem>
   """
 
-  id = T.DistinguishedFolderId(Id=event.calendar_id) if event.calendar_id in DISTINGUISHED_IDS else T.FolderId(Id=event.calendar_id)
+  return new_events([event], calendar_id=event.calendar_id)
 
-  start = convert_datetime_to_utc(event.start)
-  end = convert_datetime_to_utc(event.end)
+
+def new_events(events, calendar_id=u'calendar'):
+  """
+  Requests several new events be created in the same calendar, in one CreateItem. Exchange answers with one
+  CreateItemResponseMessage per event, in the same order.
+  """
+
+  id = T.DistinguishedFolderId(Id=calendar_id) if calendar_id in DISTINGUISHED_IDS else T.FolderId(Id=calendar_id)
 
   root = M.CreateItem(
     M.SavedItemFolderId(id),
-    M.Items(
-      T.CalendarItem(
-        T.Subject(event.subject),
-        T.Body(event.body or u'', BodyType="HTML"),
-      )
-    ),
+    M.Items(*[calendar_item_node(event) for event in events]),
     SendMeetingInvitations="SendToAllAndSaveCopy"
   )
 
-  calendar_node = root.xpath(u'/m:CreateItem/m:Items/t:CalendarItem', namespaces=NAMESPACES)[0]
+  return root
+
+
+def calendar_item_node(event):
+  """ Builds the <t:CalendarItem> that CreateItem needs for a new event. """
+
+  start = convert_datetime_to_utc(event.start)
+  end = convert_datetime_to_utc(event.end)
+
+  calendar_node = T.CalendarItem(
+    T.Subject(event.subject),
+    T.Body(event.body or u'', BodyType="HTML"),
+  )
 
   if event.reminder_minutes_before_start:
     calendar_node.append(T.ReminderIsSet('true'))
@@ -471,7 +859,7 @@ def new_event(event):
       )
     )
 
-  return root
+  return calendar_node
 
 
 def delete_event(event):
@@ -492,9 +880,14 @@ def delete_event(event):
   </DeleteItem>
 
   """
+  return delete_events([event])
+
+
+def delete_events(events):
+  """ Requests several items be deleted from the store, in one DeleteItem. See delete_event. """
   root = M.DeleteItem(
     M.ItemIds(
-      T.ItemId(Id=event.id, ChangeKey=event.change_key)
+      *[T.ItemId(Id=event.id, ChangeKey=event.change_key) for event in events]
     ),
     DeleteType="HardDelete",
     SendMeetingCancellations="SendToAllAndSaveCopy",
@@ -504,13 +897,16 @@ def delete_event(event):
   return root
 
 
-def get_message(exchange_id, format=u'AllProperties'):
+def get_message(exchange_id, format=u'AllProperties', fields=None):
   """
   Extends the get_item() request with the attachment ids for
-  email messages.
+  email messages - unless only some *fields* were asked for.
 
   """
-  base = get_item(exchange_id, format)
+  base = get_item(exchange_id, format, fields)
+  if fields:
+    return base
+
   base.xpath(u'//m:GetItem/m:ItemShape', namespaces=NAMESPACES)[0].append(
     T.AdditionalProperties(
       T.FieldURI(FieldURI='item:Attachments')
@@ -668,9 +1064,10 @@ def send_message(message):
       T.ItemId(Id=message.id, ChangeKey=message.change_key)
     )
   )
+  return root
 
 
-def send_messages(message):
+def send_messages(messages):
   ids = [T.ItemId(Id=message.id, ChangeKey=message.change_key) for message in messages]
 
   root = M.SendItem(
@@ -678,6 +1075,7 @@ def send_messages(message):
       *ids
     )
   )
+  return root
 
 
 def get_attachment(attachment_id):
@@ -760,22 +1158,41 @@ def update_property_node(node_to_insert, field_uri):
   return root
 
 
-def update_item(event, updated_attributes, calendar_item_update_operation_type):
+def update_item(event, updated_attributes, calendar_item_update_operation_type, conflict_resolution=u"AutoResolve"):
   """ Saves updates to an event in the store. Only request changes for attributes that have actually changed."""
 
+  return update_items([(event, updated_attributes)], calendar_item_update_operation_type, conflict_resolution=conflict_resolution)
+
+
+def update_items(changes, calendar_item_update_operation_type, conflict_resolution=u"AutoResolve"):
+  """
+  Saves updates to several events in one UpdateItem. *changes* is a list of (event, updated_attributes) pairs.
+  Exchange answers with one UpdateItemResponseMessage per event, in the same order.
+
+  With the default *conflict_resolution*, Exchange turns down a change
+  made with an out of date change key, rather than overwriting whatever
+  changed in the meantime.  u"AlwaysOverwrite" writes over it.
+  """
+
   root = M.UpdateItem(
-    M.ItemChanges(
-      T.ItemChange(
-        T.ItemId(Id=event.id, ChangeKey=event.change_key),
-        T.Updates()
-      )
-    ),
-    ConflictResolution=u"AlwaysOverwrite",
+    M.ItemChanges(*[item_change_node(event, updated_attributes) for event, updated_attributes in changes]),
+    ConflictResolution=conflict_resolution,
     MessageDisposition=u"SendAndSaveCopy",
     SendMeetingInvitationsOrCancellations=calendar_item_update_operation_type
   )
 
-  update_node = root.xpath(u'/m:UpdateItem/m:ItemChanges/t:ItemChange/t:Updates', namespaces=NAMESPACES)[0]
+  return root
+
+
+def item_change_node(event, updated_attributes):
+  """ Builds the <t:ItemChange> for one event, with an update for each attribute that changed. """
+
+  change_node = T.ItemChange(
+    T.ItemId(Id=event.id, ChangeKey=event.change_key),
+    T.Updates()
+  )
+
+  update_node = change_node.find(u't:Updates', namespaces=NAMESPACES)
 
   # if not send_only_to_changed_attendees:
   #   # We want to resend invites, which you do by setting an attribute to the same value it has. Right now, events
@@ -913,4 +1330,4 @@ def update_item(event, updated_attributes, calendar_item_update_operation_type):
         update_property_node(field_uri="calendar:Recurrence", node_to_insert=recurrence_node)
       )
 
-  return root
+  return change_node
@@ -0,0 +1,235 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import itertools
+import random
+
+from .utils import convert_datetime_to_utc
+
+
+class _Node(object):
+  __slots__ = ('key', 'event', 'priority', 'max_end', 'left', 'right')
+
+  def __init__(self, key, event):
+    self.key = key
+    self.event = event
+    self.priority = random.random()
+    self.max_end = key[1]
+    self.left = None
+    self.right = None
+
+  def update(self):
+    self.max_end = max(
+      self.key[1],
+      self.left.max_end if self.left is not None else self.key[1],
+      self.right.max_end if self.right is not None else self.key[1],
+    )
+
+
+class ExchangeIntervalIndex(object):
+  """
+  Events indexed by the time they take up, for answering "what's on between these times?" without asking
+  Exchange. ::
+
+      events = service.calendar().list_events(start=monday, end=friday)
+      index = events.interval_index()
+
+      if index.is_free(slot_start, slot_end):
+        ...
+
+  Lookups take O(log n + k) time for k matching events, and events can be added and taken out as they change.
+  Times are compared in UTC; events that end when another starts don't overlap it.
+
+  Under the hood this is a treap ordered by start time, where each node also knows the latest end time below
+  it, so whole subtrees that finish before the time asked about get skipped.
+  """
+
+  def __init__(self, events=None):
+    self._root = None
+    self._keys = {}
+    self._counter = itertools.count()
+
+    # Takes an Exchange2010CalendarEventList as well as a plain list of events
+    for event in getattr(events, u'events', events) or []:
+      self.insert(event)
+
+  def __len__(self):
+    return len(self._keys)
+
+  def __iter__(self):
+    """ Yields the events in order of start time. """
+    return iter(self._collect(self._root, None, None))
+
+  def __contains__(self, event):
+    return id(event) in self._keys
+
+  def insert(self, event):
+    """ Adds *event* to the index. Events need a start and an end. """
+    if event.start is None or event.end is None:
+      raise ValueError(u"Events need a start and an end to be indexed")
+
+    if id(event) in self._keys:
+      self.remove(event)
+
+    key = (convert_datetime_to_utc(event.start), convert_datetime_to_utc(event.end), next(self._counter))
+    self._keys[id(event)] = key
+    self._root = self._insert(self._root, _Node(key, event))
+
+  def remove(self, event):
+    """
+    Takes *event* out of the index. Take an event out before changing its start or end and put it back in
+    afterwards, or just insert it again.
+    """
+    key = self._keys.pop(id(event), None)
+    if key is None:
+      raise KeyError(u"Event is not in the index")
+
+    self._root = self._remove(self._root, key)
+
+  def overlapping(self, start, end):
+    """ Returns the events that overlap *start* to *end*, in order of start time. """
+    return self._collect(self._root, convert_datetime_to_utc(start), convert_datetime_to_utc(end))
+
+  def conflicts(self, event):
+    """ Returns the events that overlap *event*, leaving out *event* itself. """
+    return [other for other in self.overlapping(event.start, event.end) if other is not event]
+
+  def is_free(self, start, end):
+    """ Whether nothing in the index overlaps *start* to *end*. """
+    return self._first_overlap(self._root, convert_datetime_to_utc(start), convert_datetime_to_utc(end)) is None
+
+  def busy_intervals(self, start, end):
+    """ Returns the ``(start, end)`` of each event that overlaps *start* to *end*, in order of start time. """
+    return [(self._keys[id(event)][0], self._keys[id(event)][1]) for event in self.overlapping(start, end)]
+
+  def free_slots(self, start, end, duration=None):
+    """ Same as :func:`find_free_slots`, for just this index. """
+    return find_free_slots([self], start, end, duration=duration)
+
+  def _insert(self, node, new):
+    if node is None:
+      return new
+
+    if new.priority > node.priority:
+      new.left, new.right = self._split(node, new.key)
+      new.update()
+      return new
+
+    if new.key < node.key:
+      node.left = self._insert(node.left, new)
+    else:
+      node.right = self._insert(node.right, new)
+
+    node.update()
+    return node
+
+  def _remove(self, node, key):
+    if node is None:
+      return None
+
+    if key == node.key:
+      return self._merge(node.left, node.right)
+
+    if key < node.key:
+      node.left = self._remove(node.left, key)
+    else:
+      node.right = self._remove(node.right, key)
+
+    node.update()
+    return node
+
+  def _split(self, node, key):
+    """ Splits the tree under *node* into the nodes before *key* and the rest. """
+    if node is None:
+      return None, None
+
+    if node.key < key:
+      node.right, right = self._split(node.right, key)
+      node.update()
+      return node, right
+
+    left, node.left = self._split(node.left, key)
+    node.update()
+    return left, node
+
+  def _merge(self, left, right):
+    """ Joins two trees, where everything in *left* comes before everything in *right*. """
+    if left is None:
+      return right
+    if right is None:
+      return left
+
+    if left.priority > right.priority:
+      left.right = self._merge(left.right, right)
+      left.update()
+      return left
+
+    right.left = self._merge(left, right.left)
+    right.update()
+    return right
+
+  def _collect(self, node, start, end, found=None):
+    found = [] if found is None else found
+
+    # Nothing under here ends after the start of the window
+    if node is None or (start is not None and node.max_end <= start):
+      return found
+
+    self._collect(node.left, start, end, found)
+
+    # Nothing from here on starts before the end of the window
+    if end is not None and node.key[0] >= end:
+      return found
+
+    if start is None or node.key[1] > start:
+      found.append(node.event)
+
+    self._collect(node.right, start, end, found)
+    return found
+
+  def _first_overlap(self, node, start, end):
+    while node is not None and node.max_end > start:
+      if node.left is not None and node.left.max_end > start:
+        node = node.left
+      elif node.key[0] < end and node.key[1] > start:
+        return node.event
+      elif node.key[0] >= end:
+        return None
+      else:
+        node = node.right
+
+    return None
+
+
+def find_free_slots(indexes, start, end, duration=None):
+  """
+  Returns the ``(start, end)`` of each stretch between *start* and *end* when nothing in any of *indexes* is on -
+  when everybody is free, given an :class:`ExchangeIntervalIndex` per attendee. With *duration* (a timedelta),
+  stretches shorter than that are left out. ::
+
+      indexes = [service.calendar(id=calendar_id).list_events(start=start, end=end).interval_index()
+                 for calendar_id in attendee_calendars]
+      slots = find_free_slots(indexes, start, end, duration=timedelta(minutes=30))
+  """
+  start = convert_datetime_to_utc(start)
+  end = convert_datetime_to_utc(end)
+
+  busy = sorted(interval for index in indexes for interval in index.busy_intervals(start, end))
+
+  slots = []
+  free_from = start
+  for busy_start, busy_end in busy:
+    if busy_start > free_from:
+      slots.append((free_from, busy_start))
+    free_from = max(free_from, busy_end)
+
+  if free_from < end:
+    slots.append((free_from, end))
+
+  if duration is not None:
+    slots = [(slot_start, slot_end) for slot_start, slot_end in slots if slot_end - slot_start >= duration]
+
+  return slots
@@ -0,0 +1,100 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import calendar
+from datetime import timedelta
+
+# Same order as BaseExchangeCalendarEvent.WEEKLY_DAYS - weeks start on Sunday, like they do in Exchange by default
+WEEKDAY_NAMES = [u'Sunday', u'Monday', u'Tuesday', u'Wednesday', u'Thursday', u'Friday', u'Saturday']
+
+# Exchange can also hand these back in <t:DaysOfWeek>
+DAY_GROUPS = {
+  u'Day': WEEKDAY_NAMES,
+  u'Weekday': WEEKDAY_NAMES[1:6],
+  u'WeekendDay': [WEEKDAY_NAMES[0], WEEKDAY_NAMES[6]],
+}
+
+
+def occurrence_dates(recurrence, first_date, interval=None, days=None, end_date=None, from_date=None):
+  """
+  Generates the dates a recurrence pattern falls on, in order, starting at *first_date* and ending with
+  *end_date* (if there is one - otherwise it goes on forever).
+
+  *recurrence* is one of ``daily``, ``weekly``, ``monthly`` and ``yearly``, as pyexchange reads and writes
+  them: every *interval* days; every *interval* weeks on *days* (a space separated list of day names); every
+  *interval* months on the day of the month *first_date* is on; or every year on the day *first_date* is on.
+  Months that are too short for that day use their last day instead, the way Exchange does.
+
+  Dates before *from_date* are skipped without being worked out one by one, so starting far into a long series
+  costs the same as starting at the beginning.
+  """
+  interval = interval or 1
+  from_date = max(first_date, from_date or first_date)
+
+  if recurrence == u'daily':
+    dates = _daily(first_date, interval, from_date)
+  elif recurrence == u'weekly':
+    dates = _weekly(first_date, interval, days, from_date)
+  elif recurrence == u'monthly':
+    dates = _monthly(first_date, interval, from_date)
+  elif recurrence == u'yearly':
+    dates = _monthly(first_date, 12, from_date)
+  else:
+    raise ValueError(u'recurrence received unknown value: %s' % recurrence)
+
+  for occurrence_date in dates:
+    if end_date is not None and occurrence_date > end_date:
+      return
+    if occurrence_date >= from_date:
+      yield occurrence_date
+
+
+def _daily(first_date, interval, from_date):
+  period = (from_date - first_date).days // interval
+  while True:
+    yield first_date + timedelta(days=period * interval)
+    period += 1
+
+
+def _weekly(first_date, interval, days, from_date):
+  offsets = sorted(set(WEEKDAY_NAMES.index(name) for name in _day_names(days)))
+  if not offsets:
+    raise ValueError(u'recurrence_days is required')
+
+  # date.weekday() counts from Monday, and we want to count from Sunday
+  first_week = first_date - timedelta(days=(first_date.weekday() + 1) % 7)
+  period = (from_date - first_week).days // 7 // interval
+
+  while True:
+    week = first_week + timedelta(weeks=period * interval)
+    for offset in offsets:
+      occurrence_date = week + timedelta(days=offset)
+      if occurrence_date >= first_date:
+        yield occurrence_date
+    period += 1
+
+
+def _monthly(first_date, interval, from_date):
+  first_month = first_date.year * 12 + first_date.month - 1
+  period = max(0, (from_date.year * 12 + from_date.month - 1 - first_month) // interval)
+
+  while True:
+    year, month = divmod(first_month + period * interval, 12)
+    last_day = calendar.monthrange(year, month + 1)[1]
+    yield first_date.replace(year=year, month=month + 1, day=min(first_date.day, last_day))
+    period += 1
+
+
+def _day_names(days):
+  names = []
+  for name in (days or u'').split():
+    names.extend(DAY_GROUPS.get(name, [name]))
+
+  for name in names:
+    if name not in WEEKDAY_NAMES:
+      raise ValueError(u'recurrence_days received unknown value: %s' % name)
+
+  return names
@@ -0,0 +1,152 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+
+CONTAINMENT_MODES = (u'FullString', u'Prefixed', u'Substring', u'PrefixOnWords', u'ExactPhrase')
+CONTAINMENT_COMPARISONS = (u'Exact', u'IgnoreCase', u'IgnoreNonSpacingCharacters', u'Loose', u'IgnoreCaseAndNonSpacingCharacters')
+
+
+class Restriction(object):
+  """
+  A search filter that Exchange applies on the server, so only the items that match come back. ::
+
+      from pyexchange.restriction import IsEqualTo, Contains, IsGreaterThan
+
+      unread_invoices = IsEqualTo(u'message:IsRead', False) & Contains(u'item:Subject', u'invoice')
+      messages = service.mail().list_messages(folder_id=u'inbox', restriction=unread_invoices)
+
+  Fields are EWS FieldURIs, like ``item:Subject`` or ``calendar:Location``. Restrictions combine with ``&``,
+  ``|`` and ``~``, or with :class:`And`, :class:`Or` and :class:`Not`.
+  """
+  element = None
+
+  def __and__(self, other):
+    return And(self, other)
+
+  def __or__(self, other):
+    return Or(self, other)
+
+  def __invert__(self):
+    return Not(self)
+
+  def __eq__(self, other):
+    return type(self) is type(other) and self.__dict__ == other.__dict__
+
+  def __ne__(self, other):
+    return not self == other
+
+  __hash__ = None
+
+
+class FieldComparison(Restriction):
+  """ Compares a field with a value. Booleans, datetimes and dates are written the way Exchange expects them. """
+
+  def __init__(self, field_uri, value):
+    self.field_uri = field_uri
+    self.value = value
+
+  def __repr__(self):
+    return u'%s(%r, %r)' % (self.element, self.field_uri, self.value)
+
+
+class IsEqualTo(FieldComparison):
+  element = u'IsEqualTo'
+
+
+class IsNotEqualTo(FieldComparison):
+  element = u'IsNotEqualTo'
+
+
+class IsGreaterThan(FieldComparison):
+  element = u'IsGreaterThan'
+
+
+class IsGreaterThanOrEqualTo(FieldComparison):
+  element = u'IsGreaterThanOrEqualTo'
+
+
+class IsLessThan(FieldComparison):
+  element = u'IsLessThan'
+
+
+class IsLessThanOrEqualTo(FieldComparison):
+  element = u'IsLessThanOrEqualTo'
+
+
+class Contains(Restriction):
+  """
+  Matches text fields containing *value*. By default that's anywhere in the field, ignoring case - see
+  ``CONTAINMENT_MODES`` and ``CONTAINMENT_COMPARISONS`` for the other ways Exchange can match.
+  """
+  element = u'Contains'
+
+  def __init__(self, field_uri, value, mode=u'Substring', comparison=u'IgnoreCase'):
+    if mode not in CONTAINMENT_MODES:
+      raise ValueError(u'Containment mode must be one of %s, not %s' % (u', '.join(CONTAINMENT_MODES), mode))
+    if comparison not in CONTAINMENT_COMPARISONS:
+      raise ValueError(u'Containment comparison must be one of %s, not %s' % (u', '.join(CONTAINMENT_COMPARISONS), comparison))
+
+    self.field_uri = field_uri
+    self.value = value
+    self.mode = mode
+    self.comparison = comparison
+
+  def __repr__(self):
+    return u'Contains(%r, %r, mode=%r, comparison=%r)' % (self.field_uri, self.value, self.mode, self.comparison)
+
+
+class Exists(Restriction):
+  """ Matches items that have a value for the field at all. """
+  element = u'Exists'
+
+  def __init__(self, field_uri):
+    self.field_uri = field_uri
+
+  def __repr__(self):
+    return u'Exists(%r)' % self.field_uri
+
+
+class BooleanCombination(Restriction):
+  """ Base for :class:`And` and :class:`Or`. """
+
+  def __init__(self, *restrictions):
+    if not restrictions:
+      raise ValueError(u'%s needs at least one restriction' % self.element)
+
+    # Flatten a & b & c into one level, rather than nesting a new one for each &
+    self.restrictions = []
+    for restriction in restrictions:
+      if type(restriction) is type(self):
+        self.restrictions.extend(restriction.restrictions)
+      else:
+        self.restrictions.append(restriction)
+
+  def __repr__(self):
+    return u'%s(%s)' % (self.element, u', '.join(repr(restriction) for restriction in self.restrictions))
+
+
+class And(BooleanCombination):
+  """ Matches items that match every one of *restrictions*. """
+  element = u'And'
+
+
+class Or(BooleanCombination):
+  """ Matches items that match any of *restrictions*. """
+  element = u'Or'
+
+
+class Not(Restriction):
+  """ Matches items that don't match *restriction*. """
+  element = u'Not'
+
+  def __init__(self, restriction):
+    self.restriction = restriction
+
+  def __invert__(self):
+    return self.restriction
+
+  def __repr__(self):
+    return u'Not(%r)' % self.restriction
@@ -0,0 +1,187 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+from contextlib import closing
+
+# sync() asks for this many changes per request (512 is as many as Exchange hands out at once)
+DEFAULT_SYNC_MAX_CHANGES = 512
+
+# os.replace is atomic everywhere, but only exists on Python 3.3+
+_replace = getattr(os, 'replace', os.rename)
+
+
+class ExchangeSyncResult(object):
+  """
+  What changed in a folder since the last sync: the ids that were ``created``, ``updated`` and ``deleted``, in the
+  order Exchange reported them, plus the ``sync_state`` to pick up from next time.
+
+  Each id shows up in at most one list. An item that was created and then changed is only ``created``, and one
+  that was created and deleted again between two syncs doesn't show up at all. Read flag changes count as updates.
+  """
+
+  def __init__(self, sync_state=None):
+    self.sync_state = sync_state
+    self._changes = {}
+    self._order = []
+
+  def __len__(self):
+    return len(self._changes)
+
+  def __repr__(self):
+    return u'<ExchangeSyncResult: %d created, %d updated, %d deleted>' % (len(self.created), len(self.updated), len(self.deleted))
+
+  @property
+  def created(self):
+    return self._ids_with(u'created')
+
+  @property
+  def updated(self):
+    return self._ids_with(u'updated')
+
+  @property
+  def deleted(self):
+    return self._ids_with(u'deleted')
+
+  def _ids_with(self, change):
+    return [id for id in self._order if self._changes.get(id) == change]
+
+  def add_created(self, id):
+    self._record(id, u'created')
+
+  def add_updated(self, id):
+    if self._changes.get(id) != u'created':
+      self._record(id, u'updated')
+
+  def add_deleted(self, id):
+    if self._changes.get(id) == u'created':
+      del self._changes[id]
+      self._order.remove(id)
+    else:
+      self._record(id, u'deleted')
+
+  def _record(self, id, change):
+    if id not in self._changes:
+      self._order.append(id)
+    self._changes[id] = change
+
+
+class BaseSyncStateStore(object):
+  """
+  Somewhere to keep sync states between runs, by key. ``sync()`` reads the last state for a folder from here and
+  writes the new one back once all the changes since then have been fetched.
+  """
+
+  def get(self, key):
+    """ Returns the sync state saved under *key*, or None. """
+    raise NotImplementedError
+
+  def set(self, key, sync_state):
+    raise NotImplementedError
+
+  def delete(self, key):
+    """ Forgets the sync state for *key*, so the next sync starts over from scratch. """
+    raise NotImplementedError
+
+
+class MemorySyncStateStore(BaseSyncStateStore):
+  """ Keeps sync states for as long as the process lives. """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._states = {}
+
+  def get(self, key):
+    with self._lock:
+      return self._states.get(key)
+
+  def set(self, key, sync_state):
+    with self._lock:
+      self._states[key] = sync_state
+
+  def delete(self, key):
+    with self._lock:
+      self._states.pop(key, None)
+
+
+class FileSyncStateStore(BaseSyncStateStore):
+  """
+  Keeps sync states in a JSON file. The file is rewritten as a whole and swapped into place on every change, so
+  a crash never leaves it half written. Fine for a handful of folders; use :class:`SqliteSyncStateStore` for more.
+  """
+
+  def __init__(self, path):
+    self.path = path
+    self._lock = threading.Lock()
+
+  def get(self, key):
+    with self._lock:
+      return self._read().get(key)
+
+  def set(self, key, sync_state):
+    with self._lock:
+      states = self._read()
+      states[key] = sync_state
+      self._write(states)
+
+  def delete(self, key):
+    with self._lock:
+      states = self._read()
+      if states.pop(key, None) is not None:
+        self._write(states)
+
+  def _read(self):
+    if not os.path.exists(self.path):
+      return {}
+
+    with open(self.path) as f:
+      return json.load(f)
+
+  def _write(self, states):
+    directory = os.path.dirname(os.path.abspath(self.path))
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=u'.pyexchange-sync-')
+    try:
+      with os.fdopen(fd, 'w') as f:
+        json.dump(states, f)
+      _replace(temp_path, self.path)
+    except Exception:
+      os.remove(temp_path)
+      raise
+
+
+class SqliteSyncStateStore(BaseSyncStateStore):
+  """ Keeps sync states in a sqlite database, which can be shared between processes. """
+
+  def __init__(self, path, table=u'pyexchange_sync_state'):
+    self.path = path
+    self.table = table
+
+    with closing(self._connect()) as db:
+      with db:
+        db.execute(u'CREATE TABLE IF NOT EXISTS %s (key TEXT PRIMARY KEY, sync_state TEXT NOT NULL)' % self.table)
+
+  def get(self, key):
+    with closing(self._connect()) as db:
+      row = db.execute(u'SELECT sync_state FROM %s WHERE key = ?' % self.table, (key,)).fetchone()
+    return row[0] if row else None
+
+  def set(self, key, sync_state):
+    with closing(self._connect()) as db:
+      with db:
+        db.execute(u'INSERT OR REPLACE INTO %s (key, sync_state) VALUES (?, ?)' % self.table, (key, sync_state))
+
+  def delete(self, key):
+    with closing(self._connect()) as db:
+      with db:
+        db.execute(u'DELETE FROM %s WHERE key = ?' % self.table, (key,))
+
+  def _connect(self):
+    # A connection per call keeps the store safe to share between threads
+    return sqlite3.connect(self.path)
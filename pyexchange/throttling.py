@@ -0,0 +1,61 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import logging
+import threading
+import time
+
+log = logging.getLogger('pyexchange')
+
+# time.monotonic isn't around in Python 2, and wall-clock time is good enough there
+_now = getattr(time, 'monotonic', time.time)
+
+
+class ExchangeThrottlingScheduler(object):
+  """
+  Keeps track of how long Exchange has asked us to back off for, per mailbox.
+
+  When Exchange answers with ErrorServerBusy, the service calls :meth:`pause` with the mailbox the request was
+  for (or ``None`` for requests that aren't tied to a particular mailbox). Every request for that mailbox then
+  blocks in :meth:`wait` until the pause runs out, and carries on by itself after that. Requests for other
+  mailboxes aren't held up.
+
+  One scheduler can be shared between several services by passing it in as ``scheduler``.
+  """
+
+  def __init__(self):
+    self._lock = threading.Lock()
+    self._paused_until = {}
+
+  def pause(self, key, seconds):
+    """ Holds back requests for *key* for at least *seconds*. Never shortens a pause that's already running. """
+    resume_at = _now() + seconds
+
+    with self._lock:
+      if resume_at > self._paused_until.get(key, 0):
+        log.info(u'Exchange is busy, pausing requests for %s for %.1f seconds', key or u'this connection', seconds)
+        self._paused_until[key] = resume_at
+
+  def remaining(self, key):
+    """ Returns how many seconds are left before requests for *key* may go out again. """
+    with self._lock:
+      resume_at = self._paused_until.get(key)
+      if resume_at is None:
+        return 0
+
+      remaining = resume_at - _now()
+      if remaining <= 0:
+        del self._paused_until[key]
+        return 0
+
+      return remaining
+
+  def wait(self, key):
+    """ Blocks until requests for *key* may go out. Picks up any pause that gets extended while we're waiting. """
+    remaining = self.remaining(key)
+    while remaining > 0:
+      time.sleep(remaining)
+      remaining = self.remaining(key)
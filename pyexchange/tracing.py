@@ -0,0 +1,54 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import logging
+import random
+
+from lxml import etree
+
+DEFAULT_MAX_BYTES = 64 * 1024
+
+
+class WireTracer(object):
+  """
+  Logs the XML sent to and received from Exchange, for debugging. ::
+
+      service = Exchange2010Service(connection, tracer=WireTracer(enabled=True, max_bytes=4096, sample_rate=0.1))
+
+  Traces go to the ``pyexchange.wire`` logger at DEBUG level. Each one is cut off after *max_bytes*, and only
+  *sample_rate* (between 0 and 1) of all requests get traced.
+
+  Tracing is off by default, and nothing is serialized unless it's on *and* the logger would actually print it.
+  """
+
+  def __init__(self, enabled=False, max_bytes=DEFAULT_MAX_BYTES, sample_rate=1.0, logger=None):
+    self.enabled = enabled
+    self.max_bytes = max_bytes
+    self.sample_rate = sample_rate
+    self.log = logger or logging.getLogger('pyexchange.wire')
+
+  def sample(self):
+    """ Decides whether the next request, and the response to it, get traced. """
+    if not self.enabled or not self.log.isEnabledFor(logging.DEBUG):
+      return False
+
+    return self.sample_rate >= 1 or random.random() < self.sample_rate
+
+  def trace(self, label, payload):
+    """ Logs *payload* - an lxml element, bytes or text - under *label*. Only call this after :meth:`sample`. """
+    if isinstance(payload, bytes):
+      data = payload
+    elif etree.iselement(payload):
+      data = etree.tostring(payload, encoding='utf-8', pretty_print=True)
+    else:
+      data = payload.encode('utf-8')
+
+    truncated = u''
+    if self.max_bytes is not None and len(data) > self.max_bytes:
+      truncated = u'\n... %d more bytes' % (len(data) - self.max_bytes)
+      data = data[:self.max_bytes]
+
+    self.log.debug(u'%s:\n%s%s', label, data.decode('utf-8', 'replace'), truncated)
@@ -4,8 +4,14 @@ Licensed under the Apache License, Version 2.0 (the "License");?you may not use
 
 Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
+import random
+from multiprocessing.pool import ThreadPool
+
+from lxml import etree
 from pytz import utc
 
+from .compat import BASESTRING_TYPES
+
 
 def convert_datetime_to_utc(datetime_to_convert):
   if datetime_to_convert is None:
@@ -17,8 +23,44 @@ def convert_datetime_to_utc(datetime_to_convert):
     return utc.localize(datetime_to_convert)
 
 
-def auto_build_dict_from_xml(xml):
-  
+def backoff_delay(attempt, backoff_factor, max_backoff):
+  """
+  Returns how long to wait before retry number *attempt* (counting from zero).
+
+  Uses "full jitter" exponential backoff: a random delay between zero and backoff_factor * 2 ** attempt,
+  capped at max_backoff, so that many clients retrying at once don't hammer the server in lockstep.
+  """
+  return random.uniform(0, min(max_backoff, backoff_factor * (2 ** attempt)))
+
+
+def chunks(items, size):
+  """ Splits *items* into lists of at most *size* items. """
+  return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def parallel_map(func, items, max_workers):
+  """
+  Like map(), but calls *func* on up to *max_workers* threads at once. Results come back in the same order as
+  *items*, and the first exception raised by *func* is raised here.
+  """
+  items = list(items)
+
+  if max_workers <= 1 or len(items) <= 1:
+    return [func(item) for item in items]
+
+  pool = ThreadPool(min(max_workers, len(items)))
+  try:
+    return pool.map(func, items)
+  finally:
+    pool.terminate()
+
+
+def auto_build_dict_from_xml(xml, namespace_map=None):
+  """
+  Builds a property map (see ExchangeServiceSOAP._xpath_to_dict) with a property for each child of *xml*, named
+  after its tag. The xpaths point at those children in this document. With *namespace_map*, they're relative
+  to *xml* instead, so the map works for any element with the same children.
+  """
   import re
   from keyword import iskeyword
 
@@ -33,9 +75,17 @@ def auto_build_dict_from_xml(xml):
       return converted + "_"
     return converted
 
+  def relative_path(e):
+    name = etree.QName(e)
+    prefixes = [prefix for prefix, namespace in namespace_map.items() if namespace == name.namespace]
+    if prefixes:
+      return './%s:%s' % (prefixes[0], name.localname)
+    return './*[local-name()="%s"]' % name.localname
+
   return {
     convert(e.xpath('local-name()')): {
-      'xpath': xml.getroottree().getpath(e)
+      'xpath': relative_path(e) if namespace_map is not None else xml.getroottree().getpath(e)
     }
     for e in xml.getchildren()
+    if isinstance(e.tag, BASESTRING_TYPES)
   }
\ No newline at end of file
@@ -1248,6 +1248,61 @@ a-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema" MajorVersion="14" Minor
   </s:Body>
 </s:Envelope>"""
 
+GET_ITEMS_WITH_A_MISSING_ITEM = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:GetItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:CalendarItem>
+              <t:ItemId Id="id1" ChangeKey="ck2"/>
+              <t:Subject>Event Subject 1, in detail</t:Subject>
+            </t:CalendarItem>
+          </m:Items>
+        </m:GetItemResponseMessage>
+        <m:GetItemResponseMessage ResponseClass="Error">
+          <m:MessageText>The specified object was not found in the store.</m:MessageText>
+          <m:ResponseCode>ErrorItemNotFound</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+          <m:Items/>
+        </m:GetItemResponseMessage>
+      </m:ResponseMessages>
+    </m:GetItemResponse>
+  </s:Body>
+</s:Envelope>"""
+
+INTERNAL_SERVER_TRANSIENT_ERROR = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:GetItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetItemResponseMessage ResponseClass="Error">
+          <m:MessageText>An internal server error occurred. Try again later.</m:MessageText>
+          <m:ResponseCode>ErrorInternalServerTransientError</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+          <m:Items/>
+        </m:GetItemResponseMessage>
+      </m:ResponseMessages>
+    </m:GetItemResponse>
+  </s:Body>
+</s:Envelope>"""
+
+SERVER_BUSY_FAULT = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body>
+    <s:Fault>
+      <faultcode xmlns:a="http://schemas.microsoft.com/exchange/services/2006/types">a:ErrorServerBusy</faultcode>
+      <faultstring xml:lang="en-US">The server cannot service this request right now. Try again later.</faultstring>
+      <detail>
+        <e:ResponseCode xmlns:e="http://schemas.microsoft.com/exchange/services/2006/errors">ErrorServerBusy</e:ResponseCode>
+        <e:Message xmlns:e="http://schemas.microsoft.com/exchange/services/2006/errors">The server cannot service this request right now. Try again later.</e:Message>
+        <t:MessageXml xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+          <t:Value Name="BackOffMilliseconds">2500</t:Value>
+        </t:MessageXml>
+      </detail>
+    </s:Fault>
+  </s:Body>
+</s:Envelope>"""
+
 SOAP_FAULT = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
   <s:Body>
     <s:Fault>
@@ -1715,3 +1770,537 @@ LIST_EVENTS_RESPONSE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/
     </m:FindItemResponse>
   </s:Body>
 </s:Envelope>"""
+
+LIST_EVENTS_TRUNCATED_RESPONSE = LIST_EVENTS_RESPONSE.replace(u'IncludesLastItemInRange="true"', u'IncludesLastItemInRange="false"')
+
+CALENDAR_VIEW_RANGE_TOO_BIG = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:FindItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:FindItemResponseMessage ResponseClass="Error">
+          <m:MessageText>The time range of the calendar view is too big.</m:MessageText>
+          <m:ResponseCode>ErrorCalendarViewRangeTooBig</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+        </m:FindItemResponseMessage>
+      </m:ResponseMessages>
+    </m:FindItemResponse>
+  </s:Body>
+</s:Envelope>"""
+
+SYNC_FOLDER_ITEMS_FIRST_PAGE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:SyncFolderItemsResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:SyncFolderItemsResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:SyncState>state-1</m:SyncState>
+          <m:IncludesLastItemInRange>false</m:IncludesLastItemInRange>
+          <m:Changes>
+            <t:Create>
+              <t:CalendarItem>
+                <t:ItemId Id="created-id" ChangeKey="ck1"/>
+              </t:CalendarItem>
+            </t:Create>
+            <t:Update>
+              <t:CalendarItem>
+                <t:ItemId Id="updated-id" ChangeKey="ck2"/>
+              </t:CalendarItem>
+            </t:Update>
+            <t:Create>
+              <t:CalendarItem>
+                <t:ItemId Id="short-lived-id" ChangeKey="ck3"/>
+              </t:CalendarItem>
+            </t:Create>
+          </m:Changes>
+        </m:SyncFolderItemsResponseMessage>
+      </m:ResponseMessages>
+    </m:SyncFolderItemsResponse>
+  </s:Body>
+</s:Envelope>"""
+
+SYNC_FOLDER_ITEMS_LAST_PAGE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:SyncFolderItemsResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:SyncFolderItemsResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:SyncState>state-2</m:SyncState>
+          <m:IncludesLastItemInRange>true</m:IncludesLastItemInRange>
+          <m:Changes>
+            <t:Update>
+              <t:CalendarItem>
+                <t:ItemId Id="created-id" ChangeKey="ck4"/>
+              </t:CalendarItem>
+            </t:Update>
+            <t:ReadFlagChange>
+              <t:ItemId Id="read-id" ChangeKey="ck5"/>
+              <t:IsRead>true</t:IsRead>
+            </t:ReadFlagChange>
+            <t:Delete>
+              <t:ItemId Id="short-lived-id" ChangeKey="ck3"/>
+            </t:Delete>
+            <t:Delete>
+              <t:ItemId Id="deleted-id" ChangeKey="ck6"/>
+            </t:Delete>
+          </m:Changes>
+        </m:SyncFolderItemsResponseMessage>
+      </m:ResponseMessages>
+    </m:SyncFolderItemsResponse>
+  </s:Body>
+</s:Envelope>"""
+
+SYNC_FOLDER_HIERARCHY_RESPONSE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:SyncFolderHierarchyResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:SyncFolderHierarchyResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:SyncState>folder-state</m:SyncState>
+          <m:IncludesLastFolderInRange>true</m:IncludesLastFolderInRange>
+          <m:Changes>
+            <t:Create>
+              <t:CalendarFolder>
+                <t:FolderId Id="new-folder-id" ChangeKey="fck1"/>
+              </t:CalendarFolder>
+            </t:Create>
+            <t:Delete>
+              <t:FolderId Id="old-folder-id" ChangeKey="fck2"/>
+            </t:Delete>
+          </m:Changes>
+        </m:SyncFolderHierarchyResponseMessage>
+      </m:ResponseMessages>
+    </m:SyncFolderHierarchyResponse>
+  </s:Body>
+</s:Envelope>"""
+
+SYNC_STATE_INVALID = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:SyncFolderItemsResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:SyncFolderItemsResponseMessage ResponseClass="Error">
+          <m:MessageText>Synchronization state data is corrupt or otherwise invalid.</m:MessageText>
+          <m:ResponseCode>ErrorInvalidSyncStateData</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+        </m:SyncFolderItemsResponseMessage>
+      </m:ResponseMessages>
+    </m:SyncFolderItemsResponse>
+  </s:Body>
+</s:Envelope>"""
+
+SUBSCRIBE_RESPONSE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:SubscribeResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:SubscribeResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:SubscriptionId>subscription-1</m:SubscriptionId>
+          <m:Watermark>watermark-0</m:Watermark>
+        </m:SubscribeResponseMessage>
+      </m:ResponseMessages>
+    </m:SubscribeResponse>
+  </s:Body>
+</s:Envelope>"""
+
+GET_EVENTS_FIRST_RESPONSE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:GetEventsResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetEventsResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Notification>
+            <t:SubscriptionId>subscription-1</t:SubscriptionId>
+            <t:PreviousWatermark>watermark-0</t:PreviousWatermark>
+            <t:MoreEvents>true</t:MoreEvents>
+            <t:NewMailEvent>
+              <t:Watermark>watermark-1</t:Watermark>
+              <t:TimeStamp>2050-05-01T10:00:00Z</t:TimeStamp>
+              <t:ItemId Id="new-mail-id" ChangeKey="ck1"/>
+              <t:ParentFolderId Id="inbox-id" ChangeKey="fck1"/>
+            </t:NewMailEvent>
+          </m:Notification>
+        </m:GetEventsResponseMessage>
+      </m:ResponseMessages>
+    </m:GetEventsResponse>
+  </s:Body>
+</s:Envelope>"""
+
+GET_EVENTS_LAST_RESPONSE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:GetEventsResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetEventsResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Notification>
+            <t:SubscriptionId>subscription-1</t:SubscriptionId>
+            <t:PreviousWatermark>watermark-1</t:PreviousWatermark>
+            <t:MoreEvents>false</t:MoreEvents>
+            <t:MovedEvent>
+              <t:Watermark>watermark-2</t:Watermark>
+              <t:TimeStamp>2050-05-01T10:01:00Z</t:TimeStamp>
+              <t:ItemId Id="moved-id" ChangeKey="ck2"/>
+              <t:ParentFolderId Id="archive-id" ChangeKey="fck2"/>
+              <t:OldItemId Id="old-moved-id" ChangeKey="ck3"/>
+              <t:OldParentFolderId Id="inbox-id" ChangeKey="fck1"/>
+            </t:MovedEvent>
+            <t:StatusEvent>
+              <t:Watermark>watermark-3</t:Watermark>
+            </t:StatusEvent>
+          </m:Notification>
+        </m:GetEventsResponseMessage>
+      </m:ResponseMessages>
+    </m:GetEventsResponse>
+  </s:Body>
+</s:Envelope>"""
+
+SUBSCRIPTION_NOT_FOUND = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:GetEventsResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetEventsResponseMessage ResponseClass="Error">
+          <m:MessageText>The specified subscription was not found.</m:MessageText>
+          <m:ResponseCode>ErrorSubscriptionNotFound</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+        </m:GetEventsResponseMessage>
+      </m:ResponseMessages>
+    </m:GetEventsResponse>
+  </s:Body>
+</s:Envelope>"""
+
+GET_STREAMING_EVENTS_RESPONSE = u"""<Envelope xmlns="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap11:Body xmlns:soap11="http://schemas.xmlsoap.org/soap/envelope/">
+    <m:GetStreamingEventsResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetStreamingEventsResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:ConnectionStatus>OK</m:ConnectionStatus>
+        </m:GetStreamingEventsResponseMessage>
+      </m:ResponseMessages>
+    </m:GetStreamingEventsResponse>
+  </soap11:Body>
+</Envelope><Envelope xmlns="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap11:Body xmlns:soap11="http://schemas.xmlsoap.org/soap/envelope/">
+    <m:GetStreamingEventsResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetStreamingEventsResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Notifications>
+            <m:Notification>
+              <t:SubscriptionId>subscription-1</t:SubscriptionId>
+              <t:CreatedEvent>
+                <t:Watermark>watermark-1</t:Watermark>
+                <t:TimeStamp>2050-05-01T10:00:00Z</t:TimeStamp>
+                <t:ItemId Id="created-id" ChangeKey="ck1"/>
+                <t:ParentFolderId Id="calendar-id" ChangeKey="fck1"/>
+              </t:CreatedEvent>
+              <t:ModifiedEvent>
+                <t:Watermark>watermark-2</t:Watermark>
+                <t:TimeStamp>2050-05-01T10:00:01Z</t:TimeStamp>
+                <t:FolderId Id="calendar-id" ChangeKey="fck2"/>
+                <t:ParentFolderId Id="root-id" ChangeKey="fck3"/>
+                <t:UnreadCount>0</t:UnreadCount>
+              </t:ModifiedEvent>
+            </m:Notification>
+          </m:Notifications>
+        </m:GetStreamingEventsResponseMessage>
+      </m:ResponseMessages>
+    </m:GetStreamingEventsResponse>
+  </soap11:Body>
+</Envelope><Envelope xmlns="http://schemas.xmlsoap.org/soap/envelope/">
+  <soap11:Body xmlns:soap11="http://schemas.xmlsoap.org/soap/envelope/">
+    <m:GetStreamingEventsResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetStreamingEventsResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:ConnectionStatus>Closed</m:ConnectionStatus>
+        </m:GetStreamingEventsResponseMessage>
+      </m:ResponseMessages>
+    </m:GetStreamingEventsResponse>
+  </soap11:Body>
+</Envelope>"""
+
+UPDATE_ITEM_RESPONSE_WITH_NEW_CHANGE_KEY = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:UpdateItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:UpdateItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:CalendarItem>
+              <t:ItemId Id="{event.id}" ChangeKey="new-change-key"/>
+            </t:CalendarItem>
+          </m:Items>
+        </m:UpdateItemResponseMessage>
+      </m:ResponseMessages>
+    </m:UpdateItemResponse>
+  </s:Body>
+</s:Envelope>""".format(event=TEST_EVENT)
+
+UPDATE_ITEM_IRRESOLVABLE_CONFLICT = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:UpdateItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:UpdateItemResponseMessage ResponseClass="Error">
+          <m:MessageText>The send or update operation could not be performed because the change key passed in the request does not match the current change key for the item.</m:MessageText>
+          <m:ResponseCode>ErrorIrresolvableConflict</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+          <m:Items/>
+        </m:UpdateItemResponseMessage>
+      </m:ResponseMessages>
+    </m:UpdateItemResponse>
+  </s:Body>
+</s:Envelope>"""
+
+UPDATE_ITEM_STALE_CHANGE_KEY = UPDATE_ITEM_IRRESOLVABLE_CONFLICT.replace(u'ErrorIrresolvableConflict', u'ErrorStaleObject')
+
+CREATE_ITEMS_WITH_A_FAILURE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:CreateItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:CreateItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:CalendarItem>
+              <t:ItemId Id="first-new-id" ChangeKey="first-change-key"/>
+            </t:CalendarItem>
+          </m:Items>
+        </m:CreateItemResponseMessage>
+        <m:CreateItemResponseMessage ResponseClass="Error">
+          <m:MessageText>The user account which was used to submit this request does not have the right to create items in this folder.</m:MessageText>
+          <m:ResponseCode>ErrorCreateItemAccessDenied</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+          <m:Items/>
+        </m:CreateItemResponseMessage>
+        <m:CreateItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:CalendarItem>
+              <t:ItemId Id="third-new-id" ChangeKey="third-change-key"/>
+            </t:CalendarItem>
+          </m:Items>
+        </m:CreateItemResponseMessage>
+      </m:ResponseMessages>
+    </m:CreateItemResponse>
+  </s:Body>
+</s:Envelope>"""
+
+CREATE_ITEMS_WITH_A_BUSY_ITEM = CREATE_ITEMS_WITH_A_FAILURE.replace(u"""<m:MessageText>The user account which was used to submit this request does not have the right to create items in this folder.</m:MessageText>
+          <m:ResponseCode>ErrorCreateItemAccessDenied</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>""", u"""<m:MessageText>The server cannot service this request right now. Try again later.</m:MessageText>
+          <m:ResponseCode>ErrorServerBusy</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+          <m:MessageXml>
+            <t:Value Name="BackOffMilliseconds">10</t:Value>
+          </m:MessageXml>""")
+
+UPDATE_ITEMS_RESPONSE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:UpdateItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:UpdateItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:CalendarItem>
+              <t:ItemId Id="{event.id}" ChangeKey="first-change-key"/>
+            </t:CalendarItem>
+          </m:Items>
+        </m:UpdateItemResponseMessage>
+        <m:UpdateItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:CalendarItem>
+              <t:ItemId Id="{event.id}" ChangeKey="second-change-key"/>
+            </t:CalendarItem>
+          </m:Items>
+        </m:UpdateItemResponseMessage>
+      </m:ResponseMessages>
+    </m:UpdateItemResponse>
+  </s:Body>
+</s:Envelope>""".format(event=TEST_EVENT)
+
+UPDATE_ITEMS_WITH_A_CONFLICT = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:UpdateItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:UpdateItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:CalendarItem>
+              <t:ItemId Id="{event.id}" ChangeKey="first-change-key"/>
+            </t:CalendarItem>
+          </m:Items>
+        </m:UpdateItemResponseMessage>
+        <m:UpdateItemResponseMessage ResponseClass="Error">
+          <m:MessageText>The send or update operation could not be performed because the change key passed in the request does not match the current change key for the item.</m:MessageText>
+          <m:ResponseCode>ErrorIrresolvableConflict</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+          <m:Items/>
+        </m:UpdateItemResponseMessage>
+      </m:ResponseMessages>
+    </m:UpdateItemResponse>
+  </s:Body>
+</s:Envelope>""".format(event=TEST_EVENT)
+
+UPDATE_ITEMS_WITH_A_STALE_CHANGE_KEY = UPDATE_ITEMS_WITH_A_CONFLICT.replace(u'ErrorIrresolvableConflict', u'ErrorStaleObject')
+
+DELETE_ITEMS_WITH_A_STALE_CHANGE_KEY = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:DeleteItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:DeleteItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+        </m:DeleteItemResponseMessage>
+        <m:DeleteItemResponseMessage ResponseClass="Error">
+          <m:MessageText>The change key passed in the request does not match the current change key for the item.</m:MessageText>
+          <m:ResponseCode>ErrorStaleObject</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+        </m:DeleteItemResponseMessage>
+      </m:ResponseMessages>
+    </m:DeleteItemResponse>
+  </s:Body>
+</s:Envelope>"""
+
+MOVE_ITEMS_WITH_A_MISSING_ITEM = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:MoveItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:MoveItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:CalendarItem>
+              <t:ItemId Id="{event.id}" ChangeKey="{event.change_key}"/>
+            </t:CalendarItem>
+          </m:Items>
+        </m:MoveItemResponseMessage>
+        <m:MoveItemResponseMessage ResponseClass="Error">
+          <m:MessageText>The specified object was not found in the store.</m:MessageText>
+          <m:ResponseCode>ErrorItemNotFound</m:ResponseCode>
+          <m:DescriptiveLinkKey>0</m:DescriptiveLinkKey>
+          <m:Items/>
+        </m:MoveItemResponseMessage>
+      </m:ResponseMessages>
+    </m:MoveItemResponse>
+  </s:Body>
+</s:Envelope>""".format(event=TEST_EVENT_MOVED)
+
+# The 22nd moved to later in the day, and the 23rd deleted
+GET_RECURRING_MASTER_DAILY_EVENT_WITH_EXCEPTIONS = GET_RECURRING_MASTER_DAILY_EVENT.replace(u'</t:Recurrence>', u"""</t:Recurrence>
+              <t:ModifiedOccurrences>
+                <t:Occurrence>
+                  <t:ItemId Id="moved-occurrence" ChangeKey="DwAAABYAAAAKya75lDkfRK4qUlGlFIidAAAErmiU"/>
+                  <t:Start>2050-05-22T23:00:00Z</t:Start>
+                  <t:End>2050-05-22T23:30:00Z</t:End>
+                  <t:OriginalStart>2050-05-22T20:42:50Z</t:OriginalStart>
+                </t:Occurrence>
+              </t:ModifiedOccurrences>
+              <t:DeletedOccurrences>
+                <t:DeletedOccurrence>
+                  <t:Start>2050-05-23T20:42:50Z</t:Start>
+                </t:DeletedOccurrence>
+              </t:DeletedOccurrences>""")
+
+
+# A filtered listing too big for one FindItem: the first three events, and then the same three again
+LIST_EVENTS_FIRST_PAGE = LIST_EVENTS_RESPONSE.replace(u'<m:RootFolder TotalItemsInView="42" IncludesLastItemInRange="true">',
+                                                      u'<m:RootFolder IndexedPagingOffset="3" TotalItemsInView="6" IncludesLastItemInRange="false">')
+LIST_EVENTS_LAST_PAGE = LIST_EVENTS_RESPONSE.replace(u'<m:RootFolder TotalItemsInView="42" IncludesLastItemInRange="true">',
+                                                     u'<m:RootFolder IndexedPagingOffset="6" TotalItemsInView="6" IncludesLastItemInRange="true">')
+
+
+def list_messages_page(messages, offset, total, last):
+  items = u''.join(u"""
+              <t:Message>
+                <t:ItemId Id="{id}" ChangeKey="ck-{id}"/>
+                <t:Subject>{subject}</t:Subject>
+                <t:DateTimeReceived>2050-04-22T01:01:01Z</t:DateTimeReceived>
+                <t:IsRead>false</t:IsRead>
+              </t:Message>""".format(id=id, subject=subject) for id, subject in messages)
+
+  return u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:FindItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:FindItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:RootFolder IndexedPagingOffset="{offset}" TotalItemsInView="{total}" IncludesLastItemInRange="{last}">
+            <t:Items>{items}
+            </t:Items>
+          </m:RootFolder>
+        </m:FindItemResponseMessage>
+      </m:ResponseMessages>
+    </m:FindItemResponse>
+  </s:Body>
+</s:Envelope>""".format(items=items, offset=offset, total=total, last=u'true' if last else u'false')
+
+LIST_MESSAGES_FIRST_PAGE = list_messages_page([(u'message1', u'First'), (u'message2', u'Second')], offset=2, total=3, last=False)
+LIST_MESSAGES_LAST_PAGE = list_messages_page([(u'message3', u'Third')], offset=3, total=3, last=True)
+LIST_MESSAGES_EMPTY = list_messages_page([], offset=0, total=0, last=True)
+
+# Five messages, two to a page
+LIST_MESSAGES_PAGES = {
+  0: list_messages_page([(u'message1', u'First'), (u'message2', u'Second')], offset=2, total=5, last=False),
+  2: list_messages_page([(u'message3', u'Third'), (u'message4', u'Fourth')], offset=4, total=5, last=False),
+  4: list_messages_page([(u'message5', u'Fifth')], offset=5, total=5, last=True),
+}
+
+# What GetItem sends back when only the subject and start are asked for
+GET_EVENT_SUBJECT_AND_START = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:GetItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:CalendarItem>
+              <t:ItemId Id="{event.id}" ChangeKey="{event.change_key}"/>
+              <t:Subject>{event.subject}</t:Subject>
+              <t:Start>{event.start:%Y-%m-%dT%H:%M:%SZ}</t:Start>
+            </t:CalendarItem>
+          </m:Items>
+        </m:GetItemResponseMessage>
+      </m:ResponseMessages>
+    </m:GetItemResponse>
+  </s:Body>
+</s:Envelope>""".format(event=TEST_EVENT)
+
+GET_MESSAGE_RESPONSE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:GetItemResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:GetItemResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Items>
+            <t:Message>
+              <t:ItemId Id="message1" ChangeKey="ck-message1"/>
+              <t:Subject>First</t:Subject>
+              <t:Body BodyType="Text">Hello</t:Body>
+              <t:ToRecipients>
+                <t:Mailbox>
+                  <t:Name>Ada Lovelace</t:Name>
+                  <t:EmailAddress>lovelace@test.linkedin.com</t:EmailAddress>
+                </t:Mailbox>
+              </t:ToRecipients>
+              <t:IsRead>false</t:IsRead>
+            </t:Message>
+          </m:Items>
+        </m:GetItemResponseMessage>
+      </m:ResponseMessages>
+    </m:GetItemResponse>
+  </s:Body>
+</s:Envelope>"""
+
+CREATE_ATTACHMENT_RESPONSE = u"""<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/">
+  <s:Body xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:xsd="http://www.w3.org/2001/XMLSchema">
+    <m:CreateAttachmentResponse xmlns:m="http://schemas.microsoft.com/exchange/services/2006/messages" xmlns:t="http://schemas.microsoft.com/exchange/services/2006/types">
+      <m:ResponseMessages>
+        <m:CreateAttachmentResponseMessage ResponseClass="Success">
+          <m:ResponseCode>NoError</m:ResponseCode>
+          <m:Attachments>
+            <t:FileAttachment>
+              <t:AttachmentId Id="attachment1" RootItemId="message1" RootItemChangeKey="ck-message1-new"/>
+            </t:FileAttachment>
+          </m:Attachments>
+        </m:CreateAttachmentResponseMessage>
+      </m:ResponseMessages>
+    </m:CreateAttachmentResponse>
+  </s:Body>
+</s:Envelope>"""
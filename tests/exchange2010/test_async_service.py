@@ -0,0 +1,262 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import unittest
+import pytest
+from httpretty import HTTPretty, httprettified
+from mock import patch
+from pytest import raises
+from pyexchange.compat import HAS_ASYNCIO
+from pyexchange.connection import ExchangeNTLMAuthConnection
+from pyexchange.exceptions import *  # noqa
+
+from .fixtures import *  # noqa
+
+if not HAS_ASYNCIO:
+  pytest.skip("asyncio support needs Python 3.7 or later", allow_module_level=True)
+
+import asyncio  # noqa
+from pyexchange import AsyncExchange2010Service, ExchangeAsyncConnection  # noqa
+
+
+def run(coroutine):
+  return asyncio.get_event_loop().run_until_complete(coroutine)
+
+
+class Test_AsyncExchange2010Service(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    cls.service = AsyncExchange2010Service(
+      connection=ExchangeAsyncConnection(
+        ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL, username=FAKE_EXCHANGE_USERNAME, password=FAKE_EXCHANGE_PASSWORD),
+        max_concurrency=4,
+      )
+    )
+
+  @classmethod
+  def tearDownClass(cls):
+    cls.service.connection.close()
+    asyncio.get_event_loop().close()
+
+  @httprettified
+  def test_get_event(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=GET_ITEM_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    event = run(self.service.calendar().get_event(id=TEST_EVENT.id))
+
+    assert event.id == TEST_EVENT.id
+    assert event.subject == TEST_EVENT.subject
+
+  @httprettified
+  def test_get_event_with_only_some_fields(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=GET_ITEM_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    calendar = self.service.calendar(id=u'team-calendar')
+    event = run(calendar.get_event(id=TEST_EVENT.id, fields=[u'item:Subject']))
+
+    body = HTTPretty.last_request.body.decode('utf-8')
+    assert u'AllProperties' not in body
+    assert u'<t:FieldURI FieldURI="item:Subject"/>' in body
+    assert event.calendar_id == u'team-calendar'
+
+  @httprettified
+  def test_requests_run_concurrently(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=GET_ITEM_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    calendar = self.service.calendar()
+    events = run(asyncio.gather(*[calendar.get_event(id=TEST_EVENT.id) for _ in range(8)]))
+
+    assert [event.subject for event in events] == [TEST_EVENT.subject] * 8
+
+  @httprettified
+  def test_list_events(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=LIST_EVENTS_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    event_list = run(self.service.calendar().list_events(start=TEST_EVENT_LIST_START, end=TEST_EVENT_LIST_END))
+
+    assert event_list.count == len(event_list.events) > 0
+
+  @httprettified
+  def test_filtered_events_are_listed_a_page_at_a_time(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[
+        HTTPretty.Response(body=LIST_EVENTS_FIRST_PAGE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+        HTTPretty.Response(body=LIST_EVENTS_LAST_PAGE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+      ]
+    )
+
+    event_list = run(self.service.calendar().list_events(query_string=u'subject:standup'))
+
+    assert event_list.count == len(event_list.event_ids) == 6
+    assert u'Offset="3"' in HTTPretty.last_request.body.decode('utf-8')
+
+  @httprettified
+  def test_create_event(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=CREATE_ITEM_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    event = self.service.calendar().new_event(
+      subject=TEST_EVENT.subject, start=TEST_EVENT.start, end=TEST_EVENT.end,
+    )
+    run(event.create())
+
+    assert event.id == TEST_EVENT.id
+
+  @httprettified
+  def test_create_events(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=CREATE_ITEMS_WITH_A_FAILURE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    calendar = self.service.calendar()
+    events = [calendar.new_event(subject=TEST_EVENT.subject, start=TEST_EVENT.start, end=TEST_EVENT.end) for _ in range(3)]
+    result = run(calendar.create_events(events))
+
+    assert result.succeeded == [events[0], events[2]]
+    assert result.failed[0][0] is events[1]
+    assert events[2].id == u'third-new-id'
+
+  @httprettified
+  def test_update_events_retries_only_the_stale_ones(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=GET_ITEM_RESPONSE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+    calendar = self.service.calendar()
+    events = [run(calendar.get_event(id=TEST_EVENT.id)) for _ in range(2)]
+
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, responses=[
+      HTTPretty.Response(body=body.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8')
+      for body in (UPDATE_ITEMS_WITH_A_STALE_CHANGE_KEY, GET_ITEM_RESPONSE_ID_ONLY, UPDATE_ITEM_RESPONSE_WITH_NEW_CHANGE_KEY)
+    ])
+
+    for event in events:
+      event.subject = TEST_EVENT_UPDATED.subject
+    result = run(calendar.update_events(events))
+
+    assert result.ok
+    assert [event.change_key for event in events] == [u'first-change-key', u'new-change-key']
+
+  @httprettified
+  def test_get_folder(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=GET_FOLDER_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    folder = run(self.service.folder().get_folder(id=TEST_FOLDER.id))
+
+    assert folder.id == TEST_FOLDER.id
+
+  @httprettified
+  def test_list_messages_batch_pages_through_the_folder(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, responses=[
+      HTTPretty.Response(body=LIST_MESSAGES_PAGES[offset].encode('utf-8'), status=200, content_type='text/xml; charset=utf-8')
+      for offset in (0, 2, 4)
+    ])
+
+    async def subjects():
+      return [message.subject async for message in self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=2)]
+
+    assert run(subjects()) == [u'First', u'Second', u'Third', u'Fourth', u'Fifth']
+
+  @httprettified
+  def test_create_attachment(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=GET_MESSAGE_RESPONSE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+    message = run(self.service.mail().get_message(id=u'message1'))
+
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, responses=[
+      HTTPretty.Response(body=body.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8')
+      for body in (CREATE_ATTACHMENT_RESPONSE, GET_MESSAGE_RESPONSE.replace(u'ChangeKey="ck-message1"', u'ChangeKey="ck-message1-new"'))
+    ])
+
+    attachment = run(message.create_attachment(u'notes.txt', u'aGVsbG8='))
+
+    assert attachment.id == u'attachment1'
+    assert attachment.content == u'aGVsbG8='
+    assert message.change_key == u'ck-message1-new'
+
+  @httprettified
+  def test_refreshing_a_message_is_awaited(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=GET_MESSAGE_RESPONSE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+    message = run(self.service.mail().get_message(id=u'message1'))
+
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL,
+                           body=GET_MESSAGE_RESPONSE.replace(u'ChangeKey="ck-message1"', u'ChangeKey="ck-message1-new"').encode('utf-8'),
+                           content_type='text/xml; charset=utf-8')
+
+    assert run(message.refresh_id_and_change_key()) is message
+    assert message.change_key == u'ck-message1-new'
+
+  def test_fetching_by_id_without_awaiting_is_an_error(self):
+    with raises(TypeError):
+      self.service.calendar().event(id=TEST_EVENT.id)
+
+  @httprettified
+  def test_transient_errors_back_off_without_blocking(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[
+        HTTPretty.Response(body=INTERNAL_SERVER_TRANSIENT_ERROR.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+        HTTPretty.Response(body=GET_ITEM_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+      ]
+    )
+
+    sleeps = []
+
+    async def fake_sleep(delay):
+      sleeps.append(delay)
+
+    with patch('pyexchange.async_connection.asyncio.sleep', fake_sleep):
+      event = run(self.service.calendar().get_event(id=TEST_EVENT.id))
+
+    assert event.subject == TEST_EVENT.subject
+    assert len(sleeps) == 1
+
+  @httprettified
+  def test_listening_for_notifications(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[
+        HTTPretty.Response(body=SUBSCRIBE_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+        HTTPretty.Response(body=GET_EVENTS_LAST_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+      ]
+    )
+
+    listener = self.service.notifications().listen([u'inbox'], poll_interval=0)
+
+    async def first_event():
+      async for event in listener:
+        listener.stop()
+        return event
+
+    event = run(first_event())
+
+    assert event.item_id == u'moved-id'
+    assert listener.subscription.watermark == u'watermark-3'
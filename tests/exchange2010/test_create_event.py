@@ -12,6 +12,7 @@ from pyexchange import Exchange2010Service
 
 from pyexchange.connection import ExchangeNTLMAuthConnection
 from pyexchange.base.calendar import ExchangeEventAttendee
+from pyexchange.batch import ExchangeBatchResult
 from pyexchange.exceptions import *  # noqa
 
 from .fixtures import *  # noqa
@@ -324,3 +325,144 @@ class Test_CreatingANewEvent(unittest.TestCase):
     assert new_event.subject == "events can be pickled"
 
 
+
+
+class Test_CreatingEventsInBulk(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(connection=ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL, username=FAKE_EXCHANGE_USERNAME, password=FAKE_EXCHANGE_PASSWORD))
+
+  def setUp(self):
+    self.calendar = self.service.calendar()
+    self.events = [
+      self.calendar.new_event(subject=u'Training %d' % index, start=TEST_EVENT.start, end=TEST_EVENT.end) for index in range(3)
+    ]
+
+  @httprettified
+  def test_events_go_out_in_one_request(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=CREATE_ITEMS_WITH_A_FAILURE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    self.calendar.create_events(self.events)
+
+    body = HTTPretty.last_request.body.decode('utf-8')
+    assert body.count(u'<t:CalendarItem>') == 3
+    assert u'Training 0' in body and u'Training 2' in body
+
+  @httprettified
+  def test_ids_and_change_keys_are_mapped_back_to_the_events(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=CREATE_ITEMS_WITH_A_FAILURE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    self.calendar.create_events(self.events)
+
+    assert self.events[0].id == u'first-new-id'
+    assert self.events[0]._change_key == u'first-change-key'
+    assert self.events[2].id == u'third-new-id'
+    assert self.events[2]._change_key == u'third-change-key'
+
+  @httprettified
+  def test_failures_are_reported_per_event(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=CREATE_ITEMS_WITH_A_FAILURE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    result = self.calendar.create_events(self.events)
+
+    assert not result.ok
+    assert result.succeeded == [self.events[0], self.events[2]]
+    assert len(result.failed) == 1
+
+    event, error = result.failed[0]
+    assert event is self.events[1]
+    assert event.id is None
+    assert isinstance(error, FailedExchangeException)
+
+  @httprettified
+  def test_invalid_events_are_reported_and_not_sent(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=CREATE_ITEM_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    self.events[1].start = None
+    result = self.calendar.create_events(self.events[:2])
+
+    assert result.succeeded == [self.events[0]]
+    assert result.failed[0][0] is self.events[1]
+    assert isinstance(result.failed[0][1], ValueError)
+    assert HTTPretty.last_request.body.decode('utf-8').count(u'<t:CalendarItem>') == 1
+
+  @httprettified
+  def test_events_are_split_into_batches(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=CREATE_ITEM_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    result = self.calendar.create_events(self.events, batch_size=1, max_workers=1)
+
+    assert result.ok
+    assert [event.id for event in self.events] == [TEST_EVENT.id] * 3
+    assert HTTPretty.last_request.body.decode('utf-8').count(u'<t:CalendarItem>') == 1
+
+  @httprettified
+  def test_a_failed_request_fails_every_event_in_it(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=SOAP_FAULT.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    result = self.calendar.create_events(self.events)
+
+    assert result.succeeded == []
+    assert [event for event, error in result.failed] == self.events
+
+  @httprettified
+  def test_only_the_items_exchange_was_too_busy_for_are_sent_again(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[
+        HTTPretty.Response(body=CREATE_ITEMS_WITH_A_BUSY_ITEM.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+        HTTPretty.Response(body=CREATE_ITEM_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+      ]
+    )
+
+    result = self.calendar.create_events(self.events)
+
+    assert result.ok
+    assert [event.id for event in self.events] == [u'first-new-id', TEST_EVENT.id, u'third-new-id']
+
+    resent = HTTPretty.last_request.body.decode('utf-8')
+    assert resent.count(u'<t:CalendarItem>') == 1
+    assert u'Training 1' in resent
+
+  @httprettified
+  def test_items_exchange_stays_too_busy_for_are_reported(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=CREATE_ITEMS_WITH_A_BUSY_ITEM.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    result = self.calendar._send_batches([self.events], self.calendar._create_request, self.calendar._take_id_and_change_key, 1,
+                                         ExchangeBatchResult(), retries=0)
+
+    assert result.succeeded == [self.events[0], self.events[2]]
+    event, error = result.failed[0]
+    assert event is self.events[1]
+    assert isinstance(error, ExchangeServerBusyException)
+    assert error.back_off_milliseconds == 10
@@ -57,3 +57,50 @@ class Test_EventDeletion(unittest.TestCase):
     with raises(TypeError):
       unsaved_event.cancel() #bzzt - can't do this
 
+
+
+class Test_CancellingEventsInBulk(unittest.TestCase):
+
+  @httpretty.activate
+  def setUp(self):
+    self.calendar = Exchange2010Service(connection=ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL, username=FAKE_EXCHANGE_USERNAME, password=FAKE_EXCHANGE_PASSWORD)).calendar()
+
+    httpretty.register_uri(httpretty.POST, FAKE_EXCHANGE_URL,
+                           body=GET_ITEM_RESPONSE.encode('utf-8'),
+                           content_type='text/xml; charset=utf-8')
+
+    self.events = [self.calendar.get_event(id=TEST_EVENT.id) for _ in range(2)]
+
+  def register_responses(self, *bodies):
+    httpretty.register_uri(httpretty.POST, FAKE_EXCHANGE_URL, responses=[
+      httpretty.Response(body=body.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8') for body in bodies
+    ])
+
+  @httpretty.activate
+  def test_events_are_cancelled_in_one_delete_item(self):
+    self.register_responses(DELETE_ITEMS_WITH_A_STALE_CHANGE_KEY.replace(u'ErrorStaleObject', u'NoError'))
+
+    result = self.calendar.cancel_events(self.events)
+
+    assert result.ok
+    body = httpretty.last_request().body.decode('utf-8')
+    assert u'DeleteItem' in body
+    assert body.count(u'<t:ItemId ') == 2
+
+  @httpretty.activate
+  def test_only_stale_events_are_refreshed_and_retried(self):
+    self.register_responses(DELETE_ITEMS_WITH_A_STALE_CHANGE_KEY, GET_ITEM_RESPONSE_ID_ONLY, DELETE_ITEM_RESPONSE)
+
+    result = self.calendar.cancel_events(self.events)
+
+    assert result.ok
+    body = httpretty.last_request().body.decode('utf-8')
+    assert u'DeleteItem' in body
+    assert body.count(u'<t:ItemId ') == 1
+
+  def test_events_that_were_never_created_are_reported(self):
+    unsaved_event = self.calendar.event()
+
+    result = self.calendar.cancel_events([unsaved_event])
+
+    assert isinstance(result.failed[0][1], TypeError)
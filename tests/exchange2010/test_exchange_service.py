@@ -1 +1,205 @@
-__author__ = 'rsanders'
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import unittest
+from httpretty import HTTPretty, httprettified
+from mock import patch
+from pytest import raises
+from pyexchange import Exchange2010Service
+from lxml import etree
+from pyexchange.base.soap import ExchangeServiceSOAP, CompiledPropertyMap, compile_property_map
+from pyexchange.exchange2010.soap_request import NAMESPACES, TYPE_NS
+from pyexchange.connection import ExchangeNTLMAuthConnection
+from pyexchange.exceptions import *  # noqa
+
+from .fixtures import *  # noqa
+
+
+class Test_RetryingTransientErrors(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  @httprettified
+  def test_transient_errors_are_retried(self):
+
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[
+        HTTPretty.Response(body=INTERNAL_SERVER_TRANSIENT_ERROR.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+        HTTPretty.Response(body=GET_ITEM_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+      ]
+    )
+
+    with patch('pyexchange.connection.time.sleep') as mock_sleep:
+      event = self.service.calendar().get_event(id=TEST_EVENT.id)
+
+    assert event.subject == TEST_EVENT.subject
+    assert mock_sleep.call_count == 1
+
+  @httprettified
+  def test_transient_errors_are_raised_once_retries_are_used_up(self):
+
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=INTERNAL_SERVER_TRANSIENT_ERROR.encode('utf-8'),
+      content_type='text/xml; charset=utf-8'
+    )
+
+    with patch('pyexchange.connection.time.sleep') as mock_sleep:
+      with raises(ExchangeInternalServerTransientErrorException):
+        self.service.calendar().get_event(id=TEST_EVENT.id)
+
+    assert mock_sleep.call_count == 4
+
+  def test_connections_without_a_backoff_method_still_retry(self):
+
+    class BareConnection(object):
+      def __init__(self):
+        self.responses = [INTERNAL_SERVER_TRANSIENT_ERROR.encode('utf-8'), GET_ITEM_RESPONSE.encode('utf-8')]
+
+      def send(self, body, headers=None, retries=2, timeout=30, encoding=u'utf-8'):
+        return self.responses.pop(0)
+
+    service = Exchange2010Service(connection=BareConnection())
+
+    with patch('pyexchange.base.soap.time.sleep') as mock_sleep:
+      event = service.calendar().get_event(id=TEST_EVENT.id)
+
+    assert event.subject == TEST_EVENT.subject
+    assert mock_sleep.call_count == 1
+
+  def test_only_the_first_send_gets_transport_retries(self):
+
+    class CountingConnection(object):
+      def __init__(self):
+        self.transport_retries = []
+
+      def send(self, body, headers=None, retries=2, timeout=30, encoding=u'utf-8'):
+        self.transport_retries.append(retries)
+        return INTERNAL_SERVER_TRANSIENT_ERROR.encode('utf-8')
+
+    connection = CountingConnection()
+    service = Exchange2010Service(connection=connection)
+
+    with patch('pyexchange.base.soap.time.sleep'):
+      with raises(ExchangeInternalServerTransientErrorException):
+        service.calendar().get_event(id=TEST_EVENT.id)
+
+    assert connection.transport_retries == [4, 0, 0, 0, 0]
+
+
+class Test_BackingOffWhenExchangeIsBusy(unittest.TestCase):
+  service = None
+
+  def setUp(self):
+    self.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  @httprettified
+  def test_server_busy_pauses_for_the_requested_time_and_retries(self):
+
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[
+        HTTPretty.Response(body=SERVER_BUSY_FAULT.encode('utf-8'), status=500, content_type='text/xml; charset=utf-8'),
+        HTTPretty.Response(body=GET_ITEM_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+      ]
+    )
+
+    with patch.object(self.service.scheduler, 'pause') as mock_pause:
+      event = self.service.calendar().get_event(id=TEST_EVENT.id)
+
+    assert event.subject == TEST_EVENT.subject
+    mock_pause.assert_called_once_with(None, 2.5)
+
+  @httprettified
+  def test_server_busy_is_raised_once_retries_are_used_up(self):
+
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=SERVER_BUSY_FAULT.encode('utf-8'),
+      status=500,
+      content_type='text/xml; charset=utf-8'
+    )
+
+    with patch.object(self.service.scheduler, 'pause'):
+      with raises(ExchangeServerBusyException) as excinfo:
+        self.service.calendar().get_event(id=TEST_EVENT.id)
+
+    assert excinfo.value.back_off_milliseconds == 2500
+
+  @httprettified
+  def test_delegate_requests_are_throttled_per_mailbox(self):
+
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[
+        HTTPretty.Response(body=SERVER_BUSY_FAULT.encode('utf-8'), status=500, content_type='text/xml; charset=utf-8'),
+        HTTPretty.Response(body=LIST_EVENTS_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+      ]
+    )
+
+    with patch.object(self.service.scheduler, 'pause') as mock_pause:
+      self.service.calendar().list_events(start=TEST_EVENT_LIST_START, end=TEST_EVENT_LIST_END, delegate_for=u'boss@example.com')
+
+    mock_pause.assert_called_once_with(u'boss@example.com', 2.5)
+
+
+class Test_ParsingResponses(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = ExchangeServiceSOAP(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  def test_bytes_are_decoded_using_the_xml_declaration(self):
+    response = u'<?xml version="1.0" encoding="iso-8859-1"?><root>caf\xe9</root>'.encode('iso-8859-1')
+    assert self.service._parse(response).text == u'caf\xe9'
+
+  def test_text_from_custom_connections_is_still_accepted(self):
+    assert self.service._parse(u'<root>caf\xe9</root>').text == u'caf\xe9'
+
+  def test_garbage_raises(self):
+    with raises(FailedExchangeException):
+      self.service._parse(b'<html>Login required')
+
+  def test_property_maps_are_compiled_once(self):
+    property_map = {u'name': {u'xpath': u't:Name'}}
+
+    assert compile_property_map(property_map, NAMESPACES) is compile_property_map(property_map, NAMESPACES)
+
+  def test_compiled_property_maps_cast_values(self):
+    element = etree.fromstring(
+      u'<t:Attendee xmlns:t="%s"><t:Count>3</t:Count><t:Busy>True</t:Busy><t:Name>a</t:Name><t:Name>b</t:Name></t:Attendee>' % TYPE_NS
+    )
+    property_map = CompiledPropertyMap({
+      u'count': {u'xpath': u't:Count', u'cast': u'int'},
+      u'busy': {u'xpath': u't:Busy', u'cast': u'bool'},
+      u'names': {u'xpath': u't:Name'},
+      u'missing': {u'xpath': u't:Missing'},
+    }, namespace_map=NAMESPACES)
+
+    assert self.service._xpath_to_dict(element, property_map, NAMESPACES) == {u'count': 3, u'busy': True, u'names': [u'a', u'b']}
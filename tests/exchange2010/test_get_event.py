@@ -10,6 +10,7 @@ from pytest import raises
 from pyexchange import Exchange2010Service
 from pyexchange.connection import ExchangeNTLMAuthConnection
 from pyexchange.exceptions import *  # noqa
+from pytz import timezone
 
 from .fixtures import *  # noqa
 
@@ -455,3 +456,126 @@ class Test_GetConflictingEventsEmpty(unittest.TestCase):
 
   def test_conflicting_events_empty(self):
     assert len(self.event.conflicting_events()) == 0
+
+
+class Test_ExpandOccurrences(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  def get_master(self, response=GET_RECURRING_MASTER_DAILY_EVENT):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=response.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+    event = self.service.calendar().get_event(id=TEST_RECURRING_EVENT_DAILY.id)
+    self.requests_after_get = len(HTTPretty.latest_requests)
+    return event
+
+  @httprettified
+  def test_occurrences_match_what_exchange_has(self):
+    event = self.get_master()
+
+    occurrences = list(event.expand_occurrences(start=datetime(2050, 5, 1, tzinfo=utc), end=datetime(2050, 6, 1, tzinfo=utc)))
+
+    assert occurrences[:5] == [(occurrence.start, occurrence.end) for occurrence in TEST_EVENT_DAILY_OCCURRENCES]
+    # the series runs up to and including its end date
+    assert len(occurrences) == 6
+    assert len(HTTPretty.latest_requests) == self.requests_after_get
+
+  @httprettified
+  def test_only_occurrences_in_the_window_are_generated(self):
+    event = self.get_master()
+
+    occurrences = list(event.expand_occurrences(start=datetime(2050, 5, 21, 21, tzinfo=utc), end=datetime(2050, 5, 22, 21, tzinfo=utc)))
+
+    # the 21st is still going at the start of the window
+    assert [start.day for start, end in occurrences] == [21, 22]
+
+  @httprettified
+  def test_exceptions_are_applied(self):
+    event = self.get_master(GET_RECURRING_MASTER_DAILY_EVENT_WITH_EXCEPTIONS)
+
+    occurrences = list(event.expand_occurrences(start=datetime(2050, 5, 1, tzinfo=utc), end=datetime(2050, 6, 1, tzinfo=utc)))
+
+    assert [start.day for start, end in occurrences] == [20, 21, 22, 24, 25]
+    assert occurrences[2] == (datetime(2050, 5, 22, 23, tzinfo=utc), datetime(2050, 5, 22, 23, 30, tzinfo=utc))
+
+  @httprettified
+  def test_only_modified_occurrences_are_fetched(self):
+    event = self.get_master(GET_RECURRING_MASTER_DAILY_EVENT_WITH_EXCEPTIONS)
+
+    assert event.get_modified_occurrences(start=datetime(2050, 5, 24, tzinfo=utc)) == []
+    assert len(HTTPretty.latest_requests) == self.requests_after_get
+
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=GET_EVENT_OCCURRENCE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+    occurrences = event.get_modified_occurrences()
+
+    assert u'moved-occurrence' in HTTPretty.last_request.body.decode('utf-8')
+    assert len(occurrences) == 1
+
+  def test_occurrences_keep_their_wall_clock_time_across_daylight_saving(self):
+    pacific = timezone('US/Pacific')
+    event = self.service.calendar().new_event(
+      start=pacific.localize(datetime(2030, 3, 9, 9)),
+      end=pacific.localize(datetime(2030, 3, 9, 10)),
+      recurrence=u'daily',
+      recurrence_interval=1,
+      recurrence_end_date=date(2030, 3, 11),
+    )
+
+    occurrences = list(event.expand_occurrences(start=datetime(2030, 3, 1, tzinfo=utc), end=datetime(2030, 4, 1, tzinfo=utc), tz=pacific))
+
+    assert [start.astimezone(pacific).hour for start, end in occurrences] == [9, 9, 9]
+    assert [start.hour for start, end in occurrences] == [17, 16, 16]
+
+  def test_events_that_dont_recur_have_one_occurrence(self):
+    event = self.service.calendar().new_event(start=TEST_EVENT.start, end=TEST_EVENT.end)
+
+    assert list(event.expand_occurrences(start=TEST_EVENT_LIST_START, end=TEST_EVENT_LIST_END)) == [(TEST_EVENT.start, TEST_EVENT.end)]
+
+
+class Test_GettingOnlySomeFieldsOfAnEvent(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL, username=FAKE_EXCHANGE_USERNAME, password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  @httprettified
+  def test_only_the_fields_asked_for_are_filled_in(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=GET_EVENT_SUBJECT_AND_START.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    event = self.service.calendar().get_event(id=TEST_EVENT.id, fields=[u'item:Subject', u'calendar:Start'])
+
+    body = HTTPretty.last_request.body.decode('utf-8')
+    assert u'<t:BaseShape>IdOnly</t:BaseShape>' in body
+    assert u'<t:FieldURI FieldURI="item:Subject"/><t:FieldURI FieldURI="calendar:Start"/>' in body
+
+    assert event.id == TEST_EVENT.id
+    assert event.change_key == TEST_EVENT.change_key
+    assert event.subject == TEST_EVENT.subject
+    assert event.start == TEST_EVENT.start
+    assert event.location is None
+    assert event._dirty_attributes == set()
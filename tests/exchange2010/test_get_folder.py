@@ -98,3 +98,30 @@ class Test_FailingToGetFolders(unittest.TestCase):
 
     with raises(FailedExchangeException):
      self.service.folder().get_folder(id=TEST_FOLDER.id)
+
+
+class Test_GettingOnlySomeFieldsOfAFolder(unittest.TestCase):
+
+  @httpretty.activate
+  def test_only_the_fields_asked_for_are_requested(self):
+    service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD,
+      )
+    )
+
+    httpretty.register_uri(
+      httpretty.POST,
+      FAKE_EXCHANGE_URL,
+      body=GET_FOLDER_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8',
+    )
+
+    folder = service.folder().get_folder(id=TEST_FOLDER.id, fields=[u'folder:DisplayName'])
+
+    body = httpretty.last_request().body.decode('utf-8')
+    assert u'<m:FolderShape><t:BaseShape>IdOnly</t:BaseShape><t:AdditionalProperties><t:FieldURI FieldURI="folder:DisplayName"/>' in body
+    assert folder.id == TEST_FOLDER.id
+    assert folder.display_name == TEST_FOLDER.display_name
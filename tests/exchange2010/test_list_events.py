@@ -1,10 +1,15 @@
 
 import unittest
+from datetime import datetime, timedelta
+from pytz import utc
 from pytest import raises
 from httpretty import HTTPretty, httprettified
+from mock import patch
 from pyexchange import Exchange2010Service
 from pyexchange.connection import ExchangeNTLMAuthConnection
+from pyexchange.exchange2010 import soap_request
 from pyexchange.exceptions import *
+from pyexchange.restriction import Contains
 
 from .fixtures import *
 
@@ -51,6 +56,377 @@ class Test_ParseEventListResponseData(unittest.TestCase):
     def test_second_event_subject(self):
         assert self.event_list.events[1].subject == 'Event Subject 2'
 
+    def test_events_can_be_indexed_by_time(self):
+        index = self.event_list.interval_index()
+
+        assert len(index) == self.event_list.count
+        for event in self.event_list.events:
+            assert event in index.overlapping(event.start, event.end)
+
+    def test_each_event_is_read_from_its_own_item(self):
+        assert [event.id for event in self.event_list.events] == ['id1', 'id2', 'id3']
+        assert [event.change_key for event in self.event_list.events] == ['ck1', 'ck1', 'ck4']
+
+
+class Test_StreamingEventList(unittest.TestCase):
+    service = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = Exchange2010Service(
+            connection=ExchangeNTLMAuthConnection(
+                url=FAKE_EXCHANGE_URL,
+                username=FAKE_EXCHANGE_USERNAME,
+                password=FAKE_EXCHANGE_PASSWORD
+            )
+        )
+
+    @httprettified
+    def test_events_are_streamed(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            body=LIST_EVENTS_RESPONSE.encode('utf-8'),
+            content_type='text/xml; charset=utf-8'
+        )
+
+        events = self.service.calendar().list_events(
+            start=TEST_EVENT_LIST_START,
+            end=TEST_EVENT_LIST_END,
+            stream=True
+        )
+
+        assert [event.subject for event in events] == ['Event Subject 1', 'Event Subject 2', 'Subject 3']
+
+    @httprettified
+    def test_errors_are_raised_before_any_events_are_streamed(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            body=ITEM_DOES_NOT_EXIST.encode('utf-8'),
+            content_type='text/xml; charset=utf-8'
+        )
+
+        events = self.service.calendar().list_events(
+            start=TEST_EVENT_LIST_START,
+            end=TEST_EVENT_LIST_END,
+            stream=True
+        )
+
+        with raises(ExchangeItemNotFoundException):
+            next(events)
+
+    def test_streaming_with_details_is_not_supported(self):
+        with raises(ValueError):
+            self.service.calendar().list_events(details=True, stream=True)
+
+
+class Test_FilteringEventList(unittest.TestCase):
+    service = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = Exchange2010Service(
+            connection=ExchangeNTLMAuthConnection(
+                url=FAKE_EXCHANGE_URL,
+                username=FAKE_EXCHANGE_USERNAME,
+                password=FAKE_EXCHANGE_PASSWORD
+            )
+        )
+
+    @httprettified
+    def test_restrictions_are_sent_with_the_time_window_instead_of_a_calendar_view(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            body=LIST_EVENTS_RESPONSE.encode('utf-8'),
+            content_type='text/xml; charset=utf-8'
+        )
+
+        event_list = self.service.calendar().list_events(
+            start=TEST_EVENT_LIST_START,
+            end=TEST_EVENT_LIST_END,
+            restriction=Contains(u'calendar:Location', u'Boardroom')
+        )
+
+        body = HTTPretty.last_request.body.decode('utf-8')
+        assert event_list.count == 3
+        assert u'CalendarView' not in body
+        assert u'<t:FieldURI FieldURI="calendar:Location"/><t:Constant Value="Boardroom"/>' in body
+        assert u'<t:FieldURI FieldURI="calendar:Start"/><t:FieldURIOrConstant><t:Constant Value="%s"/>' % TEST_EVENT_LIST_END.strftime(EXCHANGE_DATETIME_FORMAT) in body
+
+    @httprettified
+    def test_query_strings_are_sent_after_the_folder_without_a_restriction(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            body=LIST_EVENTS_RESPONSE.encode('utf-8'),
+            content_type='text/xml; charset=utf-8'
+        )
+
+        events = self.service.calendar().list_events(
+            start=TEST_EVENT_LIST_START,
+            end=TEST_EVENT_LIST_END,
+            query_string=u'subject:standup',
+            stream=True
+        )
+
+        assert len(list(events)) == 3
+
+        body = HTTPretty.last_request.body.decode('utf-8')
+        assert u'</m:ParentFolderIds><m:QueryString>subject:standup</m:QueryString>' in body
+        assert u'Restriction' not in body
+
+    @httprettified
+    def test_searches_are_held_to_the_time_window_as_they_come_back(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            body=LIST_EVENTS_RESPONSE.encode('utf-8'),
+            content_type='text/xml; charset=utf-8'
+        )
+
+        start, end = datetime(2050, 5, 1, 15, 0), datetime(2050, 5, 10)
+        calendar = self.service.calendar()
+
+        event_list = calendar.list_events(start=start, end=end, query_string=u'subject:standup')
+        streamed = list(calendar.list_events(start=start, end=end, query_string=u'subject:standup', stream=True))
+
+        assert event_list.count == len(event_list.event_ids) == 1
+        assert event_list.events[0].end == utc.localize(datetime(2050, 5, 1, 16, 0))
+        assert [event.id for event in streamed] == event_list.event_ids
+
+    def test_restrictions_and_query_strings_cant_go_together(self):
+        with raises(ValueError):
+            self.service.calendar().list_events(restriction=Contains(u'calendar:Location', u'Boardroom'), query_string=u'subject:standup')
+
+        with raises(ValueError):
+            soap_request.get_message_items(folder_id=u'inbox', restriction=Contains(u'item:Subject', u'invoice'), query_string=u'from:alice')
+
+
+    @httprettified
+    def test_a_window_left_open_is_not_sent(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            body=LIST_EVENTS_RESPONSE.encode('utf-8'),
+            content_type='text/xml; charset=utf-8'
+        )
+
+        self.service.calendar().list_events(restriction=Contains(u'calendar:Location', u'Boardroom'))
+
+        body = HTTPretty.last_request.body.decode('utf-8')
+        assert u'None' not in body
+        assert u'calendar:Start' not in body and u'calendar:End' not in body
+        assert u'<m:Restriction><t:Contains' in body
+
+    @httprettified
+    def test_filtered_events_are_fetched_a_page_at_a_time(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            responses=[
+                HTTPretty.Response(body=LIST_EVENTS_FIRST_PAGE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(body=LIST_EVENTS_LAST_PAGE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+            ]
+        )
+
+        with patch.object(soap_request, u'find_calendar_items', wraps=soap_request.find_calendar_items) as find_calendar_items:
+            event_list = self.service.calendar().list_events(
+                start=TEST_EVENT_LIST_START,
+                end=TEST_EVENT_LIST_END,
+                restriction=Contains(u'calendar:Location', u'Boardroom')
+            )
+
+        assert event_list.count == 6
+        assert len(event_list.event_ids) == 6
+        assert [call[1][u'offset'] for call in find_calendar_items.call_args_list] == [0, 3]
+
+    @httprettified
+    def test_streamed_filtered_events_are_fetched_a_page_at_a_time(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            responses=[
+                HTTPretty.Response(body=LIST_EVENTS_FIRST_PAGE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(body=LIST_EVENTS_LAST_PAGE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+            ]
+        )
+
+        events = self.service.calendar().list_events(query_string=u'subject:standup', stream=True)
+
+        assert len(list(events)) == 6
+        assert u'<m:IndexedPageItemView MaxEntriesReturned="100" Offset="3"' in HTTPretty.last_request.body.decode('utf-8')
+
+
+class Test_LoadingEventDetails(unittest.TestCase):
+    service = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = Exchange2010Service(
+            connection=ExchangeNTLMAuthConnection(
+                url=FAKE_EXCHANGE_URL,
+                username=FAKE_EXCHANGE_USERNAME,
+                password=FAKE_EXCHANGE_PASSWORD
+            )
+        )
+
+    @httprettified
+    def test_details_are_loaded_in_batches_and_failures_are_kept_per_event(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            responses=[
+                HTTPretty.Response(body=LIST_EVENTS_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(body=GET_ITEMS_WITH_A_MISSING_ITEM.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(body=GET_ITEM_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+            ]
+        )
+
+        event_list = self.service.calendar().list_events(
+            start=TEST_EVENT_LIST_START,
+            end=TEST_EVENT_LIST_END
+        )
+        event_list.load_all_details(batch_size=2, max_workers=1)
+
+        assert [event.subject for event in event_list.events] == [u'Event Subject 1, in detail', u'Event Subject 2', TEST_EVENT.subject]
+        assert list(event_list.errors) == [u'id2']
+        assert isinstance(event_list.errors[u'id2'], ExchangeItemNotFoundException)
+
+    @httprettified
+    def test_a_failed_batch_does_not_lose_the_other_batches(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            responses=[
+                HTTPretty.Response(body=LIST_EVENTS_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(body=SOAP_FAULT.encode('utf-8'), status=500, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(body=GET_ITEM_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+            ]
+        )
+
+        event_list = self.service.calendar().list_events(
+            start=TEST_EVENT_LIST_START,
+            end=TEST_EVENT_LIST_END
+        )
+        event_list.load_all_details(batch_size=2, max_workers=1)
+
+        assert event_list.events[2].subject == TEST_EVENT.subject
+        assert sorted(event_list.errors) == [u'id1', u'id2']
+        assert isinstance(event_list.errors[u'id1'], FailedExchangeException)
+
+    @httprettified
+    def test_events_exchange_could_not_look_up_for_now_are_asked_for_again(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            responses=[
+                HTTPretty.Response(body=LIST_EVENTS_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(
+                    body=GET_ITEMS_WITH_A_MISSING_ITEM.replace(u'ErrorItemNotFound', u'ErrorInternalServerTransientError').encode('utf-8'),
+                    status=200, content_type='text/xml; charset=utf-8'
+                ),
+                HTTPretty.Response(body=GET_ITEM_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(body=GET_ITEM_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+            ]
+        )
+
+        event_list = self.service.calendar().list_events(
+            start=TEST_EVENT_LIST_START,
+            end=TEST_EVENT_LIST_END
+        )
+
+        with patch('pyexchange.connection.time.sleep'):
+            with patch.object(soap_request, u'get_item', wraps=soap_request.get_item) as get_item:
+                event_list.load_all_details(batch_size=2, max_workers=1)
+
+        assert [call[1][u'exchange_id'] for call in get_item.call_args_list] == [[u'id1', u'id2'], [u'id3'], [u'id2']]
+        assert event_list.errors == {}
+        assert event_list.events[1].subject == TEST_EVENT.subject
+
+
+class Test_IteratingOverEvents(unittest.TestCase):
+    service = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = Exchange2010Service(
+            connection=ExchangeNTLMAuthConnection(
+                url=FAKE_EXCHANGE_URL,
+                username=FAKE_EXCHANGE_USERNAME,
+                password=FAKE_EXCHANGE_PASSWORD
+            )
+        )
+
+    @httprettified
+    def test_events_in_several_windows_are_only_generated_once(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            body=LIST_EVENTS_RESPONSE.encode('utf-8'),
+            content_type='text/xml; charset=utf-8'
+        )
+
+        events = self.service.calendar().iter_events(start=TEST_EVENT_LIST_START, end=TEST_EVENT_LIST_END, window=timedelta(days=7))
+
+        assert [event.id for event in events] == ['id1', 'id2', 'id3']
+
+    @httprettified
+    def test_truncated_windows_are_split(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            responses=[
+                HTTPretty.Response(body=LIST_EVENTS_TRUNCATED_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(body=LIST_EVENTS_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+            ]
+        )
+
+        events = self.service.calendar().iter_events(start=TEST_EVENT_LIST_START, end=TEST_EVENT_LIST_END, window=timedelta(days=30))
+
+        assert [event.id for event in events] == ['id1', 'id2', 'id3']
+        assert 'MaxEntriesReturned="100"' in HTTPretty.last_request.body.decode('utf-8')
+
+    @httprettified
+    def test_windows_exchange_says_are_too_big_are_split(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            responses=[
+                HTTPretty.Response(body=CALENDAR_VIEW_RANGE_TOO_BIG.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+                HTTPretty.Response(body=LIST_EVENTS_RESPONSE.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8'),
+            ]
+        )
+
+        events = self.service.calendar().iter_events(start=TEST_EVENT_LIST_START, end=TEST_EVENT_LIST_END, window=timedelta(days=30))
+
+        assert [event.id for event in events] == ['id1', 'id2', 'id3']
+
+
+class Test_ListingEventsInParallel(unittest.TestCase):
+    service = None
+
+    @classmethod
+    def setUpClass(cls):
+        cls.service = Exchange2010Service(
+            connection=ExchangeNTLMAuthConnection(
+                url=FAKE_EXCHANGE_URL,
+                username=FAKE_EXCHANGE_USERNAME,
+                password=FAKE_EXCHANGE_PASSWORD
+            )
+        )
+
+    @httprettified
+    def test_events_are_merged_in_start_order_without_duplicates(self):
+        HTTPretty.register_uri(
+            HTTPretty.POST, FAKE_EXCHANGE_URL,
+            body=LIST_EVENTS_RESPONSE.encode('utf-8'),
+            content_type='text/xml; charset=utf-8'
+        )
+
+        events = self.service.calendar().list_events_in_parallel(start=TEST_EVENT_LIST_START, end=TEST_EVENT_LIST_END, max_workers=3)
+
+        assert [event.id for event in events] == ['id1', 'id2', 'id3']
+
+    def test_busy_slices_get_windows_of_their_own_and_empty_ones_are_skipped(self):
+        day = timedelta(days=1)
+        slices = [(TEST_EVENT_LIST_START + day * i, TEST_EVENT_LIST_START + day * (i + 1)) for i in range(6)]
+
+        windows = self.service.calendar()._group_slices(slices, [5, 5, 0, 0, 30, 2], max_workers=2, page_size=100)
+
+        assert windows == [
+            (slices[0][0], slices[2][0]),
+            (slices[4][0], slices[5][0]),
+            (slices[5][0], slices[5][1]),
+        ]
+
 
 class Test_FailingToListEvents(unittest.TestCase):
     service = None
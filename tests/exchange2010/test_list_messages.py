@@ -0,0 +1,360 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import unittest
+from httpretty import HTTPretty, httprettified
+from lxml import etree
+from mock import patch
+from pytest import raises
+from pyexchange import Exchange2010Service
+from pyexchange.connection import ExchangeNTLMAuthConnection
+from pyexchange.base import soap
+from pyexchange.exchange2010 import soap_request
+from pyexchange.exchange2010.mail import Exchange2010Message
+from pyexchange.restriction import IsEqualTo, Contains
+
+from .fixtures import *
+
+
+def list_response(body):
+  return HTTPretty.Response(body=body.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8')
+
+
+def requested_pages():
+  return patch.object(soap_request, u'get_message_items', wraps=soap_request.get_message_items)
+
+
+class Test_ListingMessagesInPages(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  @httprettified
+  def test_messages_come_from_every_page(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[list_response(LIST_MESSAGES_FIRST_PAGE), list_response(LIST_MESSAGES_LAST_PAGE)]
+    )
+
+    messages = self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=2)
+
+    assert [message.id for message in messages] == [u'message1', u'message2', u'message3']
+    assert messages.total == 3
+
+  @httprettified
+  def test_each_page_starts_where_the_last_one_stopped(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[list_response(LIST_MESSAGES_FIRST_PAGE), list_response(LIST_MESSAGES_LAST_PAGE)]
+    )
+
+    with requested_pages() as get_message_items:
+      list(self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=2))
+
+    pages = [(call[1][u'offset'], call[1][u'max_entries']) for call in get_message_items.call_args_list]
+    assert pages == [(0, 2), (2, 2)]
+
+  @httprettified
+  def test_pages_are_only_fetched_as_they_are_needed(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[list_response(LIST_MESSAGES_FIRST_PAGE), list_response(LIST_MESSAGES_LAST_PAGE)]
+    )
+
+    with requested_pages() as get_message_items:
+      messages = iter(self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=2))
+      assert get_message_items.call_count == 0
+
+      next(messages)
+      next(messages)
+      assert get_message_items.call_count == 1
+
+  @httprettified
+  def test_an_empty_folder_has_no_messages(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=LIST_MESSAGES_EMPTY.encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    assert list(self.service.mail().list_messages_batch(folder_id=u'inbox')) == []
+    assert len(self.service.mail().list_messages(folder_id=u'inbox')) == 0
+
+  @httprettified
+  def test_messages_share_one_compiled_property_map(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=LIST_MESSAGES_PAGES[0].encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    with patch.dict(soap._compiled_property_maps, clear=True), patch.dict(Exchange2010Message._property_maps, clear=True):
+      messages = list(self.service.mail().list_messages(folder_id=u'inbox'))
+      assert soap._compiled_property_maps == {}
+      assert len(Exchange2010Message._property_maps) == 1
+
+    assert [message.subject for message in messages] == [u'First', u'Second']
+    assert messages[0].is_read is False
+
+  @httprettified
+  def test_every_property_exchange_sends_is_kept(self):
+    page = LIST_MESSAGES_PAGES[0].replace(u'<t:IsRead>false</t:IsRead>', u"""<t:IsRead>false</t:IsRead>
+                <t:WebClientReadFormQueryString>?ae=Item&amp;t=IPM.Note</t:WebClientReadFormQueryString>
+                <t:Categories><t:String>Invoices</t:String></t:Categories>""")
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=page.encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    message = list(self.service.mail().list_messages(folder_id=u'inbox'))[0]
+
+    assert message.web_client_read_form_query_string == u'?ae=Item&t=IPM.Note'
+    assert hasattr(message, u'categories')
+    assert message.is_read is False
+
+
+class Test_PrefetchingMessagePages(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  def serve_pages(self, pages):
+    """
+    Answers each FindItem with the page at the offset it asked for, however the requests are interleaved. The
+    pages are handed straight back from send(), since httpretty can mix up responses to requests on other threads.
+    """
+    def page_for_request(request, **kwargs):
+      view = request.xpath(u'//m:IndexedPageItemView', namespaces=soap_request.NAMESPACES)[0]
+      return etree.fromstring(pages[int(view.get(u'Offset'))].encode('utf-8'))
+
+    return patch.object(self.service, u'send', side_effect=page_for_request)
+
+  def short_pages(self, total, short_at=None):
+    """ Pages of two messages, whatever was asked for - except the one at *short_at*, which only has one. """
+    pages = {}
+    for offset in range(total):
+      count = 1 if offset == short_at else 2
+      ids = [(u'message%d' % index, u'Message') for index in range(offset, min(offset + count, total))]
+      pages[offset] = list_messages_page(ids, offset=offset + len(ids), total=total, last=offset + len(ids) >= total)
+    return pages
+
+  def test_messages_come_out_in_folder_order(self):
+    with self.serve_pages(LIST_MESSAGES_PAGES):
+      messages = self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=2, prefetch=3)
+
+      assert [message.id for message in messages] == [u'message1', u'message2', u'message3', u'message4', u'message5']
+      assert messages.total == 5
+
+  def test_every_page_is_asked_for_once(self):
+    with self.serve_pages(LIST_MESSAGES_PAGES), requested_pages() as get_message_items:
+      list(self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=2, prefetch=3))
+
+    assert sorted(call[1][u'offset'] for call in get_message_items.call_args_list) == [0, 2, 4]
+
+  def test_pages_step_by_what_exchange_actually_returns(self):
+    with self.serve_pages(self.short_pages(12)), requested_pages() as get_message_items:
+      messages = list(self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=4, prefetch=3))
+
+    assert [message.id for message in messages] == [u'message%d' % index for index in range(12)]
+    assert sorted(call[1][u'offset'] for call in get_message_items.call_args_list) == [0, 2, 4, 6, 8, 10]
+
+  def test_pages_that_dont_line_up_are_fetched_again_in_order(self):
+    with self.serve_pages(self.short_pages(8, short_at=2)):
+      messages = list(self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=2, prefetch=3))
+
+    assert [message.id for message in messages] == [u'message%d' % index for index in range(8)]
+
+  def test_no_more_than_the_prefetch_limit_are_fetched_ahead(self):
+    pages = dict((offset, list_messages_page([(u'message%d' % offset, u'Message')], offset=offset + 1, total=6, last=offset == 5)) for offset in range(6))
+
+    with self.serve_pages(pages), requested_pages() as get_message_items:
+      messages = iter(self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=1, prefetch=2))
+
+      next(messages)
+      assert get_message_items.call_count == 1
+
+      # Reading the second page lets one more go out behind the one still in flight, and no further
+      next(messages)
+      messages.close()
+
+    # Pages that were asked for but hadn't gone out yet are dropped when the generator is closed
+    assert max(call[1][u'offset'] for call in get_message_items.call_args_list) <= 3
+
+  def test_a_single_page_folder_needs_no_prefetching(self):
+    with self.serve_pages({0: LIST_MESSAGES_EMPTY}):
+      assert list(self.service.mail().list_messages_batch(folder_id=u'inbox', prefetch=4)) == []
+
+
+class Test_SortingMessages(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  def sort_order(self, request):
+    return [
+      (field_order.get(u'Order'), field_order.find(u'{%s}FieldURI' % soap_request.TYPE_NS).get(u'FieldURI'))
+      for field_order in request.xpath(u'//m:SortOrder/t:FieldOrder', namespaces=soap_request.NAMESPACES)
+    ]
+
+  @httprettified
+  def test_paged_messages_are_newest_first_by_default(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=LIST_MESSAGES_LAST_PAGE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    list(self.service.mail().list_messages_batch(folder_id=u'inbox'))
+
+    request = etree.fromstring(HTTPretty.last_request.body)
+    assert self.sort_order(request) == [(u'Descending', u'item:DateTimeReceived')]
+    assert request.xpath(u'//m:GroupBy', namespaces=soap_request.NAMESPACES) == []
+
+  @httprettified
+  def test_listed_messages_are_in_folder_order_by_default(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=LIST_MESSAGES_LAST_PAGE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    self.service.mail().list_messages(folder_id=u'inbox')
+
+    request = etree.fromstring(HTTPretty.last_request.body)
+    assert self.sort_order(request) == []
+
+  @httprettified
+  def test_messages_can_be_sorted_by_anything(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=LIST_MESSAGES_LAST_PAGE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    list(self.service.mail().list_messages_batch(folder_id=u'inbox', order_by=[u'item:Subject', (u'item:DateTimeReceived', u'Descending')]))
+
+    request = etree.fromstring(HTTPretty.last_request.body)
+    assert self.sort_order(request) == [(u'Ascending', u'item:Subject'), (u'Descending', u'item:DateTimeReceived')]
+
+  def test_sort_order_comes_before_the_folder(self):
+    request = soap_request.get_message_items(folder_id=u'inbox', order_by=(u'item:Subject', u'Descending'), group_by=u'item:Importance')
+
+    assert [etree.QName(child).localname for child in request] == [u'ItemShape', u'IndexedPageItemView', u'GroupBy', u'SortOrder', u'ParentFolderIds']
+    assert self.sort_order(request) == [(u'Descending', u'item:Subject')]
+
+  def test_grouping_is_left_out_unless_asked_for(self):
+    request = soap_request.get_message_items(folder_id=u'inbox')
+
+    assert request.xpath(u'//m:GroupBy|//m:SortOrder', namespaces=soap_request.NAMESPACES) == []
+
+  def test_unknown_sort_orders_are_rejected(self):
+    with raises(ValueError):
+      soap_request.get_message_items(folder_id=u'inbox', order_by=[(u'item:Subject', u'Sideways')])
+
+
+class Test_FilteringMessages(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  @httprettified
+  def test_restrictions_are_sent_to_exchange(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=LIST_MESSAGES_LAST_PAGE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    unread_invoices = IsEqualTo(u'message:IsRead', False) & Contains(u'item:Subject', u'invoice')
+    self.service.mail().list_messages(folder_id=u'inbox', restriction=unread_invoices, order_by=u'item:DateTimeReceived')
+
+    request = etree.fromstring(HTTPretty.last_request.body)
+    find_item = request.xpath(u'//m:FindItem', namespaces=soap_request.NAMESPACES)[0]
+
+    assert [etree.QName(child).localname for child in find_item] == [u'ItemShape', u'IndexedPageItemView', u'Restriction', u'SortOrder', u'ParentFolderIds']
+    assert len(request.xpath(u'//m:Restriction/t:And/t:IsEqualTo|//m:Restriction/t:And/t:Contains', namespaces=soap_request.NAMESPACES)) == 2
+
+  @httprettified
+  def test_every_page_is_filtered(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[list_response(LIST_MESSAGES_FIRST_PAGE), list_response(LIST_MESSAGES_LAST_PAGE)]
+    )
+
+    with requested_pages() as get_message_items:
+      list(self.service.mail().list_messages_batch(folder_id=u'inbox', max_entries=2, query_string=u'from:alice'))
+
+    assert [call[1][u'query_string'] for call in get_message_items.call_args_list] == [u'from:alice', u'from:alice']
+    assert u'<m:QueryString>from:alice</m:QueryString>' in HTTPretty.last_request.body.decode('utf-8')
+
+  @httprettified
+  def test_searches_ask_for_a_server_that_understands_them(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=LIST_MESSAGES_LAST_PAGE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    self.service.mail().list_messages(folder_id=u'inbox', query_string=u'from:alice')
+    assert u'Version="Exchange2010_SP1"' in HTTPretty.last_request.body.decode('utf-8')
+
+    self.service.mail().list_messages(folder_id=u'inbox')
+    assert u'RequestServerVersion' not in HTTPretty.last_request.body.decode('utf-8')
+
+
+class Test_ListingOnlySomeFields(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  def item_shape(self, body):
+    shape = etree.fromstring(body).xpath(u'//m:ItemShape', namespaces=soap_request.NAMESPACES)[0]
+    return (
+      shape.findtext(u'{%s}BaseShape' % soap_request.TYPE_NS),
+      [field.get(u'FieldURI') for field in shape.iter(u'{%s}FieldURI' % soap_request.TYPE_NS)],
+    )
+
+  @httprettified
+  def test_only_the_fields_asked_for_are_requested(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=LIST_MESSAGES_LAST_PAGE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    messages = self.service.mail().list_messages(folder_id=u'inbox', fields=[u'item:Subject', u'item:DateTimeReceived'])
+
+    assert self.item_shape(HTTPretty.last_request.body) == (u'IdOnly', [u'item:Subject', u'item:DateTimeReceived'])
+    assert [message.subject for message in messages] == [u'Third']
+
+  @httprettified
+  def test_fields_that_were_left_out_are_fetched_when_read(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[list_response(LIST_MESSAGES_FIRST_PAGE), list_response(GET_MESSAGE_RESPONSE)]
+    )
+
+    message = next(iter(self.service.mail().list_messages_batch(folder_id=u'inbox', fields=[u'item:Subject'])))
+    assert message.subject == u'First'
+    assert message._to_recipients is None
+
+    assert [recipient.email_address for recipient in message.to_recipients] == [u'lovelace@test.linkedin.com']
+    assert self.item_shape(HTTPretty.last_request.body)[0] == u'AllProperties'
+
+  @httprettified
+  def test_a_single_message_can_be_fetched_with_some_fields(self):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=GET_MESSAGE_RESPONSE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+
+    message = self.service.mail().get_message(u'message1', fields=[u'item:Subject', u'message:ToRecipients'])
+
+    assert self.item_shape(HTTPretty.last_request.body) == (u'IdOnly', [u'item:Subject', u'message:ToRecipients'])
+    assert message.subject == u'First'
+    assert [recipient.email_address for recipient in message.to_recipients] == [u'lovelace@test.linkedin.com']
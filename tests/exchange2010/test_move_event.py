@@ -10,6 +10,7 @@ from pytest import raises
 from pyexchange import Exchange2010Service
 
 from pyexchange.connection import ExchangeNTLMAuthConnection
+from pyexchange.exceptions import ExchangeItemNotFoundException
 
 from .fixtures import *
 
@@ -61,3 +62,67 @@ class Test_MovingAnEvent(unittest.TestCase):
     self.event.move_to('AAAhKSe7AAA=')
     assert self.event.calendar_id == 'AAAhKSe7AAA='
     assert self.event.id == TEST_EVENT_MOVED.id
+
+
+class Test_MovingEventsInBulk(unittest.TestCase):
+
+  @httprettified
+  def setUp(self):
+    self.calendar = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD,
+      )
+    ).calendar()
+
+    HTTPretty.register_uri(
+      HTTPretty.POST,
+      FAKE_EXCHANGE_URL,
+      body=GET_ITEM_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8'
+    )
+
+    self.events = [self.calendar.get_event(id=TEST_EVENT.id) for _ in range(2)]
+
+  def test_move_empty_folder_id(self):
+    with raises(TypeError):
+      self.calendar.move_events(self.events, None)
+
+  @httprettified
+  def test_events_are_moved_in_one_move_item(self):
+
+    HTTPretty.register_uri(
+      HTTPretty.POST,
+      FAKE_EXCHANGE_URL,
+      body=MOVE_ITEMS_WITH_A_MISSING_ITEM.encode('utf-8'),
+      content_type='text/xml; charset=utf-8'
+    )
+
+    result = self.calendar.move_events(self.events, 'AAAhKSe7AAA=')
+
+    body = HTTPretty.last_request.body.decode('utf-8')
+    assert u'MoveItem' in body
+    assert body.count(u'<t:ItemId ') == 2
+
+    assert result.succeeded == [self.events[0]]
+    assert self.events[0].id == TEST_EVENT_MOVED.id
+    assert self.events[0].calendar_id == 'AAAhKSe7AAA='
+
+  @httprettified
+  def test_failures_are_reported_per_event(self):
+
+    HTTPretty.register_uri(
+      HTTPretty.POST,
+      FAKE_EXCHANGE_URL,
+      body=MOVE_ITEMS_WITH_A_MISSING_ITEM.encode('utf-8'),
+      content_type='text/xml; charset=utf-8'
+    )
+
+    result = self.calendar.move_events(self.events, 'AAAhKSe7AAA=')
+
+    event, error = result.failed[0]
+    assert event is self.events[1]
+    assert isinstance(error, ExchangeItemNotFoundException)
+    assert event.id == TEST_EVENT.id
+    assert event.calendar_id == 'calendar'
@@ -0,0 +1,178 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import unittest
+from httpretty import HTTPretty, httprettified
+from mock import patch
+from pytest import raises
+from pyexchange import Exchange2010Service
+from pyexchange.base.notification import ExchangeNewMailEvent, ExchangeMovedEvent, ExchangeCreatedEvent, ExchangeModifiedEvent
+from pyexchange.connection import ExchangeNTLMAuthConnection
+from pyexchange.exceptions import *
+from pyexchange.exchange2010 import soap_request
+
+from .fixtures import *
+
+
+def xml_response(body):
+  return HTTPretty.Response(body=body.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8')
+
+
+class Test_Notifications(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  @httprettified
+  def test_pull_subscriptions_get_every_event_since_the_last_call(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[xml_response(SUBSCRIBE_RESPONSE), xml_response(GET_EVENTS_FIRST_RESPONSE), xml_response(GET_EVENTS_LAST_RESPONSE)]
+    )
+
+    subscription = self.service.notifications().subscribe([u'inbox'], event_types=[u'NewMailEvent', u'MovedEvent'])
+    events = subscription.get_events()
+
+    assert subscription.id == u'subscription-1'
+    assert [type(event) for event in events] == [ExchangeNewMailEvent, ExchangeMovedEvent]
+    assert events[0].item_id == u'new-mail-id'
+    assert events[0].parent_folder_id == u'inbox-id'
+    assert events[0].timestamp.minute == 0
+    assert events[1].old_item_id == u'old-moved-id'
+    assert events[1].old_parent_folder_id == u'inbox-id'
+
+    # status events aren't handed out, but still move the watermark along
+    assert subscription.watermark == u'watermark-3'
+    assert u'<m:Watermark>watermark-1</m:Watermark>' in HTTPretty.last_request.body.decode('utf-8')
+
+  @httprettified
+  def test_events_from_earlier_pages_are_asked_for_again_if_a_later_page_fails(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[xml_response(SUBSCRIBE_RESPONSE), xml_response(GET_EVENTS_FIRST_RESPONSE), xml_response(SOAP_FAULT),
+                 xml_response(GET_EVENTS_FIRST_RESPONSE), xml_response(GET_EVENTS_LAST_RESPONSE)]
+    )
+
+    subscription = self.service.notifications().subscribe([u'inbox'], event_types=[u'NewMailEvent', u'MovedEvent'])
+    watermark = subscription.watermark
+
+    with raises(FailedExchangeException):
+      subscription.get_events()
+    assert subscription.watermark == watermark
+
+    events = subscription.get_events()
+
+    assert [type(event) for event in events] == [ExchangeNewMailEvent, ExchangeMovedEvent]
+    assert subscription.watermark == u'watermark-3'
+    asked_from = [request.body.decode('utf-8') for request in HTTPretty.latest_requests]
+    assert sum(u'<m:Watermark>%s</m:Watermark>' % watermark in body for body in asked_from) >= 2
+
+  @httprettified
+  def test_streaming_subscriptions_read_every_envelope_on_the_connection(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[xml_response(SUBSCRIBE_RESPONSE), xml_response(GET_STREAMING_EVENTS_RESPONSE)]
+    )
+
+    subscription = self.service.notifications().subscribe([u'calendar'], streaming=True)
+    events = list(subscription.get_events(connection_timeout=1))
+
+    assert [type(event) for event in events] == [ExchangeCreatedEvent, ExchangeModifiedEvent]
+    assert events[0].item_id == u'created-id'
+    assert events[1].is_folder_event
+    assert events[1].unread_count == 0
+    assert subscription.watermark == u'watermark-2'
+
+    body = HTTPretty.last_request.body.decode('utf-8')
+    assert u'Version="Exchange2010_SP1"' in body
+    assert u'<m:ConnectionTimeout>1</m:ConnectionTimeout>' in body
+
+  def test_envelopes_split_across_chunks_are_put_back_together(self):
+    data = GET_STREAMING_EVENTS_RESPONSE.encode('utf-8')
+    chunks = [data[i:i + 100] for i in range(0, len(data), 100)]
+
+    with patch.object(self.service.connection, 'stream', return_value=iter(chunks)):
+      responses = list(self.service.send_for_documents(soap_request.get_streaming_events([u'subscription-1'])))
+
+    assert len(responses) == 3
+
+  def test_end_tags_split_between_tiny_chunks_are_found(self):
+    data = GET_STREAMING_EVENTS_RESPONSE.encode('utf-8')
+    chunks = [data[i:i + 3] for i in range(0, len(data), 3)]
+
+    with patch.object(self.service.connection, 'stream', return_value=iter(chunks)):
+      responses = list(self.service.send_for_documents(soap_request.get_streaming_events([u'subscription-1'])))
+
+    assert len(responses) == 3
+
+  def test_a_connection_closed_mid_envelope_is_an_error(self):
+    data = GET_STREAMING_EVENTS_RESPONSE.encode('utf-8')
+
+    with patch.object(self.service.connection, 'stream', return_value=iter([data[:-100]])):
+      with raises(FailedExchangeException):
+        list(self.service.send_for_documents(soap_request.get_streaming_events([u'subscription-1'])))
+
+  @httprettified
+  def test_listeners_subscribe_again_from_the_last_watermark(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[
+        xml_response(SUBSCRIBE_RESPONSE),
+        xml_response(SUBSCRIPTION_NOT_FOUND),
+        xml_response(SUBSCRIBE_RESPONSE),
+        xml_response(GET_EVENTS_LAST_RESPONSE),
+      ]
+    )
+
+    listener = self.service.notifications().listen([u'inbox'], poll_interval=0)
+    event = next(iter(listener))
+    listener.stop()
+
+    assert event.item_id == u'moved-id'
+    subscribes = [request.body.decode('utf-8') for request in HTTPretty.latest_requests if b'PullSubscriptionRequest' in request.body]
+    assert u'<t:Watermark>watermark-0</t:Watermark>' in subscribes[-1]
+
+  @httprettified
+  def test_listeners_hand_events_to_a_callback(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[xml_response(SUBSCRIBE_RESPONSE), xml_response(GET_EVENTS_LAST_RESPONSE)]
+    )
+
+    listener = self.service.notifications().listen([u'inbox'], poll_interval=0)
+    received = []
+
+    def callback(event):
+      received.append(event)
+      listener.stop()
+
+    listener.run(callback)
+
+    assert [event.item_id for event in received] == [u'moved-id']
+
+  @httprettified
+  def test_listeners_give_up_on_subscriptions_that_keep_expiring(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[xml_response(SUBSCRIBE_RESPONSE), xml_response(SUBSCRIPTION_NOT_FOUND)] * 4
+    )
+
+    listener = self.service.notifications().listen([u'inbox'], poll_interval=0, max_failures=2)
+
+    with patch('pyexchange.connection.time.sleep') as mock_sleep:
+      with raises(ExchangeSubscriptionExpiredException):
+        next(iter(listener))
+
+    # Three subscriptions, each of which expired straight away. Only the second replacement backed off first
+    assert mock_sleep.call_count == 1
@@ -0,0 +1,109 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import unittest
+from httpretty import HTTPretty, httprettified
+from pytest import raises
+from pyexchange import Exchange2010Service
+from pyexchange.connection import ExchangeNTLMAuthConnection
+from pyexchange.exceptions import *
+from pyexchange.sync import MemorySyncStateStore
+
+from .fixtures import *
+
+
+def sync_response(body):
+  return HTTPretty.Response(body=body.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8')
+
+
+class Test_SyncingFolderItems(unittest.TestCase):
+  service = None
+
+  @classmethod
+  def setUpClass(cls):
+    cls.service = Exchange2010Service(
+      connection=ExchangeNTLMAuthConnection(
+        url=FAKE_EXCHANGE_URL,
+        username=FAKE_EXCHANGE_USERNAME,
+        password=FAKE_EXCHANGE_PASSWORD
+      )
+    )
+
+  @httprettified
+  def test_changes_are_collected_across_pages(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[sync_response(SYNC_FOLDER_ITEMS_FIRST_PAGE), sync_response(SYNC_FOLDER_ITEMS_LAST_PAGE)]
+    )
+
+    changes = self.service.calendar().sync()
+
+    assert changes.created == [u'created-id']
+    assert changes.updated == [u'updated-id', u'read-id']
+    assert changes.deleted == [u'deleted-id']
+    assert changes.sync_state == u'state-2'
+
+  @httprettified
+  def test_each_page_picks_up_from_the_last_sync_state(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      responses=[sync_response(SYNC_FOLDER_ITEMS_FIRST_PAGE), sync_response(SYNC_FOLDER_ITEMS_LAST_PAGE)]
+    )
+
+    self.service.calendar().sync(max_changes=3)
+
+    body = HTTPretty.last_request.body.decode('utf-8')
+    assert u'<m:SyncState>state-1</m:SyncState>' in body
+    assert u'<m:MaxChangesReturned>3</m:MaxChangesReturned>' in body
+    assert u'<t:BaseShape>IdOnly</t:BaseShape>' in body
+
+  @httprettified
+  def test_sync_state_is_read_from_and_saved_to_the_store(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=SYNC_FOLDER_ITEMS_LAST_PAGE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8'
+    )
+
+    store = MemorySyncStateStore()
+    store.set(u'items:inbox', u'saved-state')
+
+    self.service.mail().sync(u'inbox', state_store=store)
+
+    assert u'<m:SyncState>saved-state</m:SyncState>' in HTTPretty.last_request.body.decode('utf-8')
+    assert store.get(u'items:inbox') == u'state-2'
+
+  @httprettified
+  def test_sync_state_is_not_saved_when_the_sync_fails(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=SYNC_STATE_INVALID.encode('utf-8'),
+      content_type='text/xml; charset=utf-8'
+    )
+
+    store = MemorySyncStateStore()
+    store.set(u'items:calendar', u'bad-state')
+
+    with raises(ExchangeInvalidSyncStateException):
+      self.service.calendar().sync(state_store=store)
+
+    assert store.get(u'items:calendar') == u'bad-state'
+
+  @httprettified
+  def test_folder_changes_are_synced(self):
+    HTTPretty.register_uri(
+      HTTPretty.POST, FAKE_EXCHANGE_URL,
+      body=SYNC_FOLDER_HIERARCHY_RESPONSE.encode('utf-8'),
+      content_type='text/xml; charset=utf-8'
+    )
+
+    store = MemorySyncStateStore()
+    changes = self.service.folder().sync(state_store=store)
+
+    assert changes.created == [u'new-folder-id']
+    assert changes.deleted == [u'old-folder-id']
+    assert store.get(u'folders:msgfolderroot') == u'folder-state'
+    assert u'<m:SyncState>' not in HTTPretty.last_request.body.decode('utf-8')
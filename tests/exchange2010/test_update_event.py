@@ -9,7 +9,9 @@ from httpretty import HTTPretty, httprettified
 from pytest import raises
 from pyexchange import Exchange2010Service
 
+from pyexchange.conflicts import ExchangeConflictPolicy
 from pyexchange.connection import ExchangeNTLMAuthConnection
+from pyexchange.exceptions import ExchangeIrresolvableConflictException, ExchangeStaleChangeKeyException
 
 from .fixtures import *  # noqa
 
@@ -431,3 +433,197 @@ class Test_UpdatingAnEvent(unittest.TestCase):
     with raises(ValueError):
       self.event.update(calendar_item_update_operation_type='SendToTheWholeWorld')
       assert u"SendToTheWholeWorld" in HTTPretty.last_request.body.decode('utf-8')
+
+
+class Test_UpdatingAnEventOptimistically(unittest.TestCase):
+
+  def get_event(self, **kwargs):
+    service = Exchange2010Service(connection=ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL, username=FAKE_EXCHANGE_USERNAME, password=FAKE_EXCHANGE_PASSWORD), **kwargs)
+
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=GET_ITEM_RESPONSE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+    event = service.calendar().get_event(id=TEST_EVENT.id)
+
+    self.requests_before_write = len(HTTPretty.latest_requests)
+    return event
+
+  def register_responses(self, *bodies):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, responses=[
+      HTTPretty.Response(body=body.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8') for body in bodies
+    ])
+
+  def sent_get_item(self):
+    return any(b'GetItem' in request.body for request in HTTPretty.latest_requests[self.requests_before_write:])
+
+  @httprettified
+  def test_writes_go_out_with_the_change_key_we_already_have(self):
+    event = self.get_event()
+    self.register_responses(UPDATE_ITEM_RESPONSE_WITH_NEW_CHANGE_KEY)
+
+    event.subject = TEST_EVENT_UPDATED.subject
+    event.update()
+
+    assert not self.sent_get_item()
+    assert u'ChangeKey="%s"' % TEST_EVENT.change_key in HTTPretty.last_request.body.decode('utf-8')
+    assert event.change_key == u'new-change-key'
+
+  @httprettified
+  def test_stale_change_keys_are_fetched_again_and_the_write_retried(self):
+    event = self.get_event()
+    self.register_responses(UPDATE_ITEM_STALE_CHANGE_KEY, GET_ITEM_RESPONSE_ID_ONLY, UPDATE_ITEM_RESPONSE_WITH_NEW_CHANGE_KEY)
+
+    event.subject = TEST_EVENT_UPDATED.subject
+    event.update()
+
+    assert self.sent_get_item()
+    assert b'UpdateItem' in HTTPretty.last_request.body
+    assert event.change_key == u'new-change-key'
+
+  @httprettified
+  def test_stale_change_keys_are_raised_if_the_policy_says_not_to_retry(self):
+    event = self.get_event(conflict_policy=ExchangeConflictPolicy(retries=0))
+    self.register_responses(UPDATE_ITEM_STALE_CHANGE_KEY)
+
+    event.subject = TEST_EVENT_UPDATED.subject
+    with raises(ExchangeStaleChangeKeyException):
+      event.update()
+
+  @httprettified
+  def test_conflicting_changes_are_not_overwritten_by_default(self):
+    event = self.get_event()
+    self.register_responses(UPDATE_ITEM_IRRESOLVABLE_CONFLICT)
+
+    event.subject = TEST_EVENT_UPDATED.subject
+    with raises(ExchangeIrresolvableConflictException):
+      event.update()
+
+    assert u'ConflictResolution="AutoResolve"' in HTTPretty.last_request.body.decode('utf-8')
+    assert not self.sent_get_item()
+
+  @httprettified
+  def test_conflicting_changes_can_be_overwritten(self):
+    event = self.get_event(conflict_policy=ExchangeConflictPolicy(overwrite_conflicts=True))
+    self.register_responses(UPDATE_ITEM_RESPONSE_WITH_NEW_CHANGE_KEY)
+
+    event.subject = TEST_EVENT_UPDATED.subject
+    event.update()
+
+    assert u'ConflictResolution="AlwaysOverwrite"' in HTTPretty.last_request.body.decode('utf-8')
+    assert event.change_key == u'new-change-key'
+
+  @httprettified
+  def test_the_change_key_can_be_fetched_before_every_write(self):
+    event = self.get_event(conflict_policy=ExchangeConflictPolicy(refresh_before_write=True))
+    self.register_responses(GET_ITEM_RESPONSE_ID_ONLY, UPDATE_ITEM_RESPONSE_WITH_NEW_CHANGE_KEY)
+
+    event.subject = TEST_EVENT_UPDATED.subject
+    event.update()
+
+    assert self.sent_get_item()
+
+
+class Test_UpdatingEventsInBulk(unittest.TestCase):
+
+  def get_events(self, count=2, **kwargs):
+    service = Exchange2010Service(connection=ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL, username=FAKE_EXCHANGE_USERNAME, password=FAKE_EXCHANGE_PASSWORD), **kwargs)
+    self.calendar = service.calendar()
+
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, body=GET_ITEM_RESPONSE.encode('utf-8'), content_type='text/xml; charset=utf-8')
+    events = [self.calendar.get_event(id=TEST_EVENT.id) for _ in range(count)]
+
+    self.requests_before_write = len(HTTPretty.latest_requests)
+    return events
+
+  def register_responses(self, *bodies):
+    HTTPretty.register_uri(HTTPretty.POST, FAKE_EXCHANGE_URL, responses=[
+      HTTPretty.Response(body=body.encode('utf-8'), status=200, content_type='text/xml; charset=utf-8') for body in bodies
+    ])
+
+  def sent(self, request_name):
+    return [request.body.decode('utf-8') for request in HTTPretty.latest_requests[self.requests_before_write:] if request_name in request.body]
+
+  @httprettified
+  def test_changes_go_out_in_one_update_item(self):
+    events = self.get_events()
+    self.register_responses(UPDATE_ITEMS_RESPONSE)
+
+    events[0].subject = TEST_EVENT_UPDATED.subject
+    events[1].location = TEST_EVENT_UPDATED.location
+    self.calendar.update_events(events)
+
+    body = HTTPretty.last_request.body.decode('utf-8')
+    assert body.count(u'<t:ItemChange>') == 2
+    assert TEST_EVENT_UPDATED.subject in body
+    assert TEST_EVENT_UPDATED.location in body
+    assert not self.sent(b'GetItem')
+
+  @httprettified
+  def test_new_change_keys_are_mapped_back_to_the_events(self):
+    events = self.get_events()
+    self.register_responses(UPDATE_ITEMS_RESPONSE)
+
+    for event in events:
+      event.subject = TEST_EVENT_UPDATED.subject
+    result = self.calendar.update_events(events)
+
+    assert result.ok
+    assert [event.change_key for event in events] == [u'first-change-key', u'second-change-key']
+    assert not events[0]._dirty_attributes
+    assert not events[1]._dirty_attributes
+
+  @httprettified
+  def test_only_stale_events_are_refreshed_and_retried(self):
+    events = self.get_events()
+    self.register_responses(UPDATE_ITEMS_WITH_A_STALE_CHANGE_KEY, GET_ITEM_RESPONSE_ID_ONLY, UPDATE_ITEM_RESPONSE_WITH_NEW_CHANGE_KEY)
+
+    for event in events:
+      event.subject = TEST_EVENT_UPDATED.subject
+    result = self.calendar.update_events(events)
+
+    assert result.ok
+    assert self.sent(b'GetItem')[0].count(u'<t:ItemId ') == 1
+    assert HTTPretty.last_request.body.decode('utf-8').count(u'<t:ItemChange>') == 1
+    assert [event.change_key for event in events] == [u'first-change-key', u'new-change-key']
+
+  @httprettified
+  def test_conflicting_changes_are_reported_instead_of_overwritten(self):
+    events = self.get_events()
+    self.register_responses(UPDATE_ITEMS_WITH_A_CONFLICT)
+
+    for event in events:
+      event.subject = TEST_EVENT_UPDATED.subject
+    result = self.calendar.update_events(events)
+
+    assert u'ConflictResolution="AutoResolve"' in HTTPretty.last_request.body.decode('utf-8')
+    assert result.succeeded == [events[0]]
+    assert result.failed[0][0] is events[1]
+    assert isinstance(result.failed[0][1], ExchangeIrresolvableConflictException)
+    assert events[1]._dirty_attributes
+
+  @httprettified
+  def test_changes_can_be_written_over_conflicts(self):
+    events = self.get_events(conflict_policy=ExchangeConflictPolicy(overwrite_conflicts=True))
+    self.register_responses(UPDATE_ITEMS_RESPONSE)
+
+    for event in events:
+      event.subject = TEST_EVENT_UPDATED.subject
+    result = self.calendar.update_events(events)
+
+    assert result.ok
+    assert u'ConflictResolution="AlwaysOverwrite"' in HTTPretty.last_request.body.decode('utf-8')
+
+  @httprettified
+  def test_events_without_changes_are_not_sent(self):
+    events = self.get_events()
+
+    result = self.calendar.update_events(events)
+
+    assert result.succeeded == events
+    assert len(HTTPretty.latest_requests) == self.requests_before_write
+
+  def test_events_that_were_never_created_are_reported(self):
+    calendar = Exchange2010Service(connection=ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL, username=FAKE_EXCHANGE_USERNAME, password=FAKE_EXCHANGE_PASSWORD)).calendar()
+    event = calendar.new_event(subject=TEST_EVENT.subject, start=TEST_EVENT.start, end=TEST_EVENT.end)
+
+    result = calendar.update_events([event])
+
+    assert isinstance(result.failed[0][1], TypeError)
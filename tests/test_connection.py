@@ -5,6 +5,8 @@ Licensed under the Apache License, Version 2.0 (the "License");?you may not use
 Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 """
 import httpretty
+import requests
+import threading
 import unittest
 from mock import patch, MagicMock, call
 from pytest import raises
@@ -82,3 +84,189 @@ def test_session_is_cached():
 
     # assert we only get called once, after that it's cached
     manager.MockSession.assert_called_once_with()
+
+
+@httpretty.activate
+def test_server_errors_are_retried():
+
+  httpretty.register_uri(httpretty.POST, FAKE_EXCHANGE_URL,
+                         responses=[
+                           httpretty.Response(body="", status=503),
+                           httpretty.Response(body="", status=502),
+                           httpretty.Response(body="ok", status=200),
+                         ])
+
+  connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                          username=FAKE_EXCHANGE_USERNAME,
+                                          password=FAKE_EXCHANGE_PASSWORD)
+
+  with patch('pyexchange.connection.time.sleep') as mock_sleep:
+    assert connection.send(b'yo', retries=2) == b'ok'
+
+  assert mock_sleep.call_count == 2
+
+
+@httpretty.activate
+def test_server_errors_raise_once_retries_are_used_up():
+
+  httpretty.register_uri(httpretty.POST, FAKE_EXCHANGE_URL,
+                         status=503,
+                         body="", )
+
+  connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                          username=FAKE_EXCHANGE_USERNAME,
+                                          password=FAKE_EXCHANGE_PASSWORD)
+
+  with patch('pyexchange.connection.time.sleep') as mock_sleep:
+    with raises(FailedExchangeException):
+      connection.send(b'yo', retries=3)
+
+  assert mock_sleep.call_count == 3
+
+
+@httpretty.activate
+def test_client_errors_are_not_retried():
+
+  httpretty.register_uri(httpretty.POST, FAKE_EXCHANGE_URL,
+                         status=401,
+                         body="", )
+
+  connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                          username=FAKE_EXCHANGE_USERNAME,
+                                          password=FAKE_EXCHANGE_PASSWORD)
+
+  with patch('pyexchange.connection.time.sleep') as mock_sleep:
+    with raises(FailedExchangeException):
+      connection.send(b'yo', retries=3)
+
+  assert not mock_sleep.called
+
+
+def test_connection_errors_are_retried_with_a_timeout_per_attempt():
+
+  with patch('requests.Session') as MockSession:
+    session = MockSession.return_value
+    session.post.side_effect = [requests.exceptions.ConnectionError(u'connection reset'), MagicMock(status_code=200, content=b'ok')]
+
+    connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                            username=FAKE_EXCHANGE_USERNAME,
+                                            password=FAKE_EXCHANGE_PASSWORD)
+
+    with patch('pyexchange.connection.time.sleep'):
+      assert connection.send(b'yo', retries=1, timeout=7) == b'ok'
+
+    assert session.post.call_count == 2
+    for post_call in session.post.call_args_list:
+      assert post_call[1]['timeout'] == 7
+
+
+def test_backoff_is_capped():
+
+  connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                          username=FAKE_EXCHANGE_USERNAME,
+                                          password=FAKE_EXCHANGE_PASSWORD,
+                                          backoff_factor=1,
+                                          max_backoff=5)
+
+  with patch('pyexchange.connection.time.sleep') as mock_sleep:
+    for attempt in range(10):
+      connection.backoff(attempt)
+
+  for sleep_call in mock_sleep.call_args_list:
+    assert 0 <= sleep_call[0][0] <= 5
+
+
+def test_pool_is_sized_from_the_connection_settings():
+
+  connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                          username=FAKE_EXCHANGE_USERNAME,
+                                          password=FAKE_EXCHANGE_PASSWORD,
+                                          pool_connections=3,
+                                          pool_maxsize=25)
+
+  adapter = connection.build_session().get_adapter(FAKE_EXCHANGE_URL)
+  assert adapter._pool_connections == 3
+  assert adapter._pool_maxsize == 25
+
+
+def test_shared_session_is_only_built_once_across_threads():
+
+  connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                          username=FAKE_EXCHANGE_USERNAME,
+                                          password=FAKE_EXCHANGE_PASSWORD)
+  sessions = []
+
+  def build():
+    sessions.append(connection.build_session())
+
+  threads = [threading.Thread(target=build) for _ in range(8)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  assert len(set(id(session) for session in sessions)) == 1
+  assert connection.pool_statistics()[u'sessions'] == 1
+
+
+def test_per_thread_sessions_each_get_their_own_authenticator():
+
+  connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                          username=FAKE_EXCHANGE_USERNAME,
+                                          password=FAKE_EXCHANGE_PASSWORD,
+                                          per_thread_session=True)
+  sessions = []
+
+  def build():
+    session = connection.build_session()
+    assert connection.build_session() is session
+    sessions.append(session)
+
+  threads = [threading.Thread(target=build) for _ in range(3)]
+  for thread in threads:
+    thread.start()
+  for thread in threads:
+    thread.join()
+
+  assert len(set(id(session) for session in sessions)) == 3
+  assert len(set(id(session.auth) for session in sessions)) == 3
+
+
+@httpretty.activate
+def test_pool_statistics_count_requests():
+
+  httpretty.register_uri(httpretty.POST, FAKE_EXCHANGE_URL,
+                         status=200,
+                         body="", )
+
+  connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                          username=FAKE_EXCHANGE_USERNAME,
+                                          password=FAKE_EXCHANGE_PASSWORD)
+
+  connection.send(b'test')
+  connection.send(b'test again')
+
+  stats = connection.pool_statistics()
+  assert stats[u'sessions'] == 1
+  assert stats[u'pools'] == 1
+  assert stats[u'requests'] == 2
+
+  connection.close()
+  assert connection.pool_statistics()[u'sessions'] == 0
+
+
+@httpretty.activate
+def test_responses_can_be_streamed_in_chunks():
+
+  httpretty.register_uri(httpretty.POST, FAKE_EXCHANGE_URL,
+                         status=200,
+                         body="0123456789", )
+
+  connection = ExchangeNTLMAuthConnection(url=FAKE_EXCHANGE_URL,
+                                          username=FAKE_EXCHANGE_USERNAME,
+                                          password=FAKE_EXCHANGE_PASSWORD)
+
+  chunks = list(connection.stream(b'yo', chunk_size=4))
+
+  assert b''.join(chunks) == b'0123456789'
+  assert len(chunks) == 3
@@ -0,0 +1,89 @@
+import random
+from datetime import datetime, timedelta
+
+from pytest import raises
+from pytz import utc
+
+from pyexchange.intervals import ExchangeIntervalIndex, find_free_slots
+
+MORNING = datetime(2050, 1, 3, 9, tzinfo=utc)
+
+
+class Event(object):
+  def __init__(self, start_hour, end_hour):
+    self.start = MORNING + timedelta(hours=start_hour)
+    self.end = MORNING + timedelta(hours=end_hour)
+
+
+def hours(start_hour, end_hour):
+  return MORNING + timedelta(hours=start_hour), MORNING + timedelta(hours=end_hour)
+
+def test_overlapping_events_come_back_in_order():
+  events = [Event(3, 4), Event(0, 1), Event(0.5, 2), Event(5, 6)]
+  index = ExchangeIntervalIndex(events)
+
+  assert index.overlapping(*hours(0.75, 3.5)) == [events[1], events[2], events[0]]
+
+def test_touching_events_dont_overlap():
+  index = ExchangeIntervalIndex([Event(0, 1), Event(2, 3)])
+
+  assert index.overlapping(*hours(1, 2)) == []
+  assert index.is_free(*hours(1, 2))
+  assert not index.is_free(*hours(1, 2.5))
+
+def test_conflicts_leave_out_the_event_itself():
+  events = [Event(0, 2), Event(1, 3), Event(4, 5)]
+  index = ExchangeIntervalIndex(events)
+
+  assert index.conflicts(events[0]) == [events[1]]
+  assert index.conflicts(events[2]) == []
+
+def test_events_can_be_added_and_removed():
+  long_meeting = Event(0, 8)
+  index = ExchangeIntervalIndex([long_meeting, Event(1, 2)])
+
+  index.remove(long_meeting)
+  assert long_meeting not in index
+  assert index.is_free(*hours(3, 4))
+
+  index.insert(long_meeting)
+  assert len(index) == 2
+  assert not index.is_free(*hours(3, 4))
+
+  with raises(KeyError):
+    index.remove(Event(0, 1))
+
+def test_events_need_times():
+  event = Event(0, 1)
+  event.end = None
+
+  with raises(ValueError):
+    ExchangeIntervalIndex([event])
+
+def test_lookups_agree_with_checking_every_event():
+  random.seed(20500103)
+  events = []
+  for _ in range(300):
+    start = random.uniform(0, 200)
+    events.append(Event(start, start + random.uniform(0.25, 10)))
+
+  index = ExchangeIntervalIndex(events)
+  for event in events[::3]:
+    index.remove(event)
+  remaining = [event for position, event in enumerate(events) if position % 3]
+
+  for _ in range(100):
+    start = random.uniform(-5, 210)
+    window = hours(start, start + random.uniform(0.1, 6))
+
+    expected = [event for event in remaining if event.start < window[1] and event.end > window[0]]
+    assert sorted(map(id, index.overlapping(*window))) == sorted(map(id, expected))
+    assert index.is_free(*window) == (not expected)
+
+def test_free_slots_across_several_people():
+  alice = ExchangeIntervalIndex([Event(0, 1), Event(4, 5)])
+  bob = ExchangeIntervalIndex([Event(0.5, 2), Event(2.25, 3)])
+
+  assert find_free_slots([alice, bob], *hours(0, 8)) == [hours(2, 2.25), hours(3, 4), hours(5, 8)]
+  assert find_free_slots([alice, bob], *hours(0, 8), duration=timedelta(hours=1)) == [hours(3, 4), hours(5, 8)]
+  assert alice.free_slots(*hours(0, 4)) == [hours(1, 4)]
@@ -0,0 +1,52 @@
+from datetime import date
+
+from pytest import raises
+
+from pyexchange.recurrence import occurrence_dates
+
+
+def dates(*args, **kwargs):
+  return list(occurrence_dates(*args, **kwargs))
+
+def test_daily_every_other_day():
+  assert dates(u'daily', date(2050, 1, 1), interval=2, end_date=date(2050, 1, 7)) == [
+    date(2050, 1, 1), date(2050, 1, 3), date(2050, 1, 5), date(2050, 1, 7),
+  ]
+
+def test_weekly_on_several_days_every_other_week():
+  # 2050-01-04 is a Tuesday
+  assert dates(u'weekly', date(2050, 1, 4), interval=2, days=u'Monday Thursday', end_date=date(2050, 1, 31)) == [
+    date(2050, 1, 6), date(2050, 1, 17), date(2050, 1, 20), date(2050, 1, 31),
+  ]
+
+def test_weekly_understands_day_groups():
+  assert dates(u'weekly', date(2050, 1, 1), days=u'WeekendDay', end_date=date(2050, 1, 9)) == [
+    date(2050, 1, 1), date(2050, 1, 2), date(2050, 1, 8), date(2050, 1, 9),
+  ]
+
+def test_weekly_needs_days():
+  with raises(ValueError):
+    dates(u'weekly', date(2050, 1, 1), end_date=date(2050, 2, 1))
+
+def test_monthly_uses_the_last_day_of_short_months():
+  assert dates(u'monthly', date(2050, 1, 31), end_date=date(2050, 4, 30)) == [
+    date(2050, 1, 31), date(2050, 2, 28), date(2050, 3, 31), date(2050, 4, 30),
+  ]
+
+def test_yearly_on_a_leap_day():
+  assert dates(u'yearly', date(2048, 2, 29), end_date=date(2052, 3, 1)) == [
+    date(2048, 2, 29), date(2049, 2, 28), date(2050, 2, 28), date(2051, 2, 28), date(2052, 2, 29),
+  ]
+
+def test_starting_later_in_the_series_skips_ahead():
+  assert dates(u'daily', date(2050, 1, 1), interval=3, end_date=date(2050, 1, 12), from_date=date(2050, 1, 8)) == [
+    date(2050, 1, 10),
+  ]
+
+def test_series_without_an_end_go_on():
+  occurrences = occurrence_dates(u'monthly', date(2050, 1, 15), interval=6)
+  assert [next(occurrences) for _ in range(3)] == [date(2050, 1, 15), date(2050, 7, 15), date(2051, 1, 15)]
+
+def test_unknown_patterns_are_rejected():
+  with raises(ValueError):
+    dates(u'fortnightly', date(2050, 1, 1))
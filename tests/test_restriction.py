@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from lxml import etree
+from pytest import raises
+from pytz import timezone
+
+from pyexchange.exchange2010.soap_request import restriction_node
+from pyexchange.restriction import And, Or, Not, IsEqualTo, IsGreaterThan, Contains, Exists
+
+
+def xml(restriction):
+  return etree.tostring(restriction_node(restriction)).decode('utf-8')
+
+def test_restrictions_combine_with_operators():
+  unread = IsEqualTo(u'message:IsRead', False)
+  invoice = Contains(u'item:Subject', u'invoice')
+
+  assert unread & invoice == And(unread, invoice)
+  assert unread | invoice == Or(unread, invoice)
+  assert ~unread == Not(unread)
+  assert ~~unread == unread
+
+def test_chained_ands_are_flattened():
+  a, b, c = IsEqualTo(u'item:Subject', u'a'), IsEqualTo(u'item:Subject', u'b'), IsEqualTo(u'item:Subject', u'c')
+
+  assert (a & b & c).restrictions == [a, b, c]
+  assert (a & (b | c)).restrictions == [a, Or(b, c)]
+
+def test_comparisons_compare_a_field_with_a_constant():
+  restriction = restriction_node(IsEqualTo(u'message:IsRead', False))
+
+  assert etree.QName(restriction).localname == u'Restriction'
+  assert (
+    u'<t:IsEqualTo><t:FieldURI FieldURI="message:IsRead"/><t:FieldURIOrConstant><t:Constant Value="false"/></t:FieldURIOrConstant></t:IsEqualTo>'
+    in xml(IsEqualTo(u'message:IsRead', False))
+  )
+
+def test_datetimes_are_sent_in_utc():
+  received_after = timezone('US/Pacific').localize(datetime(2050, 1, 1, 9, 0, 0))
+
+  assert u'<t:Constant Value="2050-01-01T17:00:00Z"/>' in xml(IsGreaterThan(u'item:DateTimeReceived', received_after))
+
+def test_contains_says_how_to_match():
+  assert (
+    u'<t:Contains ContainmentMode="Prefixed" ContainmentComparison="Exact"><t:FieldURI FieldURI="item:Subject"/><t:Constant Value="RE:"/></t:Contains>'
+    in xml(Contains(u'item:Subject', u'RE:', mode=u'Prefixed', comparison=u'Exact'))
+  )
+
+def test_combinations_nest():
+  restriction = Not(IsEqualTo(u'message:IsRead', True) | Exists(u'item:Categories'))
+
+  assert (
+    u'<t:Not><t:Or><t:IsEqualTo><t:FieldURI FieldURI="message:IsRead"/><t:FieldURIOrConstant><t:Constant Value="true"/></t:FieldURIOrConstant></t:IsEqualTo>'
+    u'<t:Exists><t:FieldURI FieldURI="item:Categories"/></t:Exists></t:Or></t:Not>'
+    in xml(restriction)
+  )
+
+def test_unknown_containment_modes_are_rejected():
+  with raises(ValueError):
+    Contains(u'item:Subject', u'invoice', mode=u'Somewhere')
+
+def test_empty_combinations_are_rejected():
+  with raises(ValueError):
+    And()
@@ -0,0 +1,73 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import os
+import shutil
+import tempfile
+import unittest
+from pyexchange.sync import ExchangeSyncResult, MemorySyncStateStore, FileSyncStateStore, SqliteSyncStateStore
+
+
+def test_an_item_is_only_reported_once():
+  result = ExchangeSyncResult()
+  result.add_created(u'a')
+  result.add_updated(u'a')
+  result.add_updated(u'b')
+  result.add_deleted(u'b')
+
+  assert result.created == [u'a']
+  assert result.updated == []
+  assert result.deleted == [u'b']
+
+
+def test_items_created_and_deleted_between_syncs_are_dropped():
+  result = ExchangeSyncResult()
+  result.add_created(u'a')
+  result.add_deleted(u'a')
+
+  assert len(result) == 0
+
+
+class Test_SyncStateStores(unittest.TestCase):
+
+  def setUp(self):
+    self.directory = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.directory)
+
+  def stores(self):
+    return [
+      MemorySyncStateStore(),
+      FileSyncStateStore(os.path.join(self.directory, u'sync.json')),
+      SqliteSyncStateStore(os.path.join(self.directory, u'sync.db')),
+    ]
+
+  def test_states_are_saved_by_key(self):
+    for store in self.stores():
+      assert store.get(u'items:calendar') is None
+
+      store.set(u'items:calendar', u'one')
+      store.set(u'items:inbox', u'two')
+      store.set(u'items:calendar', u'three')
+
+      assert store.get(u'items:calendar') == u'three'
+      assert store.get(u'items:inbox') == u'two'
+
+  def test_states_can_be_forgotten(self):
+    for store in self.stores():
+      store.set(u'items:calendar', u'one')
+      store.delete(u'items:calendar')
+      store.delete(u'items:never-saved')
+
+      assert store.get(u'items:calendar') is None
+
+  def test_persistent_stores_survive_a_restart(self):
+    FileSyncStateStore(os.path.join(self.directory, u'sync.json')).set(u'key', u'state')
+    SqliteSyncStateStore(os.path.join(self.directory, u'sync.db')).set(u'key', u'state')
+
+    assert FileSyncStateStore(os.path.join(self.directory, u'sync.json')).get(u'key') == u'state'
+    assert SqliteSyncStateStore(os.path.join(self.directory, u'sync.db')).get(u'key') == u'state'
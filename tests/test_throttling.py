@@ -0,0 +1,47 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+from mock import patch
+from pyexchange.throttling import ExchangeThrottlingScheduler
+
+
+def test_nothing_is_paused_by_default():
+  scheduler = ExchangeThrottlingScheduler()
+  assert scheduler.remaining(u'somebody@example.com') == 0
+
+
+def test_pause_only_affects_that_mailbox():
+  scheduler = ExchangeThrottlingScheduler()
+  scheduler.pause(u'busy@example.com', 30)
+
+  assert 29 < scheduler.remaining(u'busy@example.com') <= 30
+  assert scheduler.remaining(u'idle@example.com') == 0
+  assert scheduler.remaining(None) == 0
+
+
+def test_pauses_are_never_shortened():
+  scheduler = ExchangeThrottlingScheduler()
+  scheduler.pause(None, 30)
+  scheduler.pause(None, 1)
+
+  assert scheduler.remaining(None) > 29
+
+
+def test_wait_sleeps_until_the_pause_is_over():
+  scheduler = ExchangeThrottlingScheduler()
+
+  with patch('pyexchange.throttling._now') as mock_now:
+    mock_now.return_value = 100
+    scheduler.pause(None, 5)
+
+    def fake_sleep(seconds):
+      mock_now.return_value += seconds
+
+    with patch('pyexchange.throttling.time.sleep', side_effect=fake_sleep) as mock_sleep:
+      scheduler.wait(None)
+
+  mock_sleep.assert_called_once_with(5)
+  assert scheduler.remaining(None) == 0
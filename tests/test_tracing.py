@@ -0,0 +1,51 @@
+"""
+(c) 2013 LinkedIn Corp. All rights reserved.
+Licensed under the Apache License, Version 2.0 (the "License");?you may not use this file except in compliance with the License. You may obtain a copy of the License at  http://www.apache.org/licenses/LICENSE-2.0
+
+Unless required by applicable law or agreed to in writing, software?distributed under the License is distributed on an "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+"""
+import logging
+from lxml import etree
+from mock import patch, MagicMock
+from pyexchange.tracing import WireTracer
+
+
+def debug_logger():
+  logger = MagicMock()
+  logger.isEnabledFor.return_value = True
+  return logger
+
+
+def test_tracing_is_off_by_default():
+  assert not WireTracer(logger=debug_logger()).sample()
+
+
+def test_nothing_is_traced_unless_the_logger_would_print_it():
+  logger = debug_logger()
+  logger.isEnabledFor.return_value = False
+
+  assert not WireTracer(enabled=True, logger=logger).sample()
+  logger.isEnabledFor.assert_called_once_with(logging.DEBUG)
+
+
+def test_only_a_sample_of_requests_is_traced():
+  tracer = WireTracer(enabled=True, sample_rate=0.25, logger=debug_logger())
+
+  with patch('pyexchange.tracing.random.random', side_effect=[0.1, 0.5]):
+    assert tracer.sample()
+    assert not tracer.sample()
+
+
+def test_traces_are_cut_off_at_max_bytes():
+  logger = debug_logger()
+  WireTracer(enabled=True, max_bytes=4, logger=logger).trace(u'Response', b'0123456789')
+
+  args = logger.debug.call_args[0]
+  assert args[1:] == (u'Response', u'0123', u'\n... 6 more bytes')
+
+
+def test_elements_are_serialized_when_traced():
+  logger = debug_logger()
+  WireTracer(enabled=True, logger=logger).trace(u'Request', etree.fromstring(u'<root/>'))
+
+  assert logger.debug.call_args[0][2].strip() == u'<root/>'
@@ -2,7 +2,9 @@ from datetime import datetime
 from pytz import timezone, utc
 from pytest import mark
 
-from pyexchange.utils import convert_datetime_to_utc
+from pytest import raises
+
+from pyexchange.utils import convert_datetime_to_utc, chunks, parallel_map
 
 
 def test_converting_none_returns_none():
@@ -22,3 +24,16 @@ def test_converting_tz_aware_date_returns_tz_aware_date():
   utc_time = utc.localize(datetime(year=2014, month=4, day=1, hour=8, minute=0, second=0))
 
   assert convert_datetime_to_utc(pacific_time) == utc_time
+
+def test_chunks_keep_the_remainder():
+  assert chunks([1, 2, 3, 4, 5], 2) == [[1, 2], [3, 4], [5]]
+
+def test_parallel_map_keeps_the_order():
+  assert parallel_map(lambda x: x * 2, range(20), max_workers=4) == [x * 2 for x in range(20)]
+
+def test_parallel_map_raises_errors():
+  def explode(x):
+    raise ValueError(x)
+
+  with raises(ValueError):
+    parallel_map(explode, [1, 2], max_workers=2)